@@ -0,0 +1,11 @@
+"""
+App configuration for the categories app.
+"""
+from django.apps import AppConfig
+
+
+class CategoriesConfig(AppConfig):
+    name = 'apps.categories'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
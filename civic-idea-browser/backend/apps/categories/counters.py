@@ -0,0 +1,49 @@
+"""
+Stored ``ideas_count`` counters for categories and tags.
+
+The counters only include non-draft ideas. They are kept up to date by the
+idea signal handlers with ``F()`` updates; ``recount_ideas_counts`` repairs
+drift with one aggregate query per model.
+"""
+from django.db.models import Count, F, Q
+from .models import Category, Tag
+
+COUNTED_MODELS = (Category, Tag)
+
+
+def adjust_ideas_count(model, pks, delta):
+    """Add ``delta`` to ``ideas_count`` on the ``model`` rows in ``pks``."""
+    pks = list(pks)
+    if pks and delta:
+        _apply_delta(model.objects.filter(pk__in=pks), delta)
+
+
+def adjust_idea_memberships(idea, delta):
+    """Add ``delta`` to every category and tag ``idea`` belongs to."""
+    for model in COUNTED_MODELS:
+        _apply_delta(model.objects.filter(ideas=idea), delta)
+
+
+def _apply_delta(queryset, delta):
+    if delta < 0:
+        queryset = queryset.filter(ideas_count__gte=-delta)
+    queryset.update(ideas_count=F('ideas_count') + delta)
+
+
+def recount_ideas_counts(batch_size=1000):
+    """
+    Recompute every counter from the idea relations and save the ones that
+    drifted. Returns ``{model_name: rows_fixed}``.
+    """
+    fixed = {}
+    for model in COUNTED_MODELS:
+        rows = model.objects.annotate(
+            actual=Count('ideas', filter=~Q(ideas__status='draft'))
+        ).exclude(ideas_count=F('actual')).only('pk', 'ideas_count')
+        drifted = []
+        for row in rows:
+            row.ideas_count = row.actual
+            drifted.append(row)
+        model.objects.bulk_update(drifted, ['ideas_count'], batch_size=batch_size)
+        fixed[model._meta.verbose_name_plural] = len(drifted)
+    return fixed
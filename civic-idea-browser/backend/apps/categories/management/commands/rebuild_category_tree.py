@@ -0,0 +1,16 @@
+"""
+Django management command to rebuild the category closure table.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.categories.tree import rebuild_closure, invalidate_category_tree
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the category closure table from Category.parent'
+    
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_closure()
+        invalidate_category_tree()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt category tree ({count} closure rows)'))
@@ -0,0 +1,17 @@
+"""
+Django management command to repair category and tag idea counters.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.categories.counters import recount_ideas_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute Category.ideas_count and Tag.ideas_count from the idea relations'
+    
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = recount_ideas_counts()
+        for name, count in fixed.items():
+            self.stdout.write(f'{name}: {count} counters corrected')
+        self.stdout.write(self.style.SUCCESS('Idea counters reconciled'))
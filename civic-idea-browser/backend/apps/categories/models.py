@@ -1,11 +1,13 @@
 """
 Models for the categories app.
 """
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
+from apps.core.models import DirtyFieldsMixin
 
 
-class Category(models.Model):
+class Category(DirtyFieldsMixin, models.Model):
     """
     Model for organizing ideas into categories.
     """
@@ -21,6 +23,9 @@ class Category(models.Model):
     is_active = models.BooleanField(_('active'), default=True)
     order = models.PositiveIntegerField(_('order'), default=0)
     
+    # Non-draft ideas in this category, maintained by apps.categories.counters.
+    ideas_count = models.PositiveIntegerField(_('ideas count'), default=0, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
@@ -33,22 +38,110 @@ class Category(models.Model):
     def __str__(self):
         return self.name
     
-    @property
-    def ideas_count(self):
-        """Return the number of ideas in this category."""
-        return self.ideas.count()
-    
     @property
     def full_path(self):
         """Return the full category path including parents."""
-        if self.parent:
-            return f"{self.parent.full_path} > {self.name}"
-        return self.name
+        if getattr(self, '_full_path', None) is None:
+            self._full_path = ' > '.join(
+                self.get_ancestors(include_self=True).values_list('name', flat=True)
+            )
+        return self._full_path
+    
+    def get_ancestors(self, include_self=False):
+        """Return this category's ancestors, root first, in one query."""
+        queryset = Category.objects.filter(descendant_links__descendant=self)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset.order_by('-descendant_links__depth')
+    
+    def get_descendants(self, include_self=False):
+        """Return every category in this category's subtree in one query."""
+        queryset = Category.objects.filter(ancestor_links__ancestor=self)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+    
+    def clean(self):
+        super().clean()
+        self._validate_parent()
+    
+    def _validate_parent(self):
+        if not self.pk or not self.parent_id:
+            return
+        if CategoryClosure.objects.filter(ancestor_id=self.pk, descendant_id=self.parent_id).exists():
+            raise ValidationError(
+                {'parent': _('A category cannot be moved under itself or one of its subcategories.')}
+            )
+    
+    def save(self, *args, **kwargs):
+        # Keep the closure table in step with parent: one insert for a new
+        # category, and a subtree relink when it moves.
+        update_fields = kwargs.get('update_fields')
+        creating = self._state.adding
+        moving = (
+            not creating
+            and (update_fields is None or 'parent' in update_fields)
+            and self.has_changed('parent_id')
+        )
+        if moving:
+            self._validate_parent()
+        self._full_path = None
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if creating:
+                CategoryClosure.objects.create(ancestor_id=self.pk, descendant_id=self.pk, depth=0)
+                self._link_subtree([(self.pk, 0)])
+            elif moving:
+                subtree = list(
+                    CategoryClosure.objects.filter(ancestor_id=self.pk).values_list('descendant_id', 'depth')
+                )
+                subtree_ids = [descendant_id for descendant_id, _ in subtree]
+                CategoryClosure.objects.filter(descendant_id__in=subtree_ids).exclude(
+                    ancestor_id__in=subtree_ids
+                ).delete()
+                self._link_subtree(subtree)
+    
+    def _link_subtree(self, subtree):
+        """Join ``(descendant_id, depth)`` pairs under the new parent's ancestors."""
+        if not self.parent_id:
+            return
+        parent_ancestors = CategoryClosure.objects.filter(
+            descendant_id=self.parent_id
+        ).values_list('ancestor_id', 'depth')
+        CategoryClosure.objects.bulk_create([
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+            for ancestor_id, up in parent_ancestors
+            for descendant_id, down in subtree
+        ])
 
 
-class Tag(models.Model):
+class CategoryClosure(models.Model):
+    """
+    Closure table for the category hierarchy: one row per (ancestor,
+    descendant) pair, including each category paired with itself at depth 0.
+    """
+    ancestor = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveSmallIntegerField(_('depth'))
+    
+    class Meta:
+        unique_together = ['ancestor', 'descendant']
+        verbose_name = _('category closure')
+        verbose_name_plural = _('category closures')
+        indexes = [
+            models.Index(fields=['descendant', 'depth']),
+        ]
+    
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
+class Tag(DirtyFieldsMixin, models.Model):
     """
     Model for tagging ideas with keywords.
+    
+    Like ``Category``, a save writes only the changed columns, so it never
+    puts back a stale ``ideas_count`` over a concurrent ``F()`` update.
     """
     name = models.CharField(_('name'), max_length=50, unique=True)
     slug = models.SlugField(_('slug'), max_length=50, unique=True)
@@ -56,6 +149,9 @@ class Tag(models.Model):
     color = models.CharField(_('color'), max_length=7, default='#6B7280')  # Hex color
     is_active = models.BooleanField(_('active'), default=True)
     
+    # Non-draft ideas with this tag, maintained by apps.categories.counters.
+    ideas_count = models.PositiveIntegerField(_('ideas count'), default=0, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
@@ -66,9 +162,4 @@ class Tag(models.Model):
         ordering = ['name']
     
     def __str__(self):
-        return self.name
-    
-    @property
-    def ideas_count(self):
-        """Return the number of ideas with this tag."""
-        return self.ideas.count() 
\ No newline at end of file
+        return self.name 
\ No newline at end of file
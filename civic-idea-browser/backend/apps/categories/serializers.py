@@ -0,0 +1,34 @@
+"""
+Serializers for the categories app.
+"""
+from rest_framework import serializers
+from .models import Category, Tag
+
+
+class CategorySerializer(serializers.ModelSerializer):
+    """
+    Serializer for Category model.
+    """
+    full_path = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = Category
+        fields = [
+            'id', 'name', 'slug', 'description', 'color', 'icon', 'parent',
+            'full_path', 'is_active', 'order', 'ideas_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'ideas_count', 'created_at', 'updated_at']
+
+
+class TagSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Tag model.
+    """
+    
+    class Meta:
+        model = Tag
+        fields = [
+            'id', 'name', 'slug', 'description', 'color', 'is_active',
+            'ideas_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'ideas_count', 'created_at', 'updated_at']
@@ -0,0 +1,28 @@
+"""
+Signal handlers for the categories app.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from apps.ideas.responsecache import schedule_version_bump
+from .models import Category, Tag
+from .tree import invalidate_category_tree
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_cached_tree(sender, **kwargs):
+    transaction.on_commit(invalidate_category_tree)
+
+
+@receiver(post_save, sender=Category)
+def invalidate_cached_listings(sender, **kwargs):
+    # Moving a category changes which ideas ``?category_tree=`` matches.
+    schedule_version_bump()
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Tag)
+def invalidate_cached_members(sender, instance, **kwargs):
+    # The relation rows are cascaded without m2m_changed, so bump the members here.
+    schedule_version_bump(instance.ideas.values_list('pk', flat=True))
@@ -0,0 +1,115 @@
+"""
+Tests for the stored ideas_count counters on categories and tags.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.categories.counters import recount_ideas_counts
+from apps.categories.models import Category, Tag
+
+
+@pytest.fixture
+def category(db):
+    return Category.objects.create(name='Parks', slug='parks')
+
+
+@pytest.fixture
+def tag(db):
+    return Tag.objects.create(name='Trees', slug='trees')
+
+
+def counts(*objects):
+    return [type(obj).objects.get(pk=obj.pk).ideas_count for obj in objects]
+
+
+def test_counters_follow_membership_changes(make_idea, category, tag):
+    ideas = [make_idea() for _ in range(3)]
+    draft = make_idea(status='draft')
+    
+    for idea in ideas + [draft]:
+        idea.categories.add(category)
+        idea.tags.add(tag)
+    ideas[0].categories.add(category)
+    assert counts(category, tag) == [3, 3]
+    
+    ideas[0].categories.remove(category)
+    ideas[0].categories.remove(category)
+    ideas[1].tags.clear()
+    draft.tags.clear()
+    assert counts(category, tag) == [2, 2]
+    
+    category.ideas.remove(ideas[1], draft)
+    tag.ideas.add(ideas[1])
+    assert counts(category, tag) == [1, 3]
+    
+    tag.ideas.clear()
+    assert counts(category, tag) == [1, 0]
+    assert recount_ideas_counts() == {'categories': 0, 'tags': 0}
+
+
+def test_counters_follow_status_changes_and_deletion(make_idea, category, tag):
+    idea = make_idea(status='draft')
+    idea.categories.add(category)
+    idea.tags.add(tag)
+    assert counts(category, tag) == [0, 0]
+    
+    idea.status = 'submitted'
+    idea.save()
+    assert counts(category, tag) == [1, 1]
+    
+    other = make_idea()
+    other.categories.add(category)
+    other.delete()
+    assert counts(category, tag) == [1, 1]
+    
+    idea.delete()
+    assert counts(category, tag) == [0, 0]
+    assert recount_ideas_counts() == {'categories': 0, 'tags': 0}
+
+
+def test_recount_repairs_drift(make_idea, category, tag):
+    idea = make_idea()
+    idea.categories.add(category)
+    Category.objects.update(ideas_count=7)
+    Tag.objects.update(ideas_count=2)
+    
+    assert recount_ideas_counts() == {'categories': 1, 'tags': 1}
+    assert counts(category, tag) == [1, 0]
+
+
+@pytest.mark.parametrize('model, relation', [(Category, 'categories'), (Tag, 'tags')])
+def test_saving_does_not_overwrite_the_counter(make_idea, model, relation):
+    obj = model.objects.create(name='Parks', slug='parks')
+    loaded = model.objects.get(pk=obj.pk)
+    
+    # Another request counts an idea after this instance was loaded.
+    getattr(make_idea(), relation).add(obj)
+    loaded.description = 'Green spaces'
+    loaded.save()
+    
+    assert counts(obj) == [1]
+
+
+@pytest.mark.parametrize('url_name', ['categories:category_list', 'categories:tag_list'])
+def test_list_query_count_does_not_grow_with_rows(api_client, make_idea, url_name):
+    def list_queries():
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(reverse(url_name))
+        assert response.status_code == 200
+        return len(queries)
+    
+    def add_rows(start):
+        for n in range(start, start + 10):
+            category = Category.objects.create(name=f'Category {n}', slug=f'category-{n}')
+            tag = Tag.objects.create(name=f'Tag {n}', slug=f'tag-{n}')
+            idea = make_idea()
+            idea.categories.add(category)
+            idea.tags.add(tag)
+    
+    add_rows(0)
+    few = list_queries()
+    add_rows(10)
+    
+    assert list_queries() == few <= 2
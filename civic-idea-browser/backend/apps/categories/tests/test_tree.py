@@ -0,0 +1,129 @@
+"""
+Tests for the category closure table and the cached category tree.
+"""
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+from apps.categories.models import Category, CategoryClosure
+from apps.categories.tree import TREE_CACHE_KEY, rebuild_closure
+
+
+@pytest.fixture
+def make_category(db):
+    def make(name, parent=None):
+        return Category.objects.create(name=name, slug=name.lower(), parent=parent)
+    return make
+
+
+@pytest.fixture
+def tree(make_category):
+    """
+    city
+    ├── parks
+    │   └── playgrounds
+    │       └── swings
+    └── transport
+    """
+    city = make_category('City')
+    parks = make_category('Parks', city)
+    playgrounds = make_category('Playgrounds', parks)
+    swings = make_category('Swings', playgrounds)
+    transport = make_category('Transport', city)
+    return {category.slug: category for category in (city, parks, playgrounds, swings, transport)}
+
+
+def closure_rows():
+    return set(CategoryClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+
+def names(queryset):
+    return list(queryset.values_list('name', flat=True))
+
+
+def test_closure_links_every_ancestor(tree):
+    assert names(tree['swings'].get_ancestors()) == ['City', 'Parks', 'Playgrounds']
+    assert set(names(tree['parks'].get_descendants(include_self=True))) == {'Parks', 'Playgrounds', 'Swings'}
+    assert CategoryClosure.objects.get(ancestor=tree['city'], descendant=tree['swings']).depth == 3
+    
+    before = closure_rows()
+    rebuild_closure()
+    assert closure_rows() == before
+
+
+def test_moving_a_subtree_relinks_its_descendants(tree):
+    playgrounds = tree['playgrounds']
+    playgrounds.parent = tree['transport']
+    playgrounds.save()
+    
+    assert names(tree['swings'].get_ancestors()) == ['City', 'Transport', 'Playgrounds']
+    assert set(names(tree['parks'].get_descendants())) == set()
+    assert set(names(tree['transport'].get_descendants())) == {'Playgrounds', 'Swings'}
+    assert Category.objects.get(pk=tree['swings'].pk).full_path == 'City > Transport > Playgrounds > Swings'
+    
+    moved = closure_rows()
+    rebuild_closure()
+    assert closure_rows() == moved
+
+
+def test_moving_to_the_root_unlinks_old_ancestors(tree):
+    parks = tree['parks']
+    parks.parent = None
+    parks.save()
+    
+    assert names(tree['swings'].get_ancestors()) == ['Parks', 'Playgrounds']
+    assert set(names(tree['city'].get_descendants())) == {'Transport'}
+
+
+@pytest.mark.parametrize('new_parent', ['parks', 'playgrounds', 'swings'])
+def test_move_under_own_subtree_is_rejected(tree, new_parent):
+    parks = tree['parks']
+    parks.parent = tree[new_parent]
+    before = closure_rows()
+    
+    with pytest.raises(ValidationError):
+        parks.full_clean()
+    with pytest.raises(ValidationError):
+        parks.save()
+    
+    assert closure_rows() == before
+    assert Category.objects.get(pk=parks.pk).parent_id == tree['city'].pk
+
+
+def test_ideas_in_a_moved_subtree_follow_it(api_client, tree, make_idea, settings):
+    settings.IDEA_RESPONSE_CACHE_TIMEOUT = 0
+    idea = make_idea()
+    idea.categories.add(tree['swings'])
+    
+    def in_tree(category):
+        response = api_client.get(reverse('ideas:idea_list'), {'category_tree': category.pk})
+        return [result['id'] for result in response.data['results']]
+    
+    assert in_tree(tree['parks']) == [idea.pk]
+    playgrounds = tree['playgrounds']
+    playgrounds.parent = tree['transport']
+    playgrounds.save()
+    
+    assert in_tree(tree['parks']) == []
+    assert in_tree(tree['transport']) == [idea.pk]
+
+
+def test_cached_tree_is_invalidated_on_save_and_delete(api_client, tree, django_capture_on_commit_callbacks):
+    url = reverse('categories:category_tree')
+    
+    def child_names():
+        return [child['name'] for child in api_client.get(url).data[0]['children']]
+    
+    assert child_names() == ['Parks', 'Transport']
+    assert cache.get(TREE_CACHE_KEY) is not None
+    
+    with django_capture_on_commit_callbacks(execute=True):
+        tree['transport'].name = 'Mobility'
+        tree['transport'].save()
+    assert cache.get(TREE_CACHE_KEY) is None
+    assert child_names() == ['Mobility', 'Parks']
+    
+    with django_capture_on_commit_callbacks(execute=True):
+        tree['parks'].delete()
+    assert child_names() == ['Mobility']
@@ -0,0 +1,97 @@
+"""
+Category tree loading and caching.
+
+The whole hierarchy is loaded with a single query and linked in Python;
+the serialized tree is cached until a category is saved or deleted.
+"""
+from django.core.cache import cache
+from .models import Category, CategoryClosure
+
+TREE_CACHE_KEY = 'categories:tree'
+
+
+def build_category_tree(active_only=True):
+    """
+    Return the root categories with ``tree_children`` lists attached and
+    ``full_path`` precomputed, using one query. With ``active_only``,
+    inactive categories and everything beneath them are left out.
+    """
+    categories = list(Category.objects.all())
+    by_id = {category.pk: category for category in categories}
+    for category in categories:
+        category.tree_children = []
+    
+    roots = []
+    for category in categories:
+        parent = by_id.get(category.parent_id)
+        if parent is None:
+            roots.append(category)
+        else:
+            parent.tree_children.append(category)
+    
+    def link(nodes, prefix):
+        kept = []
+        for node in nodes:
+            if active_only and not node.is_active:
+                continue
+            node._full_path = f'{prefix} > {node.name}' if prefix else node.name
+            node.tree_children = link(node.tree_children, node._full_path)
+            kept.append(node)
+        return kept
+    
+    return link(roots, '')
+
+
+def iter_tree(nodes):
+    """Yield categories depth-first in display order."""
+    for node in nodes:
+        yield node
+        yield from iter_tree(node.tree_children)
+
+
+def serialize_tree(nodes):
+    return [
+        {
+            'id': node.pk,
+            'name': node.name,
+            'slug': node.slug,
+            'description': node.description,
+            'color': node.color,
+            'icon': node.icon,
+            'full_path': node.full_path,
+            'children': serialize_tree(node.tree_children),
+        }
+        for node in nodes
+    ]
+
+
+def get_cached_category_tree():
+    """Return the serialized active category tree, building it on a miss."""
+    tree = cache.get(TREE_CACHE_KEY)
+    if tree is None:
+        tree = serialize_tree(build_category_tree())
+        cache.set(TREE_CACHE_KEY, tree, None)
+    return tree
+
+
+def invalidate_category_tree():
+    cache.delete(TREE_CACHE_KEY)
+
+
+def rebuild_closure():
+    """
+    Recompute the whole closure table from ``Category.parent``.
+    Returns the number of closure rows written.
+    """
+    parents = dict(Category.objects.values_list('pk', 'parent_id'))
+    links = []
+    for category_id in parents:
+        ancestor_id, depth = category_id, 0
+        seen = set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            links.append(CategoryClosure(ancestor_id=ancestor_id, descendant_id=category_id, depth=depth))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    CategoryClosure.objects.all().delete()
+    CategoryClosure.objects.bulk_create(links, batch_size=5000)
+    return len(links)
@@ -0,0 +1,13 @@
+"""
+URL patterns for the categories app.
+"""
+from django.urls import path
+from . import views
+
+app_name = 'categories'
+
+urlpatterns = [
+    path('categories/', views.CategoryListView.as_view(), name='category_list'),
+    path('categories/tree/', views.category_tree_view, name='category_tree'),
+    path('tags/', views.TagListView.as_view(), name='tag_list'),
+]
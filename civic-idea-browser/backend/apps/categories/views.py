@@ -0,0 +1,41 @@
+"""
+Views for the categories app.
+"""
+from rest_framework import generics, permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from .models import Tag
+from .serializers import CategorySerializer, TagSerializer
+from .tree import build_category_tree, iter_tree, get_cached_category_tree
+
+
+class CategoryListView(generics.ListAPIView):
+    """
+    View for listing active categories in tree order with their full paths.
+    """
+    serializer_class = CategorySerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = None
+    filter_backends = []
+    
+    def get_queryset(self):
+        return list(iter_tree(build_category_tree()))
+
+
+class TagListView(generics.ListAPIView):
+    """
+    View for listing active tags, most used first.
+    """
+    queryset = Tag.objects.filter(is_active=True).order_by('-ideas_count', 'name')
+    serializer_class = TagSerializer
+    permission_classes = [permissions.AllowAny]
+    filter_backends = []
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def category_tree_view(request):
+    """
+    Get the nested category tree (cached until a category changes).
+    """
+    return Response(get_cached_category_tree())
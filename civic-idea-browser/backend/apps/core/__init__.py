@@ -0,0 +1 @@
+# Core app for Civic Ideas platform 
\ No newline at end of file
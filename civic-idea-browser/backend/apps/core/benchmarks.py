@@ -0,0 +1,308 @@
+"""
+Benchmark scenarios for the API and ORM hot paths.
+
+Each scenario runs one request (or ORM operation) per iteration through
+DRF's test client, in process, against whatever database is configured,
+so the same suite runs on SQLite and PostgreSQL. Latency and the number of
+queries are recorded per iteration and summarized as percentiles. Writing
+scenarios run every iteration in a transaction that is rolled back, so the
+dataset stays the same between runs and results remain comparable with a
+stored baseline; ``on_commit`` work is therefore not included.
+"""
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.categories.tree import invalidate_category_tree
+from apps.ideas.models import Idea
+from apps.notifications.fanout import build_event, fan_out
+from apps.users.serializers import ClaimsTokenObtainPairSerializer
+
+User = get_user_model()
+
+PERCENTILES = (50, 90, 95, 99)
+UNCACHED = {'IDEA_RESPONSE_CACHE_DISABLED': ['list', 'detail']}
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class _Rollback(Exception):
+    pass
+
+
+class BenchmarkData:
+    """
+    Users, ideas and clients shared by the scenarios, picked
+    deterministically from the current dataset.
+    """
+    
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.users = list(User.objects.filter(is_active=True, is_staff=False).order_by('pk')[:200])
+        self.idea_ids = list(
+            Idea.objects.exclude(status='draft').order_by('-votes_count', 'pk').values_list('pk', flat=True)[:200]
+        )
+        if not self.users or not self.idea_ids:
+            raise BenchmarkError('The database has no users or published ideas; generate a dataset first.')
+        self.admin, _ = User.objects.get_or_create(
+            username='benchmark-admin',
+            defaults={'email': 'benchmark-admin@example.com', 'is_staff': True, 'password': '!'},
+        )
+    
+    def client(self, user=None):
+        client = APIClient(SERVER_NAME='localhost')
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+    
+    def token_client(self, user, claims=False):
+        if claims:
+            token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        else:
+            token = AccessToken.for_user(user)
+        client = APIClient(SERVER_NAME='localhost')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+    
+    def idea_id(self):
+        return self.rng.choice(self.idea_ids)
+    
+    def hot_idea_id(self):
+        return self.rng.choice(self.idea_ids[:10])
+    
+    def user(self):
+        return self.rng.choice(self.users)
+
+
+class Scenario:
+    """
+    One benchmarked operation. Subclasses implement ``run()``.
+    """
+    name = None
+    description = ''
+    writes = False
+    settings = {}
+    
+    def __init__(self, data):
+        self.data = data
+    
+    def run(self):
+        raise NotImplementedError
+    
+    def request(self, client, method, url, **kwargs):
+        response = getattr(client, method)(url, **kwargs)
+        if response.status_code >= 400:
+            raise BenchmarkError(f'{self.name}: {method.upper()} {url} returned {response.status_code}')
+        return response
+    
+    def iteration(self):
+        if not self.writes:
+            self.run()
+            return
+        try:
+            with transaction.atomic():
+                self.run()
+                raise _Rollback
+        except _Rollback:
+            pass
+    
+    def measure(self, iterations, warmup):
+        timings, queries = [], []
+        with override_settings(**self.settings):
+            for _ in range(warmup):
+                self.iteration()
+            for _ in range(iterations):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    self.iteration()
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+        return summarize(timings, queries)
+
+
+class IdeaListScenario(Scenario):
+    name = 'idea_list'
+    description = 'First page of the idea feed (response cache on)'
+    
+    def run(self):
+        self.request(self.data.client(), 'get', '/api/ideas/', data={'page_size': 20})
+
+
+class UncachedIdeaListScenario(IdeaListScenario):
+    name = 'idea_list_uncached'
+    description = 'First page of the idea feed (response cache off)'
+    settings = UNCACHED
+
+
+class IdeaDetailScenario(Scenario):
+    name = 'idea_detail'
+    description = 'Detail of one of the ten most popular ideas (response cache on)'
+    
+    def run(self):
+        self.request(self.data.client(), 'get', f'/api/ideas/{self.data.hot_idea_id()}/')
+
+
+class UncachedIdeaDetailScenario(IdeaDetailScenario):
+    name = 'idea_detail_uncached'
+    description = 'Detail of one of the ten most popular ideas (response cache off)'
+    settings = UNCACHED
+
+
+class JWTLookupScenario(Scenario):
+    name = 'jwt_lookup'
+    description = 'Cached idea detail with a JWT, user loaded from the database on every request'
+    settings = {'AUTH_USER_CACHE_TIMEOUT': 0}
+    claims = False
+    
+    def __init__(self, data):
+        super().__init__(data)
+        self.clients = [data.token_client(user, self.claims) for user in data.users[:20]]
+    
+    def run(self):
+        client = self.data.rng.choice(self.clients)
+        self.request(client, 'get', f'/api/ideas/{self.data.hot_idea_id()}/')
+
+
+class JWTCachedScenario(JWTLookupScenario):
+    name = 'jwt_cached'
+    description = 'Cached idea detail with a JWT, user from the two-tier user cache'
+    settings = {}
+
+
+class JWTClaimsScenario(JWTLookupScenario):
+    name = 'jwt_claims'
+    description = 'Cached idea detail with a JWT, user built from the token claims'
+    settings = {}
+    claims = True
+
+
+class VoteScenario(Scenario):
+    name = 'vote'
+    description = 'Cast a vote on a popular idea'
+    writes = True
+    
+    def run(self):
+        self.request(
+            self.data.client(self.data.user()), 'post', f'/api/ideas/{self.data.idea_id()}/vote/',
+            data={'vote_type': self.data.rng.choice(['up', 'down'])},
+        )
+
+
+class CommentScenario(Scenario):
+    name = 'comment'
+    description = 'Post a top-level comment on a popular idea'
+    writes = True
+    
+    def run(self):
+        self.request(
+            self.data.client(self.data.user()), 'post', f'/api/ideas/{self.data.idea_id()}/comments/',
+            data={'content': 'Benchmark comment'},
+        )
+
+
+class CommentThreadsScenario(Scenario):
+    name = 'comment_threads'
+    description = 'First page of comment threads with three replies each'
+    
+    def run(self):
+        self.request(self.data.client(), 'get', f'/api/ideas/{self.data.idea_id()}/comments/threads/')
+
+
+class NotificationFanOutScenario(Scenario):
+    name = 'notification_fanout'
+    description = 'Fan a notification out to 1000 users'
+    writes = True
+    recipients = 1000
+    
+    def run(self):
+        recipients = User.objects.filter(is_active=True).order_by('pk')[:self.recipients]
+        event = build_event('system', 'Benchmark notice', 'Benchmark message')
+        fan_out(User.objects.filter(pk__in=list(recipients.values_list('pk', flat=True))), event)
+
+
+class CategoryTreeScenario(Scenario):
+    name = 'category_tree'
+    description = 'Category tree (cached)'
+    
+    def run(self):
+        self.request(self.data.client(), 'get', '/api/categories/tree/')
+
+
+class UncachedCategoryTreeScenario(CategoryTreeScenario):
+    name = 'category_tree_uncached'
+    description = 'Category tree rebuilt from the database'
+    
+    def run(self):
+        invalidate_category_tree()
+        super().run()
+
+
+class UserListScenario(Scenario):
+    name = 'user_list'
+    description = 'First page of the admin user list'
+    
+    def run(self):
+        self.request(self.data.client(self.data.admin), 'get', '/api/users/')
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in (
+        IdeaListScenario, UncachedIdeaListScenario, IdeaDetailScenario, UncachedIdeaDetailScenario,
+        JWTLookupScenario, JWTCachedScenario, JWTClaimsScenario, VoteScenario, CommentScenario, CommentThreadsScenario, NotificationFanOutScenario,
+        CategoryTreeScenario, UncachedCategoryTreeScenario, UserListScenario,
+    )
+}
+
+
+def _percentile(ordered, percent):
+    # Nearest-rank percentile.
+    index = max(0, min(len(ordered) - 1, -(-len(ordered) * percent // 100) - 1))
+    return ordered[index]
+
+
+def summarize(timings, queries):
+    ordered = sorted(timings)
+    summary = {
+        'iterations': len(timings),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'min_ms': round(ordered[0], 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(_percentile(ordered, percent), 3)
+    summary['queries_median'] = statistics.median(queries)
+    summary['queries_max'] = max(queries)
+    return summary
+
+
+def run_scenarios(names, iterations, warmup, seed):
+    """Run the named scenarios and return ``{name: summary}``."""
+    data = BenchmarkData(seed)
+    return {name: SCENARIOS[name](data).measure(iterations, warmup) for name in names}
+
+
+def compare(results, baseline, threshold, metrics=('p50_ms', 'p95_ms')):
+    """
+    Return regressions of ``results`` against ``baseline`` as
+    ``(scenario, metric, baseline_value, value)`` tuples: latencies more than
+    ``threshold`` (a fraction) slower, or more queries than before.
+    """
+    regressions = []
+    for name, summary in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in metrics:
+            if summary[metric] > previous[metric] * (1 + threshold):
+                regressions.append((name, metric, previous[metric], summary[metric]))
+        if summary['queries_max'] > previous['queries_max']:
+            regressions.append((name, 'queries_max', previous['queries_max'], summary['queries_max']))
+    return regressions
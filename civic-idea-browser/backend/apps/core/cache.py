@@ -0,0 +1,22 @@
+"""
+Cache helpers shared across the Civic Ideas apps.
+"""
+
+
+def get_redis_connection(alias='default'):
+    """
+    Return the raw Redis client behind a django-redis cache alias.
+
+    Returns None when django-redis is not installed or the alias is served
+    by another backend (e.g. locmem in development), so callers can fall
+    back to an in-process implementation.
+    """
+    try:
+        from django_redis import get_redis_connection as _get_redis_connection
+    except ImportError:
+        return None
+
+    try:
+        return _get_redis_connection(alias)
+    except NotImplementedError:
+        return None
@@ -0,0 +1,204 @@
+"""
+Fixed-size thumbnails and WebP variants of idea images and user avatars.
+
+Each image field has a set of named sizes (``KINDS``), and every size is
+rendered as WebP and JPEG next to the original, under
+``variants/<original name without extension>/<size>.<format>``. What was
+rendered is recorded on the owning row (``Idea.image_variants``,
+``User.avatar_variants``) together with the source it was rendered from,
+the original's dimensions and the processing time in milliseconds, so
+serializers can produce the URLs without another query:
+
+    {'source': 'ideas/images/park.jpg', 'width': 1920, 'height': 1080, 'ms': 84.2,
+     'files': {'thumb': {'webp': 'variants/ideas/images/park/thumb.webp', 'jpeg': ...}}}
+
+Saving a new image schedules ``generate_image_variants``. Until that has
+run, or if it never did, serializers point at ``image_variant_view``,
+which renders the variants on first request and redirects to them.
+Rendering is CPU bound and touches no database, so ``render_variants``
+can run in worker processes; ``backfill_image_variants`` does that for
+existing media.
+"""
+import io
+import logging
+import os
+import time
+from dataclasses import dataclass
+from urllib.parse import urlencode
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+VARIANT_PREFIX = 'variants/'
+LOCK_TIMEOUT = 60
+EXIF_ORIENTATION = 0x0112
+
+
+@dataclass(frozen=True)
+class ImageKind:
+    """
+    An image field and the sizes rendered for it: ``{name: (width, height, crop)}``.
+    Cropped sizes are filled exactly; others fit inside the box.
+    """
+    model: str
+    field: str
+    state_field: str
+    sizes: dict
+    
+    def get_model(self):
+        return apps.get_model(self.model)
+
+
+KINDS = {
+    'idea': ImageKind('ideas.Idea', 'image', 'image_variants', {
+        'thumb': (320, 180, True),
+        'card': (640, 360, True),
+        'large': (1600, 1600, False),
+    }),
+    'avatar': ImageKind('users.User', 'avatar', 'avatar_variants', {
+        'small': (48, 48, True),
+        'medium': (128, 128, True),
+    }),
+}
+
+
+def variant_name(source, size, fmt):
+    return f'{VARIANT_PREFIX}{os.path.splitext(source)[0]}/{size}.{fmt}'
+
+
+def is_current(state, source):
+    """Return True if ``state`` holds variants rendered from ``source``."""
+    return bool(source) and bool(state) and state.get('source') == source and 'files' in state
+
+
+def _resize(image, width, height, crop):
+    if crop:
+        return ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail((width, height), Image.Resampling.LANCZOS)
+    return resized
+
+
+def _encode(image, fmt):
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    output = io.BytesIO()
+    image.save(output, FORMATS[fmt], quality=settings.IMAGE_VARIANT_QUALITY, method=4 if fmt == 'webp' else 0)
+    return output.getvalue()
+
+
+def render_variants(kind, source):
+    """
+    Render every size of ``source`` for ``kind`` into storage and return the
+    state to record. Failures are returned as ``{'source': ..., 'error': ...}``
+    so the image is not retried on every request.
+    """
+    started = time.perf_counter()
+    try:
+        with default_storage.open(source, 'rb') as original:
+            image = Image.open(original)
+            width, height = image.size
+            if image.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+                width, height = height, width
+            largest = max(max(box_width, box_height) for box_width, box_height, _ in KINDS[kind].sizes.values())
+            # JPEGs decode directly at a reduced scale when much larger than needed.
+            image.draft('RGB', (largest * 2, largest * 2))
+            image = ImageOps.exif_transpose(image)
+            files = {}
+            for size, (box_width, box_height, crop) in KINDS[kind].sizes.items():
+                resized = _resize(image, box_width, box_height, crop)
+                files[size] = {}
+                for fmt in FORMATS:
+                    name = variant_name(source, size, fmt)
+                    if default_storage.exists(name):
+                        default_storage.delete(name)
+                    files[size][fmt] = default_storage.save(name, ContentFile(_encode(resized, fmt)))
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        logger.warning('Could not render %s variants of %s: %s', kind, source, exc)
+        return {'source': source, 'error': str(exc)[:200]}
+    return {
+        'source': source, 'width': width, 'height': height,
+        'ms': round((time.perf_counter() - started) * 1000, 1), 'files': files,
+    }
+
+
+def record_variants(kind, state):
+    """Store ``state`` on every row whose image is ``state['source']``."""
+    image_kind = KINDS[kind]
+    model = image_kind.get_model()
+    rows = model.objects.filter(**{image_kind.field: state['source']})
+    pks = list(rows.values_list('pk', flat=True))
+    rows.update(**{image_kind.state_field: state})
+    if not pks:
+        return
+    # Refresh the caches holding these rows.
+    if kind == 'idea':
+        from apps.ideas.responsecache import bump_versions
+        transaction.on_commit(lambda: bump_versions(pks, listing=True))
+    else:
+        from apps.users.usercache import invalidate_cached_users
+        invalidate_cached_users(pks, revoke_claims=False)
+    if 'ms' in state:
+        logger.info('Rendered %s variants of %s in %.1f ms', kind, state['source'], state['ms'])
+
+
+def generate_variants(kind, source):
+    """Render and record ``source`` unless another process is already at it. Returns the state or None."""
+    lock = f'images:lock:{source}'
+    if not cache.add(lock, 1, LOCK_TIMEOUT):
+        return None
+    try:
+        state = render_variants(kind, source)
+        record_variants(kind, state)
+        return state
+    finally:
+        cache.delete(lock)
+
+
+def schedule_variants(kind, source, state):
+    """Queue rendering once the current transaction commits, unless ``state`` is current."""
+    if not source or (state or {}).get('source') == source:
+        return
+    from .tasks import generate_image_variants
+    transaction.on_commit(lambda: generate_image_variants.delay(kind, source))
+
+
+def variant_urls(kind, source, state, request=None):
+    """
+    Return ``{size: {format: url}}`` for an image, or None without one.
+    Variants not rendered yet point at ``image_variant_view``.
+    """
+    if not source:
+        return None
+    if is_current(state, source):
+        return {
+            size: {fmt: _absolute(request, default_storage.url(name)) for fmt, name in formats.items()}
+            for size, formats in state['files'].items()
+        }
+    if state and state.get('source') == source:
+        # Rendering failed; fall back to the original.
+        url = _absolute(request, default_storage.url(source))
+        return {size: {fmt: url for fmt in FORMATS} for size in KINDS[kind].sizes}
+    query = urlencode({'src': source})
+    return {
+        size: {
+            fmt: _absolute(request, f'{reverse("image_variant", args=[kind, size, fmt])}?{query}')
+            for fmt in FORMATS
+        }
+        for size in KINDS[kind].sizes
+    }
+
+
+def _absolute(request, url):
+    return request.build_absolute_uri(url) if request is not None else url
@@ -0,0 +1,238 @@
+"""
+Per-request SQL and cache instrumentation.
+
+A sampled request gets a ``RequestRecorder`` that is installed as a
+database ``execute_wrapper`` and as the current recorder for cache calls.
+It counts queries and times the database and cache, and groups queries by
+shape (the SQL with its parameters left out and ``IN`` lists collapsed) so
+the same statement repeated many times in one request, the usual N+1
+pattern, can be flagged.
+
+Each sampled request also updates per-view histograms of latency and query
+count. They are kept in a Redis hash per view when Redis is available, so
+every worker process adds to the same totals, and in process memory
+otherwise. ``render_metrics`` exposes them in the Prometheus text format.
+
+Unsampled requests never install a recorder. Cache backends are
+instrumented once per process, and for those requests the only extra work
+is one context variable lookup per cache call.
+"""
+import contextvars
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .cache import get_redis_connection
+
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)  # milliseconds
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+METRICS_KEY_PREFIX = 'metrics:requests:'
+METRICS_VIEWS_KEY = 'metrics:requests:views'
+CACHE_METHODS = ('get', 'set', 'add', 'delete', 'get_many', 'set_many', 'delete_many', 'incr', 'decr', 'touch')
+
+_IN_LIST = re.compile(r'\((?:%s|\?)(?:\s*,\s*(?:%s|\?))+\)')
+_NUMBER = re.compile(r'\b(LIMIT|OFFSET)\s+\d+', re.IGNORECASE)
+
+_current = contextvars.ContextVar('request_recorder', default=None)
+
+
+def query_shape(sql):
+    """Return ``sql`` with ``IN`` lists and ``LIMIT``/``OFFSET`` values normalized."""
+    return _NUMBER.sub(r'\1 N', _IN_LIST.sub('(...)', sql))
+
+
+class RequestRecorder:
+    """
+    Query and cache statistics of one request.
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_calls = 0
+        self.cache_time = 0.0
+        self.shapes = Counter()
+        self._cache_depth = 0
+    
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.shapes[query_shape(sql)] += 1
+    
+    def activate(self):
+        return _current.set(self)
+    
+    def deactivate(self, token):
+        _current.reset(token)
+    
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+    
+    def repeated_queries(self, threshold):
+        """Return ``[(shape, count)]`` for shapes run at least ``threshold`` times."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+def _timed_cache_method(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        recorder = _current.get()
+        if recorder is None:
+            return method(self, *args, **kwargs)
+        # Backends implement some calls with others (e.g. incr via get/set); time the outermost only.
+        recorder._cache_depth += 1
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            recorder._cache_depth -= 1
+            if not recorder._cache_depth:
+                recorder.cache_time += time.perf_counter() - started
+                recorder.cache_calls += 1
+    return wrapper
+
+
+def instrument_cache_backends():
+    """Wrap the data methods of every configured cache backend class once."""
+    for alias in settings.CACHES:
+        backend_class = type(caches[alias])
+        if backend_class.__dict__.get('_instrumented'):
+            continue
+        for name in CACHE_METHODS:
+            setattr(backend_class, name, _timed_cache_method(getattr(backend_class, name)))
+        backend_class._instrumented = True
+
+
+def _bucket(value, buckets):
+    for bound in buckets:
+        if value <= bound:
+            return str(bound)
+    return '+Inf'
+
+
+class RedisMetricsStore:
+    """
+    One hash of counters per view, shared by all processes.
+    """
+    
+    def __init__(self, client):
+        self.client = client
+    
+    def record(self, view, fields):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(METRICS_VIEWS_KEY, view)
+        for field, amount in fields.items():
+            if isinstance(amount, float):
+                pipe.hincrbyfloat(f'{METRICS_KEY_PREFIX}{view}', field, amount)
+            else:
+                pipe.hincrby(f'{METRICS_KEY_PREFIX}{view}', field, amount)
+        pipe.execute()
+    
+    def snapshot(self):
+        views = sorted(view.decode() for view in self.client.smembers(METRICS_VIEWS_KEY))
+        pipe = self.client.pipeline(transaction=False)
+        for view in views:
+            pipe.hgetall(f'{METRICS_KEY_PREFIX}{view}')
+        return {
+            view: {field.decode(): float(value) for field, value in counters.items()}
+            for view, counters in zip(views, pipe.execute())
+        }
+
+
+class LocalMetricsStore:
+    """
+    Per-process counters used when Redis is not available.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(Counter)
+    
+    def record(self, view, fields):
+        with self._lock:
+            self._views[view].update(fields)
+    
+    def snapshot(self):
+        with self._lock:
+            return {view: dict(counters) for view, counters in sorted(self._views.items())}
+
+
+_local_store = LocalMetricsStore()
+
+
+def get_metrics_store():
+    client = get_redis_connection()
+    if client is None:
+        return _local_store
+    return RedisMetricsStore(client)
+
+
+def record_request_metrics(view, status_code, recorder, repeated):
+    """Add one sampled request to the histograms of ``view``."""
+    duration_ms = recorder.elapsed * 1000
+    get_metrics_store().record(view, {
+        'count': 1,
+        f'status:{status_code // 100}xx': 1,
+        f'latency:{_bucket(duration_ms, LATENCY_BUCKETS)}': 1,
+        f'queries:{_bucket(recorder.queries, QUERY_BUCKETS)}': 1,
+        'latency_sum': duration_ms,
+        'db_sum': recorder.db_time * 1000,
+        'cache_sum': recorder.cache_time * 1000,
+        'queries_sum': recorder.queries,
+        'n_plus_one': 1 if repeated else 0,
+    })
+
+
+def _histogram_lines(name, view, counters, prefix, buckets, total_field):
+    lines = []
+    cumulative = 0
+    for bound in (*map(str, buckets), '+Inf'):
+        cumulative += counters.get(f'{prefix}:{bound}', 0)
+        lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {cumulative:g}')
+    lines.append(f'{name}_sum{{view="{view}"}} {counters.get(total_field, 0):g}')
+    lines.append(f'{name}_count{{view="{view}"}} {counters.get("count", 0):g}')
+    return lines
+
+
+def render_metrics():
+    """Return the per-view histograms in the Prometheus text format."""
+    lines = [
+        '# HELP civic_request_duration_ms Latency of sampled requests per view.',
+        '# TYPE civic_request_duration_ms histogram',
+    ]
+    snapshot = get_metrics_store().snapshot()
+    for view, counters in snapshot.items():
+        lines += _histogram_lines(
+            'civic_request_duration_ms', view, counters, 'latency', LATENCY_BUCKETS, 'latency_sum'
+        )
+    lines += [
+        '# HELP civic_request_queries SQL queries per sampled request per view.',
+        '# TYPE civic_request_queries histogram',
+    ]
+    for view, counters in snapshot.items():
+        lines += _histogram_lines('civic_request_queries', view, counters, 'queries', QUERY_BUCKETS, 'queries_sum')
+    for name, field, description in (
+        ('civic_request_db_ms_total', 'db_sum', 'Database time of sampled requests.'),
+        ('civic_request_cache_ms_total', 'cache_sum', 'Cache time of sampled requests.'),
+        ('civic_request_n_plus_one_total', 'n_plus_one', 'Sampled requests with repeated query shapes.'),
+    ):
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+        lines += [f'{name}{{view="{view}"}} {counters.get(field, 0):g}' for view, counters in snapshot.items()]
+    lines += ['# HELP civic_requests_total Sampled requests per view and status class.',
+              '# TYPE civic_requests_total counter']
+    for view, counters in snapshot.items():
+        for field, value in sorted(counters.items()):
+            if field.startswith('status:'):
+                lines.append(f'civic_requests_total{{view="{view}",status="{field[7:]}"}} {value:g}')
+    return '\n'.join(lines) + '\n'
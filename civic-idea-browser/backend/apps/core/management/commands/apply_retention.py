@@ -0,0 +1,23 @@
+"""
+Django management command to run the data retention policies.
+"""
+from django.core.management.base import BaseCommand
+from apps.core.retention import apply_retention_policies, ensure_future_partitions
+
+
+class Command(BaseCommand):
+    help = 'Delete or roll up rows past their retention period (see DATA_RETENTION_POLICIES)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', action='append', dest='policies', help='Only run this policy (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired rows')
+    
+    def handle(self, *args, **options):
+        if not options['dry_run']:
+            ensure_future_partitions()
+        results = apply_retention_policies(options['policies'], dry_run=options['dry_run'])
+        verb = 'would delete' if options['dry_run'] else 'deleted'
+        for name, stats in results.items():
+            self.stdout.write(
+                f"{name}: {verb} {stats['deleted']} rows, dropped {stats['partitions_dropped']} partitions"
+            )
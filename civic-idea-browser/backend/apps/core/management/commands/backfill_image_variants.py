@@ -0,0 +1,93 @@
+"""
+Django management command to render thumbnails and WebP variants of
+existing idea images and avatars.
+
+Images are rendered in forked worker processes, which only read the
+originals and write the variants to storage; the parent records each
+result on the rows that use the image, so the workers never touch the
+database and any number of them can run on SQLite.
+"""
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.core.images import KINDS, is_current, record_variants, render_variants
+
+
+def _render(task):
+    return render_variants(*task)
+
+
+class Command(BaseCommand):
+    help = 'Render the thumbnail and WebP variants of idea images and avatars that have none yet'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--kinds', nargs='+', choices=sorted(KINDS), default=list(KINDS))
+        parser.add_argument('--workers', type=int, default=1, help='Forked rendering processes')
+        parser.add_argument('--limit', type=int, help='Render at most this many images per kind')
+        parser.add_argument('--force', action='store_true', help='Render images that already have variants')
+    
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        for kind in options['kinds']:
+            tasks = [(kind, source) for source in self.pending(kind, options)]
+            self.stdout.write(f'{kind}: {len(tasks)} images to render')
+            if tasks:
+                self.run_kind(kind, tasks, options)
+    
+    def pending(self, kind, options):
+        image_kind = KINDS[kind]
+        rows = (
+            image_kind.get_model().objects.exclude(**{image_kind.field: ''})
+            .values_list(image_kind.field, image_kind.state_field)
+        )
+        sources = {}
+        for source, state in rows.iterator(chunk_size=2000):
+            if options['force'] or not is_current(state, source):
+                sources[source] = None
+        sources = list(sources)
+        return sources[:options['limit']] if options['limit'] else sources
+    
+    def run_kind(self, kind, tasks, options):
+        started = time.perf_counter()
+        timings, failed = [], 0
+        if options['workers'] > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(options['workers'], mp_context=get_context('fork')) as pool:
+                results = pool.map(_render, tasks, chunksize=4)
+                for done, state in enumerate(results, 1):
+                    failed += self.record(kind, state, timings)
+                    self.report(kind, done, len(tasks), started)
+        else:
+            for done, task in enumerate(tasks, 1):
+                failed += self.record(kind, _render(task), timings)
+                self.report(kind, done, len(tasks), started)
+        
+        elapsed = time.perf_counter() - started
+        summary = f'{kind}: {len(timings)} rendered, {failed} failed in {elapsed:.1f}s'
+        if timings:
+            ordered = sorted(timings)
+            summary += (
+                f' ({len(timings) / elapsed:.1f} images/s, per image p50 {statistics.median(ordered):.1f} ms,'
+                f' p95 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]:.1f} ms)'
+            )
+        self.stdout.write(self.style.SUCCESS(summary))
+    
+    def record(self, kind, state, timings):
+        record_variants(kind, state)
+        if 'error' in state:
+            self.stdout.write(self.style.WARNING(f'{state["source"]}: {state["error"]}'))
+            return 1
+        timings.append(state['ms'])
+        return 0
+    
+    def report(self, kind, done, total, started):
+        if done % 100 and done != total:
+            return
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{kind}: {done}/{total} images, {done / elapsed:.1f} images/s')
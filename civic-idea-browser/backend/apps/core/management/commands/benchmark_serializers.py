@@ -0,0 +1,107 @@
+"""
+Django management command to compare ModelSerializer and ValuesSerializer
+list serialization times. That both produce the same output is checked by
+``apps/core/tests/test_serializers.py``.
+"""
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from apps.categories.models import Category, Tag
+from apps.ideas.models import Idea
+from apps.ideas.serializers import IdeaSerializer, IdeaValuesSerializer
+from apps.users.serializers import UserSerializer, UserValuesSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ModelSerializer vs ValuesSerializer on user and idea lists'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[20, 100, 1000])
+        parser.add_argument('--repeat', type=int, default=5)
+    
+    def handle(self, *args, **options):
+        rows = sorted(options['rows'])
+        run_id = uuid.uuid4().hex[:8]
+        self.context = {'request': Request(APIRequestFactory().get('/api/'))}
+        self.seed(run_id, rows[-1])
+        try:
+            cases = [
+                ('users', User.objects.with_activity_counts().filter(username__startswith=f'bench-{run_id}-'),
+                 UserSerializer, UserValuesSerializer),
+                ('ideas', Idea.objects.filter(title__startswith=f'Serializer benchmark {run_id}')
+                 .select_related('author').prefetch_related('categories', 'tags'),
+                 IdeaSerializer, IdeaValuesSerializer),
+            ]
+            self.stdout.write(f'{"list":>6} {"rows":>6} {"model ms":>10} {"values ms":>10} {"speedup":>8}')
+            for name, queryset, serializer_class, values_serializer_class in cases:
+                queryset = queryset.order_by('pk')
+                for count in rows:
+                    model_ms = self.measure(options['repeat'], self.model_path, queryset, count, serializer_class)
+                    values_ms = self.measure(
+                        options['repeat'], self.values_path, queryset, count, values_serializer_class
+                    )
+                    self.stdout.write(
+                        f'{name:>6} {count:>6} {model_ms:>10.2f} {values_ms:>10.2f} {model_ms / values_ms:>7.1f}x'
+                    )
+        finally:
+            Idea.objects.filter(title__startswith=f'Serializer benchmark {run_id}').delete()
+            User.objects.filter(username__startswith=f'bench-{run_id}-').delete()
+            Category.objects.filter(slug__startswith=f'bench-{run_id}-').delete()
+            Tag.objects.filter(slug__startswith=f'bench-{run_id}-').delete()
+    
+    def seed(self, run_id, count):
+        users = User.objects.bulk_create([
+            User(
+                username=f'bench-{run_id}-{n}', email=f'bench-{run_id}-{n}@example.com', password='!',
+                first_name='Bench' if n % 2 else '', last_name=str(n) if n % 3 else '',
+                avatar=f'avatars/bench-{n}.png' if n % 4 == 0 else None,
+            )
+            for n in range(count)
+        ])
+        categories = [
+            Category.objects.create(name=f'Bench {run_id} {n}', slug=f'bench-{run_id}-{n}', order=n % 2)
+            for n in range(3)
+        ]
+        tags = Tag.objects.bulk_create([
+            Tag(name=f'bench {run_id} {n}', slug=f'bench-{run_id}-{n}') for n in range(5)
+        ])
+        ideas = Idea.objects.bulk_create([
+            Idea(
+                title=f'Serializer benchmark {run_id} {n}', description='Benchmark idea', summary='Summary',
+                author=users[n % len(users)], status='submitted',
+                estimated_cost='1234.50' if n % 2 else None,
+                image=f'ideas/images/bench-{n}.png' if n % 5 == 0 else None,
+                upvotes_count=n % 7, downvotes_count=n % 3,
+            )
+            for n in range(count)
+        ])
+        Idea.categories.through.objects.bulk_create([
+            Idea.categories.through(idea_id=idea.pk, category_id=category.pk)
+            for n, idea in enumerate(ideas) for category in categories[:n % 4]
+        ])
+        Idea.tags.through.objects.bulk_create([
+            Idea.tags.through(idea_id=idea.pk, tag_id=tag.pk)
+            for n, idea in enumerate(ideas) for tag in tags[n % 3:n % 5]
+        ])
+    
+    def model_path(self, queryset, count, serializer_class):
+        return serializer_class(list(queryset[:count]), many=True, context=self.context).data
+    
+    def values_path(self, queryset, count, values_serializer_class):
+        serializer = values_serializer_class(context=self.context)
+        return serializer.to_representation(serializer.get_values_queryset(queryset)[:count])
+    
+    def measure(self, repeat, func, *args):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(*args)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
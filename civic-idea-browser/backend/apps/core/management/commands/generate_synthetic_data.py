@@ -0,0 +1,450 @@
+"""
+Django management command to generate a large synthetic dataset for
+performance work.
+
+Rows are written with ``bulk_create`` in chunks, optionally from several
+forked worker processes. Every chunk draws from its own RNG seeded with
+``(seed, phase, chunk)``, and users, ideas and comments get explicit ids
+above the current maximum, so the generated content does not depend on the
+number of workers and is the same for the same seed, ``--chunk-size`` and
+database state.
+
+Distributions:
+
+* idea popularity (votes, comments, views) and user activity (authoring,
+  voting, commenting, notifications) follow Zipf's law over a shuffled
+  ranking, so a few ideas and users dominate;
+* comments form threads where replies favour the latest comment, which
+  produces long reply chains up to ``MAX_COMMENT_DEPTH``;
+* ideas are created evenly over ``--days`` with ids increasing over time,
+  and all engagement on an idea happens after it was created.
+
+Signals don't fire for bulk inserts, so the denormalized counters, the
+category/tag ``ideas_count``, trending scores and the search index are
+rebuilt at the end.
+"""
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from multiprocessing import get_context
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.categories.counters import recount_ideas_counts
+from apps.categories.models import Category, Tag
+from apps.core.models import explicit_timestamps
+from apps.ideas.models import Comment, Idea, IdeaView, Vote
+from apps.ideas.responsecache import bump_versions
+from apps.ideas.threads import MAX_COMMENT_DEPTH, comment_path
+from apps.ideas.trending import rebuild_trending_scores
+from apps.notifications.models import Notification
+from apps.users.models import UserProfile
+
+User = get_user_model()
+
+PHASES = ('users', 'ideas', 'votes', 'comments', 'views', 'notifications')
+
+WORDS = (
+    'park', 'bike', 'lane', 'library', 'transit', 'bus', 'street', 'light', 'tree', 'garden', 'school',
+    'water', 'recycling', 'solar', 'housing', 'market', 'bridge', 'crossing', 'playground', 'clinic',
+    'youth', 'senior', 'center', 'safety', 'noise', 'parking', 'river', 'trail', 'wifi', 'museum',
+    'festival', 'composting', 'sidewalk', 'shelter', 'energy', 'heritage', 'budget', 'plaza', 'pool',
+    'community', 'neighbourhood', 'public', 'free', 'new', 'better', 'green', 'open', 'local', 'safer',
+)
+FIRST_NAMES = ('Ana', 'Ben', 'Chen', 'Dara', 'Eli', 'Fatima', 'Gus', 'Hana', 'Ivan', 'Jo', 'Kofi', 'Lena')
+LAST_NAMES = ('Alvarez', 'Brown', 'Cohen', 'Diallo', 'Evans', 'Fischer', 'Garcia', 'Haddad', 'Ito', 'Jones')
+ORGANIZATIONS = ('', '', 'City Council', 'Residents Association', 'Transit Authority', 'Green Coalition')
+JOB_TITLES = ('', '', 'Engineer', 'Teacher', 'Planner', 'Student', 'Nurse', 'Retired')
+LOCATIONS = ('Downtown', 'Northside', 'Riverside', 'Old Town', 'Harbor', 'Eastgate', '')
+SCOPES = ('local', 'local', 'local', 'regional', 'national')
+USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_0) AppleWebKit/605.1.15 Version/17.0 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0',
+)
+STATUS_WEIGHTS = {
+    'draft': 8, 'submitted': 40, 'under_review': 20, 'approved': 12, 'rejected': 8, 'implemented': 7, 'archived': 5,
+}
+PRIORITY_WEIGHTS = {'low': 25, 'medium': 50, 'high': 20, 'critical': 5}
+NOTIFICATION_TYPE_WEIGHTS = {
+    'comment_added': 35, 'vote_received': 35, 'idea_updated': 10, 'idea_approved': 5, 'idea_rejected': 3,
+    'idea_implemented': 2, 'collaboration_invite': 3, 'mention': 5, 'system': 2,
+}
+
+# Set in the parent before the worker pool forks.
+_plan = None
+
+
+def _run_chunk(task):
+    connections.close_all()
+    return _plan.run(*task)
+
+
+def _zipf_cum_weights(rng, count, exponent):
+    """Cumulative Zipf weights over ``range(count)`` in a shuffled rank order."""
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return list(accumulate(1.0 / rank ** exponent for rank in ranks))
+
+
+class DatasetPlan:
+    """
+    Everything a worker needs to generate any chunk on its own.
+    """
+    
+    def __init__(self, options, category_ids, tag_ids):
+        self.seed = options['seed']
+        self.batch_size = options['batch_size']
+        self.counts = {phase: options[phase] for phase in PHASES}
+        self.category_ids = category_ids
+        self.tag_ids = tag_ids
+        self.end = timezone.make_aware(datetime.combine(options['end'] + timedelta(days=1), dt_time.min))
+        self.window = timedelta(days=options['days']).total_seconds()
+        self.start = self.end - timedelta(seconds=self.window)
+        self.password = make_password(options['password'])
+        self.idea_content_type_id = ContentType.objects.get_for_model(Idea).pk
+        
+        self.user_base = User.objects.aggregate(top=Max('pk'))['top'] or 0
+        self.idea_base = Idea.objects.aggregate(top=Max('pk'))['top'] or 0
+        self.comment_base = Comment.objects.aggregate(top=Max('pk'))['top'] or 0
+        
+        rng = self.rng('plan', 0)
+        exponent = options['zipf']
+        self.user_cum = _zipf_cum_weights(rng, self.counts['users'], exponent)
+        self.idea_cum = _zipf_cum_weights(rng, self.counts['ideas'], exponent)
+        self.user_range = range(self.counts['users'])
+        self.idea_range = range(self.counts['ideas'])
+        
+        # Comment counts are fixed up front so every chunk knows its first id.
+        idea_total = self.idea_cum[-1] if self.idea_cum else 0
+        self.comment_counts = []
+        previous = 0.0
+        for cum in self.idea_cum:
+            expected = self.counts['comments'] * (cum - previous) / idea_total
+            previous = cum
+            self.comment_counts.append(int(expected) + (rng.random() < expected % 1))
+        self.comment_offsets = [0, *accumulate(self.comment_counts)]
+    
+    def rng(self, phase, index):
+        return random.Random(f'{self.seed}:{phase}:{index}')
+    
+    def user_id(self, index):
+        return self.user_base + index + 1
+    
+    def idea_id(self, index):
+        return self.idea_base + index + 1
+    
+    def idea_created_at(self, index):
+        return self.start + timedelta(seconds=self.window * (index + 0.5) / self.counts['ideas'])
+    
+    def after(self, rng, moment):
+        return moment + timedelta(seconds=rng.random() * (self.end - moment).total_seconds())
+    
+    def pick_users(self, rng, k):
+        return [self.user_id(index) for index in rng.choices(self.user_range, cum_weights=self.user_cum, k=k)]
+    
+    def pick_ideas(self, rng, k):
+        return rng.choices(self.idea_range, cum_weights=self.idea_cum, k=k)
+    
+    def text(self, rng, words):
+        return ' '.join(rng.choice(WORDS) for _ in range(words))
+    
+    def sentences(self, rng, count):
+        return ' '.join(f'{self.text(rng, rng.randint(6, 16)).capitalize()}.' for _ in range(count))
+    
+    def tasks(self, phase, chunk_size):
+        if phase == 'comments':
+            # Whole ideas per chunk, roughly chunk_size comments each.
+            start = 0
+            for stop in range(1, self.counts['ideas'] + 1):
+                if self.comment_offsets[stop] - self.comment_offsets[start] >= chunk_size:
+                    yield phase, start, stop
+                    start = stop
+            if start < self.counts['ideas']:
+                yield phase, start, self.counts['ideas']
+            return
+        total = self.counts[phase]
+        if phase == 'votes':
+            # Chunks of voters, roughly chunk_size votes each.
+            if not total:
+                return
+            chunk_size = max(1, chunk_size * self.counts['users'] // total)
+            total = self.counts['users']
+        for start in range(0, total, chunk_size):
+            yield phase, start, min(start + chunk_size, total)
+    
+    def run(self, phase, start, stop):
+        rng = self.rng(phase, start)
+        with transaction.atomic():
+            return getattr(self, f'generate_{phase}')(rng, start, stop)
+    
+    def generate_users(self, rng, start, stop):
+        users, profiles = [], []
+        joined_window = self.window / 2
+        for index in range(start, stop):
+            pk = self.user_id(index)
+            joined = self.start - timedelta(seconds=joined_window * (1 - index / self.counts['users']))
+            users.append(User(
+                pk=pk, username=f'synth{pk}', email=f'synth{pk}@example.com', password=self.password,
+                first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                location=rng.choice(LOCATIONS), is_verified=rng.random() < 0.3,
+                email_notifications=rng.random() < 0.8, push_notifications=rng.random() < 0.6,
+                date_joined=joined, created_at=joined, updated_at=joined,
+            ))
+            profiles.append(UserProfile(
+                user_id=pk, organization=rng.choice(ORGANIZATIONS), job_title=rng.choice(JOB_TITLES),
+                expertise_areas=rng.sample(WORDS, rng.randint(0, 3)), profile_public=rng.random() < 0.9,
+                created_at=joined, updated_at=joined,
+            ))
+        with explicit_timestamps(User, UserProfile):
+            User.objects.bulk_create(users, batch_size=self.batch_size)
+            UserProfile.objects.bulk_create(profiles, batch_size=self.batch_size)
+        return len(users) + len(profiles)
+    
+    def generate_ideas(self, rng, start, stop):
+        ideas, categories, tags = [], [], []
+        statuses, status_weights = zip(*STATUS_WEIGHTS.items())
+        priorities, priority_weights = zip(*PRIORITY_WEIGHTS.items())
+        authors = self.pick_users(rng, stop - start)
+        for index, author_id in zip(range(start, stop), authors):
+            pk = self.idea_id(index)
+            created = self.idea_created_at(index)
+            status = rng.choices(statuses, status_weights)[0]
+            ideas.append(Idea(
+                pk=pk, author_id=author_id, title=self.text(rng, rng.randint(3, 8)).capitalize()[:200],
+                summary=self.sentences(rng, 1)[:500], description=self.sentences(rng, rng.randint(2, 8)),
+                status=status, priority=rng.choices(priorities, priority_weights)[0],
+                location=rng.choice(LOCATIONS), scope=rng.choice(SCOPES),
+                estimated_cost=Decimal(rng.randrange(1000, 5000000)) if rng.random() < 0.4 else None,
+                created_at=created, updated_at=created,
+                published_at=None if status == 'draft' else created + timedelta(minutes=rng.randint(0, 240)),
+            ))
+            for category_id in rng.sample(self.category_ids, min(len(self.category_ids), rng.randint(1, 2))):
+                categories.append(Idea.categories.through(idea_id=pk, category_id=category_id))
+            for tag_id in rng.sample(self.tag_ids, min(len(self.tag_ids), rng.randint(0, 4))):
+                tags.append(Idea.tags.through(idea_id=pk, tag_id=tag_id))
+        with explicit_timestamps(Idea):
+            Idea.objects.bulk_create(ideas, batch_size=self.batch_size)
+        Idea.categories.through.objects.bulk_create(categories, batch_size=self.batch_size)
+        Idea.tags.through.objects.bulk_create(tags, batch_size=self.batch_size)
+        return len(ideas) + len(categories) + len(tags)
+    
+    def generate_votes(self, rng, start, stop):
+        votes = []
+        user_total = self.user_cum[-1]
+        for index in range(start, stop):
+            share = self.user_cum[index] - (self.user_cum[index - 1] if index else 0.0)
+            expected = self.counts['votes'] * share / user_total
+            wanted = min(int(expected) + (rng.random() < expected % 1), self.counts['ideas'])
+            picked = set()
+            for _ in range(4):
+                if len(picked) >= wanted:
+                    break
+                picked.update(self.pick_ideas(rng, wanted - len(picked)))
+            user_id = self.user_id(index)
+            for idea_index in sorted(picked):
+                votes.append(Vote(
+                    idea_id=self.idea_id(idea_index), user_id=user_id,
+                    vote_type='up' if rng.random() < 0.75 else 'down',
+                    created_at=self.after(rng, self.idea_created_at(idea_index)),
+                ))
+        with explicit_timestamps(Vote):
+            Vote.objects.bulk_create(votes, batch_size=self.batch_size)
+        return len(votes)
+    
+    def generate_comments(self, rng, start, stop):
+        comments = []
+        pk = self.comment_base + self.comment_offsets[start]
+        for index in range(start, stop):
+            count = self.comment_counts[index]
+            if not count:
+                continue
+            idea_id = self.idea_id(index)
+            created = self.idea_created_at(index)
+            moments = sorted(self.after(rng, created) for _ in range(count))
+            authors = self.pick_users(rng, count)
+            thread = []
+            for moment, author_id in zip(moments, authors):
+                pk += 1
+                parent = None
+                if thread and rng.random() < 0.7:
+                    # Mostly reply to the latest comment, giving long chains.
+                    parent = thread[-1] if rng.random() < 0.6 else rng.choice(thread)
+                    if parent.depth + 1 >= MAX_COMMENT_DEPTH:
+                        parent = None
+                comment = Comment(
+                    pk=pk, idea_id=idea_id, author_id=author_id, content=self.sentences(rng, rng.randint(1, 4)),
+                    is_public=rng.random() < 0.97, created_at=moment, updated_at=moment,
+                    parent_id=parent.pk if parent else None, root_id=parent.root_id if parent else pk,
+                    depth=parent.depth + 1 if parent else 0,
+                    path=comment_path(parent.path if parent else '', pk),
+                )
+                thread.append(comment)
+                comments.append(comment)
+        with explicit_timestamps(Comment):
+            Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+        return len(comments)
+    
+    def generate_views(self, rng, start, stop):
+        count = stop - start
+        users = self.pick_users(rng, count)
+        views = []
+        for idea_index, user_id in zip(self.pick_ideas(rng, count), users):
+            views.append(IdeaView(
+                idea_id=self.idea_id(idea_index), user_id=user_id if rng.random() < 0.4 else None,
+                ip_address=f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}',
+                user_agent=rng.choice(USER_AGENTS), viewed_at=self.after(rng, self.idea_created_at(idea_index)),
+            ))
+        IdeaView.objects.bulk_create(views, batch_size=self.batch_size)
+        return len(views)
+    
+    def generate_notifications(self, rng, start, stop):
+        count = stop - start
+        types, type_weights = zip(*NOTIFICATION_TYPE_WEIGHTS.items())
+        notifications = []
+        for recipient_id, sender_id, idea_index in zip(
+            self.pick_users(rng, count), self.pick_users(rng, count), self.pick_ideas(rng, count)
+        ):
+            notification_type = rng.choices(types, type_weights)[0]
+            created = self.after(rng, self.idea_created_at(idea_index))
+            is_read = rng.random() < 0.6
+            notifications.append(Notification(
+                recipient_id=recipient_id, sender_id=sender_id, notification_type=notification_type,
+                title=f'{notification_type.replace("_", " ").capitalize()}: {self.text(rng, 4)}',
+                message=self.sentences(rng, 1), content_type_id=self.idea_content_type_id,
+                object_id=self.idea_id(idea_index), is_read=is_read, is_email_sent=is_read or rng.random() < 0.5,
+                read_at=self.after(rng, created) if is_read else None, created_at=created,
+            ))
+        with explicit_timestamps(Notification):
+            Notification.objects.bulk_create(notifications, batch_size=self.batch_size)
+        return len(notifications)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic synthetic dataset (users, profiles, ideas, votes, comment threads, '
+        'views, notifications) with Zipf-distributed popularity'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--ideas', type=int, default=20000)
+        parser.add_argument('--votes', type=int, default=500000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument('--views', type=int, default=1000000)
+        parser.add_argument('--notifications', type=int, default=300000)
+        parser.add_argument('--categories', type=int, default=12, help='Created only if none exist')
+        parser.add_argument('--tags', type=int, default=60, help='Created only if none exist')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent for popularity and activity')
+        parser.add_argument('--days', type=int, default=180, help='Length of the activity window')
+        parser.add_argument(
+            '--end', type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+            default=timezone.localdate(), help='Last day of the activity window (YYYY-MM-DD)'
+        )
+        parser.add_argument('--password', default='synthetic', help='Password of every generated user')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT')
+        parser.add_argument('--chunk-size', type=int, default=50000, help='Rows per worker task')
+        parser.add_argument('--workers', type=int, default=1, help='Forked writer processes; use 1 on SQLite')
+    
+    def handle(self, *args, **options):
+        global _plan
+        if options['users'] < 1 or options['ideas'] < 1:
+            raise CommandError('At least one user and one idea are required')
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            raise CommandError('SQLite allows a single writer; run with --workers 1')
+        
+        category_ids, tag_ids = self.ensure_taxonomy(options)
+        _plan = DatasetPlan(options, category_ids, tag_ids)
+        started = time.perf_counter()
+        total = 0
+        for phase in PHASES:
+            total += self.run_phase(phase, options)
+        
+        self.finalize(_plan)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s)'
+        ))
+    
+    def ensure_taxonomy(self, options):
+        if not Category.objects.exists():
+            rng = random.Random(f'{options["seed"]}:taxonomy')
+            parents = []
+            for n in range(options['categories']):
+                parent = rng.choice(parents) if parents and n % 3 == 2 else None
+                category = Category.objects.create(
+                    name=f'{rng.choice(WORDS).capitalize()} {n}', slug=f'synthetic-{n}', parent=parent, order=n
+                )
+                if parent is None:
+                    parents.append(category)
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create([
+                Tag(name=f'{word}-{n}', slug=f'synthetic-{n}')
+                for n, word in zip(range(options['tags']), WORDS * (options['tags'] // len(WORDS) + 1))
+            ])
+        return (
+            list(Category.objects.order_by('pk').values_list('pk', flat=True)),
+            list(Tag.objects.order_by('pk').values_list('pk', flat=True)),
+        )
+    
+    def run_phase(self, phase, options):
+        tasks = list(_plan.tasks(phase, options['chunk_size']))
+        if not tasks:
+            return 0
+        started = time.perf_counter()
+        written = 0
+        if options['workers'] > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(options['workers'], mp_context=get_context('fork')) as pool:
+                for rows in pool.map(_run_chunk, tasks):
+                    written += rows
+                    self.report(phase, written, started)
+        else:
+            for task in tasks:
+                written += _plan.run(*task)
+                self.report(phase, written, started)
+        return written
+    
+    def report(self, phase, written, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{phase}: {written} rows, {written / elapsed:.0f} rows/s')
+    
+    def finalize(self, plan):
+        self.stdout.write('Resetting sequences and recounting...')
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [User, Idea, Comment]):
+                cursor.execute(sql)
+        
+        def count(model, **filters):
+            return Coalesce(Subquery(
+                model.objects.filter(idea=OuterRef('pk'), **filters).order_by().values('idea')
+                .annotate(count=Count('pk')).values('count'),
+                output_field=IntegerField(),
+            ), 0)
+        
+        first_id, last_id = plan.idea_id(0), plan.idea_id(plan.counts['ideas'] - 1)
+        for start in range(first_id, last_id + 1, plan.batch_size):
+            Idea.objects.filter(pk__gte=start, pk__lt=start + plan.batch_size).update(
+                upvotes_count=count(Vote, vote_type='up'),
+                downvotes_count=count(Vote, vote_type='down'),
+                votes_count=count(Vote),
+                comments_count=count(Comment),
+                views_count=count(IdeaView),
+            )
+        recount_ideas_counts()
+        rebuild_trending_scores()
+        call_command('rebuild_search_index', stdout=self.stdout)
+        bump_versions()
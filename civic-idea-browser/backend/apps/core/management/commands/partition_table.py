@@ -0,0 +1,32 @@
+"""
+Django management command to convert a table to monthly range partitions.
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apps.core.partitions import is_partitioned, partition_table
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild a table as monthly range partitions on a timestamp column (PostgreSQL), '
+        'e.g. "ideas.IdeaView viewed_at" or "notifications.Notification created_at"'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='app_label.ModelName')
+        parser.add_argument('column', help='Timestamp column to partition on')
+        parser.add_argument('--months-ahead', type=int, default=3)
+    
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning requires PostgreSQL.')
+        try:
+            model = apps.get_model(options['model'])
+        except LookupError as exc:
+            raise CommandError(str(exc))
+        if is_partitioned(model._meta.db_table):
+            self.stdout.write(f'{model._meta.db_table} is already partitioned.')
+            return
+        partition_table(model, options['column'], options['months_ahead'])
+        self.stdout.write(self.style.SUCCESS(f'Partitioned {model._meta.db_table} by month on {options["column"]}'))
@@ -0,0 +1,103 @@
+"""
+Django management command to run the API/ORM benchmark suite and compare
+it with a stored baseline.
+"""
+import json
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apps.core.benchmarks import SCENARIOS, BenchmarkError, compare, run_scenarios
+from apps.ideas.models import Comment, Idea, Vote
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the idea, voting, commenting, fan-out, category and user hot paths, '
+        'write latency percentiles and query counts as JSON and check them against a baseline'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=1, help='Seed for picking users and ideas')
+        parser.add_argument('--output', help='Write results to this JSON file')
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Fail when p50/p95 latency is more than this fraction slower than the baseline'
+        )
+        parser.add_argument(
+            '--generate', action='store_true',
+            help='Generate a small synthetic dataset (with --seed) first if there are no ideas'
+        )
+    
+    def handle(self, *args, **options):
+        if options['generate'] and not Idea.objects.exists():
+            call_command(
+                'generate_synthetic_data', seed=options['seed'], users=2000, ideas=5000, votes=50000,
+                comments=20000, views=50000, notifications=20000, stdout=self.stdout,
+            )
+        
+        try:
+            results = run_scenarios(options['scenarios'], options['iterations'], options['warmup'], options['seed'])
+        except BenchmarkError as exc:
+            raise CommandError(str(exc))
+        
+        self.stdout.write(
+            f'{"scenario":<24} {"p50 ms":>9} {"p90 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"queries":>8}'
+        )
+        for name, summary in results.items():
+            self.stdout.write(
+                f'{name:<24} {summary["p50_ms"]:>9.2f} {summary["p90_ms"]:>9.2f} {summary["p95_ms"]:>9.2f} '
+                f'{summary["p99_ms"]:>9.2f} {summary["queries_max"]:>8}'
+            )
+        
+        report = {'meta': self.describe_run(options), 'scenarios': results}
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f'Wrote {options["output"]}')
+        
+        if options['baseline']:
+            self.check_baseline(report, options)
+    
+    def describe_run(self, options):
+        return {
+            'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'seed': options['seed'],
+            'dataset': {
+                'users': User.objects.count(),
+                'ideas': Idea.objects.count(),
+                'votes': Vote.objects.count(),
+                'comments': Comment.objects.count(),
+            },
+        }
+    
+    def check_baseline(self, report, options):
+        with open(options['baseline']) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline['meta']['database'] != report['meta']['database']:
+            raise CommandError(
+                f'Baseline was recorded on {baseline["meta"]["database"]}, not {report["meta"]["database"]}'
+            )
+        if baseline['meta']['dataset'] != report['meta']['dataset']:
+            self.stdout.write(self.style.WARNING('Dataset differs from the baseline; comparisons may be skewed'))
+        
+        regressions = compare(report['scenarios'], baseline['scenarios'], options['threshold'])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f'No regressions beyond {options["threshold"]:.0%}'))
+            return
+        for name, metric, before, after in regressions:
+            self.stdout.write(self.style.ERROR(f'{name} {metric}: {before} -> {after}'))
+        raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
@@ -0,0 +1,81 @@
+"""
+Request middleware shared across the Civic Ideas apps.
+"""
+import json
+import logging
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .instrumentation import RequestRecorder, instrument_cache_backends, record_request_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record query count, database time and cache time for a sample of
+    requests (``REQUEST_INSTRUMENTATION_SAMPLE_RATE``).
+    
+    Sampled responses get a ``Server-Timing`` header, one JSON log line and
+    an update of the per-view metrics served at ``/api/metrics/``. Query
+    shapes run at least ``REQUEST_INSTRUMENTATION_N_PLUS_ONE_THRESHOLD``
+    times in one request are logged as a warning.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_INSTRUMENTATION_SAMPLE_RATE
+        if self.sample_rate > 0:
+            instrument_cache_backends()
+    
+    def __call__(self, request):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return self.get_response(request)
+        
+        recorder = RequestRecorder()
+        token = recorder.activate()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            recorder.deactivate(token)
+        
+        self.report(request, response, recorder)
+        return response
+    
+    def report(self, request, response, recorder):
+        repeated = recorder.repeated_queries(settings.REQUEST_INSTRUMENTATION_N_PLUS_ONE_THRESHOLD)
+        elapsed_ms = recorder.elapsed * 1000
+        db_ms = recorder.db_time * 1000
+        cache_ms = recorder.cache_time * 1000
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{recorder.queries} queries", '
+            f'cache;dur={cache_ms:.1f};desc="{recorder.cache_calls} calls", '
+            f'app;dur={elapsed_ms:.1f}'
+        )
+        
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        record_request_metrics(view, response.status_code, recorder, repeated)
+        
+        line = {
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'duration_ms': round(elapsed_ms, 2),
+            'db_ms': round(db_ms, 2),
+            'queries': recorder.queries,
+            'cache_ms': round(cache_ms, 2),
+            'cache_calls': recorder.cache_calls,
+        }
+        if repeated:
+            line['n_plus_one'] = [{'count': count, 'sql': shape[:500]} for shape, count in repeated]
+            logger.warning(json.dumps(line))
+        else:
+            logger.info(json.dumps(line))
@@ -0,0 +1,138 @@
+"""
+Shared model mixins and helpers for the Civic Ideas platform.
+"""
+import copy
+from contextlib import contextmanager
+
+from django.db import models
+from django.db.models.fields.files import FieldFile
+
+_UNSET = object()
+
+
+def _snapshot_value(value):
+    # Files are renamed and dicts/lists changed in place, so keep copies.
+    if isinstance(value, FieldFile):
+        return value.name
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+
+class DirtyFieldsMixin(models.Model):
+    """
+    Track which concrete fields changed since the instance was loaded.
+    
+    Loaded values are snapshotted in ``from_db`` so that ``save()`` overrides
+    and ``pre_save``/``post_save`` handlers can detect transitions (e.g. a
+    status change) without re-reading the row. The snapshot is refreshed once
+    ``save()`` completes. Set ``TRACKED_FIELDS`` to an iterable of attribute
+    names to limit tracking to those fields.
+    
+    When every field is tracked, ``save()`` on a loaded instance without
+    ``update_fields`` writes only the changed columns (plus ``auto_now``
+    ones) in a single UPDATE. File names and dict and list values (JSON
+    fields) are snapshotted as copies so in-place changes are detected too.
+    """
+    TRACKED_FIELDS = None
+    
+    class Meta:
+        abstract = True
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_loaded_values(zip(field_names, values))
+        return instance
+    
+    def _snapshot_loaded_values(self, items):
+        tracked = self.TRACKED_FIELDS
+        self._loaded_values = {
+            name: _snapshot_value(value) for name, value in items
+            if tracked is None or name in tracked
+        }
+    
+    def get_loaded_value(self, attname, default=None):
+        """Return the value ``attname`` had when loaded, or ``default``."""
+        return getattr(self, '_loaded_values', {}).get(attname, default)
+    
+    def is_field_loaded(self, attname):
+        """Return True if ``attname`` was loaded from the database."""
+        return attname in getattr(self, '_loaded_values', {})
+    
+    def has_changed(self, attname):
+        """
+        Return True if ``attname`` differs from its loaded value.
+        
+        Unsaved instances report every field as changed.
+        """
+        if self._state.adding:
+            return True
+        loaded = self.get_loaded_value(attname, _UNSET)
+        if loaded is _UNSET:
+            return False
+        return self.__dict__.get(attname, loaded) != loaded
+    
+    def get_dirty_fields(self):
+        """Return ``{attname: loaded_value}`` for every changed tracked field."""
+        return {
+            name: loaded for name, loaded in getattr(self, '_loaded_values', {}).items()
+            if self.__dict__.get(name, loaded) != loaded
+        }
+    
+    def get_changed_field_names(self):
+        """Return the names of the fields an UPDATE of this instance has to write."""
+        dirty = self.get_dirty_fields()
+        return {
+            field.name for field in self._meta.concrete_fields
+            if field.attname in dirty or getattr(field, 'auto_now', False)
+        }
+    
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        refreshed = self._meta.concrete_fields
+        if fields is not None:
+            refreshed = [f for f in refreshed if f.name in fields or f.attname in fields]
+        deferred = self.get_deferred_fields()
+        values = getattr(self, '_loaded_values', {})
+        values.update(
+            (f.attname, getattr(self, f.attname)) for f in refreshed if f.attname not in deferred
+        )
+        self._snapshot_loaded_values(values.items())
+    
+    def save(self, *args, **kwargs):
+        if (
+            self.TRACKED_FIELDS is None and not args and not self._state.adding
+            and kwargs.get('update_fields') is None and not kwargs.get('force_insert')
+            and hasattr(self, '_loaded_values')
+        ):
+            changed = self.get_changed_field_names()
+            if changed:
+                kwargs['update_fields'] = changed
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        fields = self._meta.concrete_fields
+        if update_fields is not None:
+            fields = [f for f in fields if f.name in update_fields or f.attname in update_fields]
+        deferred = self.get_deferred_fields()
+        values = getattr(self, '_loaded_values', {})
+        values.update(
+            (f.attname, getattr(self, f.attname)) for f in fields if f.attname not in deferred
+        )
+        self._snapshot_loaded_values(values.items())
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let ``bulk_create`` keep the given ``auto_now``/``auto_now_add`` values."""
+    flags = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                flags.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in flags:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
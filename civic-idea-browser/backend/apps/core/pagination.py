@@ -0,0 +1,52 @@
+"""
+Pagination classes shared across the Civic Ideas apps.
+
+The global ``PageNumberPagination`` runs a ``COUNT(*)`` and an ``OFFSET``
+per page, which is fine for admin listings but degrades linearly on deep
+pages. Feed endpoints use the cursor (keyset) classes below instead: each
+page is a ``WHERE created_at < <position> ORDER BY created_at LIMIT n``
+served from an index, and cursors are opaque and stable under inserts.
+"""
+from django.core.exceptions import ValidationError
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    ``CursorPagination`` that rejects a cursor whose position does not fit
+    the ordering column with a 404, like any other invalid cursor, instead
+    of failing while the page query is built.
+    """
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        try:
+            return super().paginate_queryset(queryset, request, view)
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+
+class FeedCursorPagination(KeysetCursorPagination):
+    """
+    Newest-first keyset pagination on ``created_at``.
+    """
+    ordering = ('-created_at', '-pk')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ChronologicalCursorPagination(FeedCursorPagination):
+    """
+    Oldest-first keyset pagination on ``created_at``, for discussions.
+    """
+    ordering = ('created_at', 'pk')
+
+
+class ThreadCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination in comment thread order (materialized ``path``).
+    """
+    ordering = ('path',)
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
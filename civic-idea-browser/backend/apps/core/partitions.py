@@ -0,0 +1,121 @@
+"""
+Monthly range partitioning for append-only PostgreSQL tables.
+
+``partition_table`` converts an existing table into one partitioned by
+month on a timestamp column (the primary key becomes ``(id, column)``),
+after which whole months can be removed with ``drop_partition`` instead
+of row-by-row deletes. Partitions are named ``<table>_pYYYY_MM`` and a
+``<table>_default`` partition catches rows outside the created range.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+PARTITION_NAME = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+def is_partitioned(table):
+    """Return True if ``table`` is a partitioned PostgreSQL table."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid '
+            'WHERE c.relname = %s', [table]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table):
+    """Return ``[(name, lower, upper)]`` for the monthly partitions of ``table``, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass', [table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = PARTITION_NAME.search(name)
+        if match:
+            lower = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+            partitions.append((name, lower, _add_months(lower, 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partition(table, month):
+    """Create the partition of ``table`` holding ``month`` if it is missing."""
+    lower = _month_start(month)
+    upper = _add_months(lower, 1)
+    name = f'{table}_p{lower:%Y_%m}'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+            f'FOR VALUES FROM (%s) TO (%s)', [lower, upper]
+        )
+    return name
+
+
+def ensure_partitions(table, now, months_ahead=3):
+    """Make sure partitions exist from the current month to ``months_ahead`` months out."""
+    month = _month_start(now)
+    for offset in range(months_ahead + 1):
+        create_partition(table, _add_months(month, offset))
+
+
+def drop_partition(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS "{name}"')
+
+
+def partition_table(model, column, months_ahead=3):
+    """
+    Rebuild ``model``'s table as a monthly range-partitioned table on
+    ``column``, copying existing rows. Run during a maintenance window:
+    the table is locked while rows are copied.
+    """
+    table = model._meta.db_table
+    old = f'{table}_unpartitioned'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'SELECT MIN("{column}") FROM "{table}"')
+        oldest = cursor.fetchone()[0]
+        cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{old}"')
+        cursor.execute(
+            f'CREATE TABLE "{table}" (LIKE "{old}" INCLUDING DEFAULTS INCLUDING IDENTITY '
+            f'INCLUDING CONSTRAINTS) PARTITION BY RANGE ("{column}")'
+        )
+        cursor.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY ("id", "{column}")')
+        cursor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+        
+        now = datetime.now(dt_timezone.utc)
+        month = _month_start(oldest or now)
+        while month <= now:
+            create_partition(table, month)
+            month = _add_months(month, 1)
+        ensure_partitions(table, now, months_ahead)
+        
+        cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{old}"')
+        cursor.execute(f'DROP TABLE "{old}"')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f'COALESCE((SELECT MAX("id") FROM "{table}"), 0) + 1, false)'
+        )
+        
+        # Recreate the model's indexes and foreign keys on the new parent table.
+        with connection.schema_editor(atomic=False) as editor:
+            for statement in editor._model_indexes_sql(model):
+                editor.execute(statement)
+            for field in model._meta.local_fields:
+                if field.remote_field and field.db_constraint:
+                    editor.execute(editor._create_fk_sql(model, field, '_fk_%(to_table)s_%(to_column)s'))
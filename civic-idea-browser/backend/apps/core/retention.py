@@ -0,0 +1,142 @@
+"""
+Time-based retention for append-only tables.
+
+A retention policy removes rows older than a configurable number of days,
+optionally summarizing them first (``archive``). Rows are deleted in
+primary-key chunks, each in its own short transaction, so no run holds
+long locks. When the table has been converted to monthly partitions (see
+``apps.core.partitions``) and the policy covers every row, whole expired
+months are dropped instead, up to ``partition_cutoff()``.
+
+Policies are listed by dotted path in ``DATA_RETENTION_POLICIES``; each
+reads its age limit from a setting, and a limit of 0 disables it.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import partitions
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy:
+    """
+    Delete ``model`` rows whose ``date_field`` is older than the number of
+    days in the ``days_setting`` setting and that match ``filters``.
+    """
+    name = None
+    model = None  # 'app_label.ModelName'
+    date_field = None
+    days_setting = None
+    filters = {}
+    
+    def __init__(self, chunk_size=None, pause=None):
+        self.chunk_size = chunk_size or settings.RETENTION_CHUNK_SIZE
+        self.pause = settings.RETENTION_CHUNK_PAUSE if pause is None else pause
+    
+    @property
+    def days(self):
+        return getattr(settings, self.days_setting)
+    
+    def get_model(self):
+        return apps.get_model(self.model)
+    
+    def cutoff(self, now=None):
+        """Start of the local day ``days`` days ago; older rows are expired."""
+        today = timezone.localtime(now or timezone.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        return today - timedelta(days=self.days)
+    
+    def expired(self, cutoff):
+        return self.get_model().objects.filter(**{f'{self.date_field}__lt': cutoff}, **self.filters)
+    
+    def partition_cutoff(self, cutoff):
+        """
+        Only partitions wholly before this are dropped. Policies whose
+        ``expired()`` keeps some old rows must return an earlier bound.
+        """
+        return cutoff
+    
+    def archive(self, queryset):
+        """Hook to summarize rows about to be removed; runs in the same transaction."""
+    
+    def iter_chunks(self, queryset):
+        """Yield querysets of at most ``chunk_size`` expired rows until none are left."""
+        model = self.get_model()
+        while True:
+            pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:self.chunk_size])
+            if not pks:
+                return
+            yield model.objects.filter(pk__in=pks)
+    
+    def apply(self, now=None, dry_run=False):
+        """Remove expired rows. Returns ``{'deleted': ..., 'partitions_dropped': ...}``."""
+        stats = {'deleted': 0, 'partitions_dropped': 0}
+        if not self.days:
+            return stats
+        cutoff = self.cutoff(now)
+        expired = self.expired(cutoff)
+        if dry_run:
+            stats['deleted'] = expired.count()
+            return stats
+        
+        table = self.get_model()._meta.db_table
+        if not self.filters and partitions.is_partitioned(table):
+            stats['partitions_dropped'] = self._drop_partitions(table, self.partition_cutoff(cutoff))
+        
+        label = self.get_model()._meta.label
+        for chunk in self.iter_chunks(expired):
+            with transaction.atomic():
+                self.archive(chunk)
+                _, deleted = chunk.delete()
+            stats['deleted'] += deleted.get(label, 0)
+            if self.pause:
+                time.sleep(self.pause)
+        
+        logger.info(
+            'Retention policy %s: deleted %d rows, dropped %d partitions',
+            self.name, stats['deleted'], stats['partitions_dropped'],
+        )
+        return stats
+    
+    def _drop_partitions(self, table, cutoff):
+        dropped = 0
+        model = self.get_model()
+        for name, lower, upper in partitions.list_partitions(table):
+            if upper > cutoff:
+                break
+            with transaction.atomic():
+                self.archive(model.objects.filter(**{
+                    f'{self.date_field}__gte': lower, f'{self.date_field}__lt': upper,
+                }))
+                partitions.drop_partition(name)
+            dropped += 1
+        return dropped
+
+
+def get_retention_policies():
+    return [import_string(path)() for path in settings.DATA_RETENTION_POLICIES]
+
+
+def apply_retention_policies(names=None, dry_run=False):
+    """Run the configured policies (or those named). Returns ``{name: stats}``."""
+    results = {}
+    for policy in get_retention_policies():
+        if names and policy.name not in names:
+            continue
+        results[policy.name] = policy.apply(dry_run=dry_run)
+    return results
+
+
+def ensure_future_partitions(months_ahead=3):
+    """Create upcoming monthly partitions for every partitioned policy table."""
+    for policy in get_retention_policies():
+        table = policy.get_model()._meta.db_table
+        if partitions.is_partitioned(table):
+            partitions.ensure_partitions(table, timezone.now(), months_ahead)
@@ -0,0 +1,170 @@
+"""
+Fast-path read-only serialization from ``.values()`` rows.
+
+A ``ValuesSerializer`` reproduces the output of a DRF ``ModelSerializer``
+for list endpoints without building model instances or resolving every
+field's source on every object. Its fields are compiled once per request
+into one extractor per field:
+
+* plain columns whose value is already the representation (strings,
+  integers, booleans, foreign key ids) are copied as is;
+* other columns go through the original field's ``to_representation``;
+* many-to-many primary keys are read with one query per relation for the
+  whole page, in the same order the related manager would return them;
+* properties that are not columns are supplied by ``computed``;
+* fields that read several columns (``ImageVariantsField``) declare them in
+  ``row_columns`` and build their value with ``row_to_representation``.
+
+Fields that can't be mapped onto a column raise ``ImproperlyConfigured``
+when the rows are queried, so a new serializer field can't silently drop
+out of the fast path.
+"""
+from collections import defaultdict
+from operator import itemgetter
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import fields, relations, serializers
+
+from .images import KINDS, variant_urls
+
+# DRF fields that represent a database value as the value itself.
+PASSTHROUGH_FIELDS = (
+    fields.CharField, fields.IntegerField, fields.BooleanField, fields.ReadOnlyField,
+    relations.PrimaryKeyRelatedField,
+)
+
+
+class ValuesSerializer:
+    """
+    Read-only serializer for ``.values()`` rows mirroring ``serializer_class``.
+    
+    ``columns`` maps a field name to the column it reads when that differs
+    from the field's source (e.g. an annotation). ``computed`` maps a field
+    name to ``(columns, function)``; the function receives the row.
+    """
+    serializer_class = None
+    columns = {}
+    computed = {}
+    
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.serializer = self.serializer_class(context=self.context)
+        self.model = self.serializer.Meta.model
+        self.pk_column = self.model._meta.pk.name
+        self.value_columns = {self.pk_column}
+        self.many_related = {}
+        self.extractors = [self._compile(field) for field in self.serializer._readable_fields]
+    
+    def _compile(self, field):
+        name = field.field_name
+        if name in self.computed:
+            columns, function = self.computed[name]
+            self.value_columns.update(columns)
+            return name, function
+        
+        if hasattr(field, 'row_columns'):
+            self.value_columns.update(field.row_columns)
+            return name, field.row_to_representation
+        
+        if isinstance(field, relations.ManyRelatedField):
+            model_field = self.model._meta.get_field(field.source)
+            self.many_related[name] = model_field
+            return name, itemgetter(name)
+        
+        column = self.columns.get(name) or '__'.join(field.source_attrs)
+        self.value_columns.add(column)
+        get = itemgetter(column)
+        if isinstance(field, fields.FileField):
+            model_field = self._resolve_model_field(field.source_attrs)
+            
+            def extract(row):
+                value = get(row)
+                return field.to_representation(model_field.attr_class(None, model_field, value)) if value else None
+            return name, extract
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            return name, get
+        
+        to_representation = field.to_representation
+        
+        def extract(row):
+            value = get(row)
+            return None if value is None else to_representation(value)
+        return name, extract
+    
+    def _resolve_model_field(self, source_attrs):
+        model = self.model
+        model_field = None
+        for attr in source_attrs:
+            if model is None:
+                break
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(
+                    f'{type(self).__name__} cannot read {".".join(source_attrs)} from {self.model.__name__} '
+                    'rows; map it in columns or computed.'
+                )
+            model = model_field.related_model
+        return model_field
+    
+    def get_values_queryset(self, queryset, extra_columns=()):
+        """Return ``queryset`` as ``.values()`` rows with every column the fields need."""
+        for column in self.value_columns:
+            if column not in queryset.query.annotations:
+                self._resolve_model_field(column.split('__'))
+        return queryset.prefetch_related(None).values(*self.value_columns, *extra_columns)
+    
+    def _fetch_many_related(self, rows):
+        ids = [row[self.pk_column] for row in rows]
+        related = {}
+        for name, model_field in self.many_related.items():
+            source, target = model_field.m2m_field_name(), model_field.m2m_reverse_field_name()
+            ordering = [
+                f'-{target}__{order[1:]}' if order.startswith('-') else f'{target}__{order}'
+                for order in model_field.related_model._meta.ordering
+            ]
+            links = (
+                model_field.remote_field.through.objects.filter(**{f'{source}_id__in': ids})
+                .order_by(*ordering, 'pk').values_list(f'{source}_id', f'{target}_id')
+            )
+            related[name] = defaultdict(list)
+            for source_id, target_id in links:
+                related[name][source_id].append(target_id)
+        return related
+    
+    def to_representation(self, rows):
+        """Return the list of dicts for ``rows``."""
+        rows = list(rows)
+        if self.many_related and rows:
+            related = self._fetch_many_related(rows)
+            for row in rows:
+                for name in self.many_related:
+                    row[name] = related[name].get(row[self.pk_column], [])
+        extractors = self.extractors
+        return [{name: extract(row) for name, extract in extractors} for row in rows]
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Read-only ``{size: {format: url}}`` of the thumbnails and WebP versions
+    of an image field (``kind`` is a key of ``apps.core.images.KINDS``) on
+    the object itself or, with ``source``, on a related object.
+    """
+    
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        self.image_kind = KINDS[kind]
+        kwargs.setdefault('source', '*')
+        kwargs['read_only'] = True
+        prefix = '' if kwargs['source'] == '*' else kwargs['source'].replace('.', '__') + '__'
+        self.row_columns = (prefix + self.image_kind.field, prefix + self.image_kind.state_field)
+        super().__init__(**kwargs)
+    
+    def to_representation(self, instance):
+        return variant_urls(
+            self.kind, getattr(instance, self.image_kind.field).name,
+            getattr(instance, self.image_kind.state_field), self.context.get('request'),
+        )
+    
+    def row_to_representation(self, row):
+        return variant_urls(self.kind, row[self.row_columns[0]], row[self.row_columns[1]], self.context.get('request'))
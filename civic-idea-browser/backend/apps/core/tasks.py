@@ -0,0 +1,32 @@
+"""
+Celery tasks for the core app.
+"""
+from celery import shared_task
+from django.core.cache import cache
+
+from .images import generate_variants
+from .retention import apply_retention_policies, ensure_future_partitions
+
+RETENTION_LOCK_KEY = 'core:retention:lock'
+RETENTION_LOCK_TIMEOUT = 6 * 60 * 60
+
+
+@shared_task(ignore_result=True)
+def apply_data_retention():
+    """Run the retention policies, skipping if a previous run is still going."""
+    if not cache.add(RETENTION_LOCK_KEY, 1, RETENTION_LOCK_TIMEOUT):
+        return None
+    try:
+        ensure_future_partitions()
+        return apply_retention_policies()
+    finally:
+        cache.delete(RETENTION_LOCK_KEY)
+
+
+@shared_task(ignore_result=True)
+def generate_image_variants(kind, source):
+    """
+    Render the thumbnails and WebP variants of one image. Each image is its
+    own task, so the worker's process pool renders several in parallel.
+    """
+    generate_variants(kind, source)
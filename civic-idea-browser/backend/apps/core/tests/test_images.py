@@ -0,0 +1,117 @@
+"""
+Tests for image variant rendering and the on-demand variant view.
+"""
+import io
+from urllib.parse import urlencode
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from PIL import Image
+
+from apps.core import images
+from apps.core.images import EXIF_ORIENTATION, KINDS, render_variants, variant_urls
+from apps.ideas.models import Idea
+
+
+def save_image(name, size=(1920, 1080), mode='RGB', fmt='JPEG', orientation=None):
+    image = Image.new(mode, size, (0, 128, 128, 128) if mode == 'RGBA' else 'teal')
+    output = io.BytesIO()
+    if orientation is None:
+        image.save(output, fmt)
+    else:
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = orientation
+        image.save(output, fmt, exif=exif)
+    return default_storage.save(name, ContentFile(output.getvalue()))
+
+
+def stored_size(name):
+    with default_storage.open(name, 'rb') as stored:
+        return Image.open(stored).size
+
+
+def variant_url(kind, size, fmt, source):
+    return f'{reverse("image_variant", args=[kind, size, fmt])}?{urlencode({"src": source})}'
+
+
+def test_render_variants_writes_every_size_and_format(db):
+    source = save_image('ideas/images/park.jpg')
+    
+    state = render_variants('idea', source)
+    
+    assert (state['source'], state['width'], state['height']) == (source, 1920, 1080)
+    assert state['ms'] >= 0
+    assert set(state['files']) == set(KINDS['idea'].sizes)
+    expected = {'thumb': (320, 180), 'card': (640, 360), 'large': (1600, 900)}
+    for size, formats in state['files'].items():
+        assert formats == {fmt: f'variants/ideas/images/park/{size}.{fmt}' for fmt in ('webp', 'jpeg')}
+        assert all(stored_size(name) == expected[size] for name in formats.values())
+
+
+def test_render_variants_follows_exif_orientation_and_alpha(db):
+    rotated = save_image('ideas/images/tall.jpg', size=(400, 200), orientation=6)
+    transparent = save_image('avatars/ann.png', size=(300, 200), mode='RGBA', fmt='PNG')
+    
+    state = render_variants('idea', rotated)
+    assert (state['width'], state['height']) == (200, 400)
+    assert stored_size(state['files']['large']['webp']) == (200, 400)
+    
+    state = render_variants('avatar', transparent)
+    assert stored_size(state['files']['small']['jpeg']) == (48, 48)
+    with default_storage.open(state['files']['medium']['webp'], 'rb') as stored:
+        assert Image.open(stored).mode == 'RGBA'
+
+
+def test_failed_render_is_recorded_and_falls_back_to_the_original(db):
+    source = default_storage.save('ideas/images/broken.jpg', ContentFile(b'not an image'))
+    
+    state = render_variants('idea', source)
+    
+    assert set(state) == {'source', 'error'}
+    urls = variant_urls('idea', source, state)
+    assert {url for formats in urls.values() for url in formats.values()} == {default_storage.url(source)}
+
+
+@pytest.mark.parametrize('kind, size, fmt, src', [
+    ('banner', 'thumb', 'webp', 'ideas/images/park.jpg'),
+    ('idea', 'huge', 'webp', 'ideas/images/park.jpg'),
+    ('idea', 'thumb', 'gif', 'ideas/images/park.jpg'),
+    ('idea', 'thumb', 'webp', ''),
+    ('idea', 'thumb', 'webp', 'ideas/images/unused.jpg'),
+])
+def test_variant_view_404s(client, make_idea, kind, size, fmt, src):
+    make_idea(image=save_image('ideas/images/park.jpg'))
+    save_image('ideas/images/unused.jpg')
+    
+    assert client.get(variant_url(kind, size, fmt, src)).status_code == 404
+
+
+def test_variant_view_renders_once_and_redirects(client, make_idea, monkeypatch):
+    source = save_image('ideas/images/park.jpg')
+    idea = make_idea(image=source)
+    urls = variant_urls('idea', source, None)
+    assert urls['card']['webp'] == variant_url('idea', 'card', 'webp', source)
+    
+    response = client.get(urls['card']['webp'])
+    
+    assert response.status_code == 302
+    assert response['Location'] == default_storage.url('variants/ideas/images/park/card.webp')
+    state = Idea.objects.get(pk=idea.pk).image_variants
+    assert state['source'] == source and 'files' in state
+    
+    monkeypatch.setattr(images, 'render_variants', lambda kind, source: pytest.fail('rendered twice'))
+    response = client.get(variant_url('idea', 'thumb', 'jpeg', source))
+    assert response['Location'] == default_storage.url('variants/ideas/images/park/thumb.jpeg')
+
+
+def test_variant_view_redirects_to_the_original_when_rendering_fails(client, make_idea):
+    source = default_storage.save('ideas/images/broken.jpg', ContentFile(b'not an image'))
+    idea = make_idea(image=source)
+    
+    response = client.get(variant_url('idea', 'thumb', 'webp', source))
+    
+    assert response.status_code == 302
+    assert response['Location'] == default_storage.url(source)
+    assert 'error' in Idea.objects.get(pk=idea.pk).image_variants
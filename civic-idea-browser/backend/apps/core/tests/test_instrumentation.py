@@ -0,0 +1,126 @@
+"""
+Tests for per-request query instrumentation and the metrics endpoint.
+"""
+import json
+import logging
+
+import fakeredis
+import pytest
+from django.db import connection
+from django.http import HttpResponse
+from django.urls import reverse
+
+from apps.core import instrumentation
+from apps.core.instrumentation import RedisMetricsStore, RequestRecorder, query_shape
+from apps.core.middleware import QueryInstrumentationMiddleware
+from apps.ideas.models import Idea
+
+
+@pytest.fixture(autouse=True)
+def metrics_store(monkeypatch):
+    store = instrumentation.LocalMetricsStore()
+    monkeypatch.setattr(instrumentation, '_local_store', store)
+    return store
+
+
+@pytest.fixture
+def sampled(settings):
+    settings.REQUEST_INSTRUMENTATION_SAMPLE_RATE = 1.0
+    settings.REQUEST_INSTRUMENTATION_N_PLUS_ONE_THRESHOLD = 5
+
+
+def test_query_shape_ignores_in_lists_and_limits():
+    assert query_shape('SELECT 1 FROM t WHERE id IN (%s, %s, %s) LIMIT 21') == (
+        'SELECT 1 FROM t WHERE id IN (...) LIMIT N'
+    )
+    assert query_shape('SELECT 1 FROM t WHERE id IN (%s,%s) OFFSET 40') == query_shape(
+        'SELECT 1 FROM t WHERE id IN (%s, %s, %s, %s) OFFSET 0'
+    )
+
+
+def test_recorder_counts_repeated_shapes(make_idea):
+    ideas = [make_idea() for _ in range(6)]
+    recorder = RequestRecorder()
+    
+    with connection.execute_wrapper(recorder):
+        for idea in ideas:
+            Idea.objects.filter(pk=idea.pk).values_list('title', flat=True).first()
+        Idea.objects.filter(pk__in=[idea.pk for idea in ideas]).count()
+    
+    assert recorder.queries == 7
+    assert [count for _, count in recorder.repeated_queries(5)] == [6]
+    assert recorder.repeated_queries(7) == []
+
+
+def test_sampled_response_has_server_timing(api_client, make_idea, sampled, settings):
+    settings.IDEA_RESPONSE_CACHE_TIMEOUT = 0
+    make_idea()
+    
+    response = api_client.get(reverse('ideas:idea_list'))
+    
+    header = response['Server-Timing']
+    assert header.startswith('db;dur=')
+    assert 'desc="3 queries"' in header  # the page plus the categories and tags
+    assert 'cache;dur=' in header and 'app;dur=' in header
+
+
+def test_unsampled_response_has_no_server_timing(api_client, db, settings):
+    settings.REQUEST_INSTRUMENTATION_SAMPLE_RATE = 0
+    
+    assert 'Server-Timing' not in api_client.get(reverse('ideas:idea_list'))
+
+
+def test_repeated_queries_are_logged_and_counted(rf, make_idea, sampled, caplog, metrics_store):
+    ideas = [make_idea() for _ in range(5)]
+    
+    def n_plus_one(request):
+        titles = [Idea.objects.get(pk=idea.pk).title for idea in ideas]
+        return HttpResponse(', '.join(titles))
+    
+    with caplog.at_level(logging.INFO, logger='apps.core.middleware'):
+        QueryInstrumentationMiddleware(n_plus_one)(rf.get('/n-plus-one/'))
+        QueryInstrumentationMiddleware(lambda request: HttpResponse())(rf.get('/fine/'))
+    
+    warning, info = caplog.records
+    assert warning.levelno == logging.WARNING
+    line = json.loads(warning.getMessage())
+    assert line['queries'] == 5
+    assert [entry['count'] for entry in line['n_plus_one']] == [5]
+    assert info.levelno == logging.INFO and 'n_plus_one' not in json.loads(info.getMessage())
+    
+    counters = metrics_store.snapshot()['unresolved']
+    assert counters['count'] == 2
+    assert counters['n_plus_one'] == 1
+    assert counters['queries_sum'] == 5
+
+
+def test_metrics_endpoint_requires_staff_or_token(api_client, make_user, sampled, settings):
+    settings.REQUEST_METRICS_TOKEN = 'scraper-secret'
+    url = reverse('metrics')
+    api_client.get(reverse('ideas:idea_list'))
+    
+    assert api_client.get(url).status_code == 403
+    assert api_client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+    
+    response = api_client.get(url, HTTP_AUTHORIZATION='Bearer scraper-secret')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    body = response.content.decode()
+    assert 'civic_request_duration_ms_count{view="ideas:idea_list"} 1' in body
+    assert 'civic_request_queries_bucket{view="ideas:idea_list",le="+Inf"} 1' in body
+    assert 'civic_requests_total{view="ideas:idea_list",status="2xx"} 1' in body
+    
+    api_client.force_login(make_user('admin', is_staff=True))
+    assert api_client.get(url).status_code == 200
+
+
+def test_redis_store_sums_across_processes(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(instrumentation, 'get_redis_connection', lambda: client)
+    for _ in range(2):
+        RedisMetricsStore(client).record('ideas:idea_list', {'count': 1, 'latency_sum': 2.5})
+    
+    assert instrumentation.get_metrics_store().snapshot() == {
+        'ideas:idea_list': {'count': 2.0, 'latency_sum': 5.0},
+    }
+    assert 'civic_request_duration_ms_sum{view="ideas:idea_list"} 5' in instrumentation.render_metrics()
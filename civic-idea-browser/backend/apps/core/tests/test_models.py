@@ -0,0 +1,81 @@
+"""
+Tests for DirtyFieldsMixin, through Idea.
+"""
+import re
+
+import pytest
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.ideas.models import Idea
+
+pytestmark = pytest.mark.django_db
+
+
+def updated_columns(sql):
+    match = re.match(r'UPDATE "[^"]+" SET (.*) WHERE', sql)
+    assert match, sql
+    return {column for column in re.findall(r'"(\w+)" = ', match.group(1))}
+
+
+def test_update_writes_only_changed_columns_in_one_statement(make_idea, django_assert_num_queries):
+    idea = Idea.objects.get(pk=make_idea().pk)
+    idea.location = 'Harbor'
+    
+    with CaptureQueriesContext(connection) as captured:
+        with django_assert_num_queries(1):
+            idea.save()
+    
+    assert updated_columns(captured[0]['sql']) == {'location', 'updated_at'}
+    assert Idea.objects.get(pk=idea.pk).location == 'Harbor'
+
+
+def test_submitting_sets_published_at_without_a_select(make_idea):
+    idea = Idea.objects.get(pk=make_idea(status='draft').pk)
+    idea.status = 'submitted'
+    
+    with CaptureQueriesContext(connection) as captured:
+        idea.save()
+    
+    assert not [query for query in captured if query['sql'].startswith('SELECT "ideas_idea"')]
+    assert updated_columns(captured[0]['sql']) == {'status', 'published_at', 'updated_at'}
+    assert Idea.objects.get(pk=idea.pk).published_at is not None
+
+
+def test_update_fields_are_respected(make_idea):
+    idea = Idea.objects.get(pk=make_idea().pk)
+    idea.location = 'Harbor'
+    idea.scope = 'regional'
+    
+    with CaptureQueriesContext(connection) as captured:
+        idea.save(update_fields=['scope'])
+    
+    assert updated_columns(captured[0]['sql']) == {'scope'}
+    assert Idea.objects.get(pk=idea.pk).location == ''
+
+
+def test_in_place_json_changes_are_saved(make_idea):
+    idea = Idea.objects.get(pk=make_idea().pk)
+    idea.image_variants['source'] = 'ideas/images/park.jpg'
+    idea.save()
+    
+    assert Idea.objects.get(pk=idea.pk).image_variants == {'source': 'ideas/images/park.jpg'}
+
+
+def test_refresh_from_db_resets_the_snapshot(make_idea):
+    idea = Idea.objects.get(pk=make_idea(location='Downtown').pk)
+    Idea.objects.filter(pk=idea.pk).update(location='Harbor')
+    idea.refresh_from_db()
+    idea.location = 'Downtown'
+    idea.save()
+    
+    assert Idea.objects.get(pk=idea.pk).location == 'Downtown'
+
+
+def test_saving_a_new_file_marks_it_changed(make_idea):
+    idea = make_idea()
+    idea.image.save('park.jpg', ContentFile(b'not really a jpeg'), save=False)
+    
+    assert idea.get_dirty_fields() == {'image': None}
+    assert 'image' in idea.get_changed_field_names()
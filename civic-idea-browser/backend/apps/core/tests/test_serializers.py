@@ -0,0 +1,96 @@
+"""
+Tests that the ``ValuesSerializer`` fast path of list views renders exactly
+what the views' ``ModelSerializer`` does.
+"""
+import json
+
+import pytest
+from django.urls import reverse
+
+from apps.categories.models import Category, Tag
+from apps.core.views import FastListMixin
+from apps.ideas.views import IdeaListCreateView
+from apps.users.views import UserListView
+
+FAST_LIST_VIEWS = (IdeaListCreateView, UserListView)
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(settings):
+    settings.IDEA_RESPONSE_CACHE_TIMEOUT = 0
+
+
+@pytest.fixture
+def catalog(make_user, make_idea):
+    """Ideas and users covering empty, null and many-valued fields."""
+    categories = [Category.objects.create(name=name, slug=name.lower(), order=order)
+                  for name, order in (('Parks', 1), ('Transit', 0), ('Housing', 1))]
+    tags = [Tag.objects.create(name=name, slug=name) for name in ('trees', 'bikes', 'budget')]
+    authors = [
+        make_user('ann', first_name='Ann', last_name='Lee', avatar='avatars/ann.png'),
+        make_user('bo', avatar='avatars/bo.png', avatar_variants={
+            'source': 'avatars/bo.png',
+            'files': {'small': {'jpeg': 'variants/avatars/bo/small.jpeg', 'webp': 'variants/avatars/bo/small.webp'}},
+        }),
+        make_user('cy', last_name='Young', date_of_birth='1990-02-03'),
+    ]
+    for n in range(12):
+        idea = make_idea(
+            title=f'Idea {n}', author=authors[n % 3], summary='Summary' if n % 2 else '',
+            estimated_cost='1234.50' if n % 3 else None, priority=('low', 'medium', 'high')[n % 3],
+            upvotes_count=n % 5, downvotes_count=n % 3, votes_count=n % 5 + n % 3,
+            image=f'ideas/images/{n}.png' if n % 4 else None,
+            image_variants={'source': f'ideas/images/{n}.png', 'rendering': True} if n % 4 == 1 else {},
+        )
+        idea.categories.set(categories[:n % 4])
+        idea.tags.set(tags[n % 3:])
+    return authors
+
+
+def render(client, url, settings, fast, **params):
+    settings.FAST_SERIALIZERS_ENABLED = fast
+    response = client.get(url, params)
+    assert response.status_code == 200
+    return json.loads(response.content)
+
+
+def test_every_fast_list_view_is_covered():
+    def subclasses(cls):
+        for subclass in cls.__subclasses__():
+            yield subclass
+            yield from subclasses(subclass)
+    assert {view for view in subclasses(FastListMixin) if view.fast_serializer_class} == set(FAST_LIST_VIEWS)
+
+
+@pytest.mark.parametrize('params', [{}, {'ordering': '-votes_count'}, {'status': 'submitted', 'search': 'Idea 1'}])
+def test_idea_list_matches_model_serializer(api_client, catalog, settings, params):
+    url = reverse('ideas:idea_list')
+    
+    fast = render(api_client, url, settings, True, **params)
+    
+    assert fast == render(api_client, url, settings, False, **params)
+    assert fast['results']
+    rows = {row['title']: row for row in fast['results']}
+    assert rows['Idea 1']['score'] == 1 - 1
+    assert rows['Idea 1']['image_variants'] is not None
+
+
+def test_idea_list_pages_match_model_serializer(api_client, catalog, settings):
+    url = reverse('ideas:idea_list')
+    fast = render(api_client, url, settings, True, page_size=5)
+    model = render(api_client, url, settings, False, page_size=5)
+    
+    assert fast == model
+    assert render(api_client, fast['next'], settings, True) == render(api_client, model['next'], settings, False)
+
+
+def test_user_list_matches_model_serializer(api_client, catalog, make_user, settings):
+    api_client.force_authenticate(make_user('admin', is_staff=True))
+    url = reverse('users:user_list')
+    
+    fast = render(api_client, url, settings, True)
+    
+    assert fast == render(api_client, url, settings, False)
+    rows = {row['username']: row for row in fast['results']}
+    assert rows['ann']['ideas_count'] == 4 and rows['ann']['full_name'] == 'Ann Lee'
+    assert rows['bo']['avatar_variants']['small']['webp'].endswith('small.webp')
@@ -0,0 +1,84 @@
+"""
+Views and view mixins shared across the Civic Ideas apps.
+"""
+import hmac
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse, HttpResponseForbidden, HttpResponseRedirect
+from rest_framework.response import Response
+
+from .images import FORMATS, KINDS, generate_variants, is_current
+from .instrumentation import render_metrics
+
+
+class FastListMixin:
+    """
+    Serve ``list()`` from ``.values()`` rows through ``fast_serializer_class``
+    (a ``ValuesSerializer``) instead of the view's ``ModelSerializer``.
+    
+    Leave ``fast_serializer_class`` unset to opt a view out, or turn the
+    fast path off everywhere with ``FAST_SERIALIZERS_ENABLED``.
+    """
+    fast_serializer_class = None
+    
+    def use_fast_serializer(self):
+        return self.fast_serializer_class is not None and settings.FAST_SERIALIZERS_ENABLED
+    
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_serializer():
+            return super().list(request, *args, **kwargs)
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.fast_serializer_class(context=self.get_serializer_context())
+        rows = serializer.get_values_queryset(queryset, self.get_ordering_columns(queryset))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+        return Response(serializer.to_representation(rows))
+    
+    def get_ordering_columns(self, queryset):
+        # Cursor pagination reads its position from the ordering columns of the last row.
+        paginator = self.paginator
+        if paginator is None or not hasattr(paginator, 'get_ordering'):
+            return ()
+        return tuple(field.lstrip('-') for field in paginator.get_ordering(self.request, queryset, self))
+
+
+def metrics_view(request):
+    """
+    Per-view request metrics in the Prometheus text format, for staff users
+    or scrapers sending ``Authorization: Bearer <REQUEST_METRICS_TOKEN>``.
+    """
+    token = settings.REQUEST_METRICS_TOKEN
+    header = request.headers.get('Authorization', '')
+    authorized = request.user.is_staff or (
+        token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+    )
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def image_variant_view(request, kind, size, fmt):
+    """
+    Redirect to one variant of the image in ``?src=``, rendering the image's
+    variants first if they are missing, or to the original if that fails.
+    """
+    image_kind = KINDS.get(kind)
+    source = request.GET.get('src', '')
+    if image_kind is None or size not in image_kind.sizes or fmt not in FORMATS or not source:
+        raise Http404
+    # Only images that are in use can be rendered.
+    states = list(
+        image_kind.get_model().objects.filter(**{image_kind.field: source})
+        .values_list(image_kind.state_field, flat=True)[:1]
+    )
+    if not states:
+        raise Http404
+    state = states[0]
+    if (state or {}).get('source') != source:
+        state = generate_variants(kind, source)
+    if is_current(state, source):
+        return HttpResponseRedirect(default_storage.url(state['files'][size][fmt]))
+    return HttpResponseRedirect(default_storage.url(source))
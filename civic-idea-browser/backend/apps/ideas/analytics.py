@@ -0,0 +1,240 @@
+"""
+Daily engagement rollups for ideas.
+
+``update_daily_rollups`` folds new ``IdeaView``, ``Vote`` and ``Comment``
+rows into ``IdeaDailyStats`` (one row per idea per local day). Each source
+has a ``RollupWatermark`` holding the last primary key processed; a batch
+of events and the watermark move are committed together. Primary keys are
+allocated before commit, so a run only goes up to the newest event dated
+more than ``ANALYTICS_ROLLUP_DELAY`` seconds ago, leaving time for slower
+transactions with lower ids to commit. An event whose transaction commits
+later than that after its timestamp falls below the watermark and is only
+counted by ``rebuild_daily_rollups``; every other event is counted once.
+Views are added incrementally while unique viewers
+are recounted from the raw rows of the days touched. Votes are counted on
+the day they were cast with their type at rollup time.
+
+Analytics endpoints read only ``IdeaDailyStats``. ``rebuild_daily_rollups``
+recomputes a date range from the raw tables for backfills and repairs.
+"""
+import logging
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Comment, IdeaDailyStats, IdeaView, RollupWatermark, Vote
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_LOCK_KEY = 'ideas:rollups:lock'
+ROLLUP_LOCK_TIMEOUT = 60 * 60
+STAT_FIELDS = ('views', 'unique_viewers', 'upvotes', 'downvotes', 'comments')
+
+
+def _local_date(field):
+    return TruncDate(field, tzinfo=timezone.get_current_timezone())
+
+
+def _day_bounds(start, end):
+    """Aware datetimes for local midnight on ``start`` and on ``end``."""
+    return (
+        timezone.make_aware(datetime.combine(start, dt_time.min)),
+        timezone.make_aware(datetime.combine(end, dt_time.min)),
+    )
+
+
+def _group(queryset, date_field, **aggregates):
+    rows = (
+        queryset.annotate(date=_local_date(date_field))
+        .order_by().values('idea_id', 'date').annotate(**aggregates)
+    )
+    return {
+        (row.pop('idea_id'), row.pop('date')): row
+        for row in rows
+    }
+
+
+def view_totals(queryset):
+    return _group(queryset, 'viewed_at', views=Count('pk'))
+
+
+def unique_viewer_totals(queryset):
+    return _group(
+        queryset, 'viewed_at',
+        unique_viewers=Count('user_id', distinct=True)
+        + Count('ip_address', filter=Q(user__isnull=True), distinct=True),
+    )
+
+
+def vote_totals(queryset):
+    return _group(
+        queryset, 'created_at',
+        upvotes=Count('pk', filter=Q(vote_type='up')),
+        downvotes=Count('pk', filter=Q(vote_type='down')),
+    )
+
+
+def comment_totals(queryset):
+    return _group(queryset, 'created_at', comments=Count('pk'))
+
+
+# source -> (model, date field, aggregate function)
+SOURCES = {
+    'views': (IdeaView, 'viewed_at', view_totals),
+    'votes': (Vote, 'created_at', vote_totals),
+    'comments': (Comment, 'created_at', comment_totals),
+}
+
+
+def save_daily_stats(increments=None, values=None):
+    """
+    Add ``increments`` and set ``values`` (both ``{(idea_id, date):
+    {field: amount}}``) on ``IdeaDailyStats``, creating missing rows.
+    Call inside a transaction.
+    """
+    increments, values = increments or {}, values or {}
+    keys = set(increments) | set(values)
+    if not keys:
+        return
+    existing = {
+        (stats.idea_id, stats.date): stats
+        for stats in IdeaDailyStats.objects.select_for_update().filter(
+            idea_id__in={idea_id for idea_id, _ in keys},
+            date__in={date for _, date in keys},
+        )
+    }
+    created, updated, fields = [], [], set()
+    for key in keys:
+        stats = existing.get(key)
+        if stats is None:
+            stats = IdeaDailyStats(idea_id=key[0], date=key[1])
+            created.append(stats)
+        else:
+            updated.append(stats)
+        for field, amount in increments.get(key, {}).items():
+            setattr(stats, field, getattr(stats, field) + amount)
+            fields.add(field)
+        for field, amount in values.get(key, {}).items():
+            setattr(stats, field, amount)
+            fields.add(field)
+    IdeaDailyStats.objects.bulk_create(created)
+    if updated:
+        IdeaDailyStats.objects.bulk_update(updated, sorted(fields))
+
+
+def _recount_unique_viewers(keys):
+    """Recount unique viewers from raw views for the ``(idea_id, date)`` pairs."""
+    if not keys:
+        return {}
+    dates = [date for _, date in keys]
+    start, end = _day_bounds(min(dates), max(dates) + timedelta(days=1))
+    totals = unique_viewer_totals(IdeaView.objects.filter(
+        idea_id__in={idea_id for idea_id, _ in keys}, viewed_at__gte=start, viewed_at__lt=end,
+    ))
+    return {key: totals[key] for key in keys if key in totals}
+
+
+def _process_batch(source, upper, batch_size):
+    """Roll up one batch of ``source`` above its watermark. Returns events read, or None when caught up."""
+    model, _, totals = SOURCES[source]
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(source=source)
+        if watermark.last_id >= upper:
+            return None
+        end = min(watermark.last_id + batch_size, upper)
+        events = model.objects.filter(pk__gt=watermark.last_id, pk__lte=end)
+        increments = totals(events)
+        values = _recount_unique_viewers(set(increments)) if source == 'views' else None
+        save_daily_stats(increments, values)
+        watermark.last_id = end
+        watermark.save(update_fields=['last_id', 'updated_at'])
+    return sum(sum(amounts.values()) for amounts in increments.values())
+
+
+def update_daily_rollups(batch_size=None):
+    """
+    Fold events above each source's watermark into ``IdeaDailyStats``.
+    Returns ``{source: events}``.
+    """
+    batch_size = batch_size or settings.ANALYTICS_ROLLUP_BATCH_SIZE
+    settled = timezone.now() - timedelta(seconds=settings.ANALYTICS_ROLLUP_DELAY)
+    processed = {}
+    for source, (model, date_field, _) in SOURCES.items():
+        # Walks the primary key index down from the newest row.
+        upper = (
+            model.objects.filter(**{f'{date_field}__lt': settled}).order_by('-pk')
+            .values_list('pk', flat=True).first()
+        ) or 0
+        processed[source] = 0
+        while True:
+            events = _process_batch(source, upper, batch_size)
+            if events is None:
+                break
+            processed[source] += events
+    if any(processed.values()):
+        logger.info('Rolled up idea engagement: %s', processed)
+    return processed
+
+
+def get_watermark(source):
+    return RollupWatermark.objects.filter(source=source).values_list('last_id', flat=True).first() or 0
+
+
+def raw_date_range():
+    """Return ``(first, last)`` local dates covered by raw events, or None."""
+    dates = []
+    for model, date_field, _ in SOURCES.values():
+        bounds = model.objects.aggregate(first=Min(date_field), last=Max(date_field))
+        if bounds['first']:
+            dates += [timezone.localdate(bounds['first']), timezone.localdate(bounds['last'])]
+    return (min(dates), max(dates)) if dates else None
+
+
+def rebuild_daily_rollups(start, end, watermarks, views_from=None):
+    """
+    Recompute ``IdeaDailyStats`` for local dates in ``[start, end)`` from
+    raw events at or below ``watermarks``. View fields are only rebuilt
+    from ``views_from`` on, since older raw views may have been archived.
+    Returns the number of stats rows written.
+    """
+    start_at, end_at = _day_bounds(start, end)
+    values = {}
+    
+    def merge(totals):
+        for key, amounts in totals.items():
+            values.setdefault(key, {}).update(amounts)
+    
+    reset = {field: 0 for field in ('upvotes', 'downvotes', 'comments')}
+    for source, (model, date_field, totals) in SOURCES.items():
+        events = model.objects.filter(pk__lte=watermarks[source], **{
+            f'{date_field}__gte': start_at, f'{date_field}__lt': end_at,
+        })
+        if source == 'views':
+            if views_from is None or views_from >= end:
+                continue
+            events = events.filter(viewed_at__gte=_day_bounds(views_from, views_from)[0])
+            merge(totals(events))
+            merge(unique_viewer_totals(events))
+        else:
+            merge(totals(events))
+    
+    with transaction.atomic():
+        stale = IdeaDailyStats.objects.filter(date__gte=start, date__lt=end)
+        stale.update(**reset)
+        if views_from is not None:
+            stale.filter(date__gte=views_from).update(views=0, unique_viewers=0)
+        save_daily_stats(values=values)
+    return len(values)
+
+
+def acquire_rollup_lock():
+    return cache.add(ROLLUP_LOCK_KEY, 1, ROLLUP_LOCK_TIMEOUT)
+
+
+def release_rollup_lock():
+    cache.delete(ROLLUP_LOCK_KEY)
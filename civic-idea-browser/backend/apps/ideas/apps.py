@@ -0,0 +1,11 @@
+"""
+App configuration for the ideas app.
+"""
+from django.apps import AppConfig
+
+
+class IdeasConfig(AppConfig):
+    name = 'apps.ideas'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,351 @@
+"""
+Bulk import of ideas from other portals.
+
+Rows are read one at a time from CSV or JSON Lines and imported in
+batches. Authors, collaborators, voters, categories and tags are resolved
+through lookup maps loaded once at the start (users by username or email,
+categories and tags by slug or name), so a batch costs a fixed number of
+queries: one to find the ideas already imported, one ``bulk_create`` for
+the ideas and one for each through table (categories, tags,
+``IdeaCollaborator``) and for votes.
+
+Each row carries an ``external_id``, stored on the idea. Rows whose id is
+already in the database are skipped and every batch is one transaction,
+so an import that failed part way can simply be run again.
+
+Columns are those of the idea export (``apps.ideas.export``): list values
+(``categories``, ``tags``, ``collaborators``, ``votes``) are JSON lists in
+JSON Lines and ``|``-separated in CSV, and votes are written
+``<username>:up`` or ``<username>:down``.
+
+Signals don't fire for bulk inserts. Vote counters are set on the ideas
+as they are inserted, the search index and trending scores are updated per
+batch, and category/tag ``ideas_count`` and the response cache are
+refreshed by ``finish()``.
+"""
+import csv
+import json
+import time
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from apps.categories.counters import recount_ideas_counts
+from apps.categories.models import Category, Tag
+from apps.core.models import explicit_timestamps
+from .export import LIST_SEPARATOR
+from .models import Idea, IdeaCollaborator, Vote
+from .responsecache import bump_versions
+from .search import index_ideas
+from .trending import update_trending_scores
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+TEXT_FIELDS = ('title', 'summary', 'description', 'location', 'scope', 'estimated_timeline', 'implementation_plan')
+STATUSES = {value for value, _ in Idea.STATUS_CHOICES}
+PRIORITIES = {value for value, _ in Idea.PRIORITY_CHOICES}
+VOTE_TYPES = {value for value, _ in Vote.VOTE_TYPE_CHOICES}
+MAX_ERRORS = 100
+
+
+class RowError(Exception):
+    pass
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+def read_jsonl(stream):
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield RowError(f'line {line_number}: {exc}')
+            continue
+        yield row if isinstance(row, dict) else RowError(f'line {line_number}: not an object')
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+def _list(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+    return [item if isinstance(item, dict) else str(item).strip() for item in value]
+
+
+def _datetime(value, field):
+    if not value:
+        return None
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        raise RowError(f'{field} is not a date and time: {value!r}')
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+class ImportStats:
+    """
+    Counts of one import run.
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.read = 0
+        self.created = 0
+        self.existing = 0
+        self.invalid = 0
+        self.links = Counter()
+        self.missing = Counter()
+        self.errors = []
+    
+    @property
+    def rate(self):
+        return self.read / max(time.perf_counter() - self.started, 1e-9)
+    
+    def error(self, row_number, message):
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f'row {row_number}: {message}')
+
+
+class IdeaImporter:
+    """
+    Import idea rows in batches; see the module docstring.
+    
+    The external id is read from ``id_column``, and ``source`` is prefixed
+    to it (``<source>:<id>``) to keep the ids of different portals apart.
+    ``default_author`` (a username or email) is used for rows whose author
+    is unknown, which are skipped otherwise. Tags that don't exist are created
+    unless ``create_tags`` is False; unknown users and categories are
+    counted in ``stats.missing`` and left out.
+    """
+    
+    def __init__(self, id_column='external_id', source='', default_author=None, create_tags=True,
+                 batch_size=BATCH_SIZE):
+        self.id_column = id_column
+        self.source = source
+        self.create_tags = create_tags
+        self.batch_size = batch_size
+        self.stats = ImportStats()
+        self.users = {}
+        for pk, username, email in User.objects.values_list('pk', 'username', 'email').iterator(chunk_size=5000):
+            self.users[username] = pk
+            if email:
+                self.users.setdefault(email.lower(), pk)
+        self.categories = self._taxonomy_map(Category)
+        self.tags = self._taxonomy_map(Tag)
+        self.default_author = None
+        if default_author is not None:
+            self.default_author = self.user_id(default_author)
+            if self.default_author is None:
+                raise ValueError(f'Unknown default author {default_author!r}')
+    
+    def _taxonomy_map(self, model):
+        lookup = {}
+        for pk, slug, name in model.objects.values_list('pk', 'slug', 'name'):
+            lookup[slug] = pk
+            lookup.setdefault(name.lower(), pk)
+        return lookup
+    
+    def user_id(self, value):
+        value = str(value).strip()
+        return self.users.get(value) or self.users.get(value.lower())
+    
+    def category_id(self, value):
+        return self.categories.get(value) or self.categories.get(value.lower())
+    
+    def tag_id(self, value):
+        return self.tags.get(value) or self.tags.get(value.lower())
+    
+    def external_id(self, row):
+        value = str(row.get(self.id_column) or '').strip()
+        if not value:
+            raise RowError(f'{self.id_column} is missing')
+        value = f'{self.source}:{value}' if self.source else value
+        if len(value) > 100:
+            raise RowError('external_id is longer than 100 characters')
+        return value
+    
+    def run(self, rows, progress=None):
+        """Import every row of the ``rows`` iterable; ``progress(stats)`` is called after each batch."""
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+            if progress is not None:
+                progress(self.stats)
+        return self.stats
+    
+    def import_batch(self, batch):
+        first_row = self.stats.read + 1
+        self.stats.read += len(batch)
+        keyed = {}
+        for row_number, row in enumerate(batch, first_row):
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                key = self.external_id(row)
+                if key in keyed:
+                    raise RowError(f'duplicate external id {key!r}')
+                keyed[key] = (row_number, row)
+            except RowError as exc:
+                self.stats.error(row_number, exc)
+        existing = set(Idea.objects.filter(external_id__in=list(keyed)).values_list('external_id', flat=True))
+        self.stats.existing += len(existing)
+        
+        if self.create_tags:
+            self.add_tags(row for key, (_, row) in keyed.items() if key not in existing)
+        
+        built = []
+        for key, (row_number, row) in keyed.items():
+            if key in existing:
+                continue
+            try:
+                built.append(self.build(key, row))
+            except RowError as exc:
+                self.stats.error(row_number, exc)
+        if built:
+            self.insert(built)
+    
+    def add_tags(self, rows):
+        names = {name for row in rows for name in _list(row.get('tags')) if name.lower() not in self.tags}
+        names.discard('')
+        if not names:
+            return
+        Tag.objects.bulk_create(
+            [Tag(name=name[:50], slug=slugify(name)[:50] or name[:50]) for name in names], ignore_conflicts=True
+        )
+        created = Tag.objects.filter(name__in=[name[:50] for name in names]).values_list('pk', 'slug', 'name')
+        for pk, slug, name in created:
+            self.tags[slug] = pk
+            self.tags.setdefault(name.lower(), pk)
+    
+    def resolve(self, kind, lookup, values):
+        ids = []
+        for value in values:
+            pk = lookup(value)
+            if pk is None:
+                self.stats.missing[kind] += 1
+            elif pk not in ids:
+                ids.append(pk)
+        return ids
+    
+    def build(self, key, row):
+        """Return an unsaved ``Idea`` and its links for one row."""
+        values = {}
+        for name in TEXT_FIELDS:
+            max_length = Idea._meta.get_field(name).max_length
+            value = str(row.get(name) or '').strip()
+            values[name] = value[:max_length] if max_length else value
+        if not values['title']:
+            raise RowError('title is missing')
+        
+        author = row.get('author')
+        author_id = self.user_id(author) if author else None
+        if author_id is None:
+            if self.default_author is None:
+                raise RowError(f'unknown author {author!r}')
+            author_id = self.default_author
+        
+        status = row.get('status') or 'submitted'
+        if status not in STATUSES:
+            raise RowError(f'unknown status {status!r}')
+        priority = row.get('priority') or 'medium'
+        if priority not in PRIORITIES:
+            raise RowError(f'unknown priority {priority!r}')
+        try:
+            cost = row.get('estimated_cost')
+            cost = Decimal(str(cost)) if cost not in (None, '') else None
+        except InvalidOperation:
+            raise RowError(f'estimated_cost is not a number: {cost!r}')
+        created_at = _datetime(row.get('created_at'), 'created_at') or timezone.now()
+        published_at = _datetime(row.get('published_at'), 'published_at')
+        if published_at is None and status != 'draft':
+            published_at = created_at
+        
+        votes = {}
+        for vote in _list(row.get('votes')):
+            if isinstance(vote, dict):
+                user, vote_type = vote.get('user'), vote.get('vote_type')
+            else:
+                user, _, vote_type = vote.rpartition(':')
+            user_id = self.user_id(user) if user else None
+            if user_id is None or vote_type not in VOTE_TYPES:
+                self.stats.missing['voters'] += 1
+                continue
+            votes[user_id] = vote_type
+        upvotes = sum(1 for vote_type in votes.values() if vote_type == 'up')
+        
+        idea = Idea(
+            external_id=key, author_id=author_id, status=status, priority=priority, estimated_cost=cost,
+            created_at=created_at, updated_at=_datetime(row.get('updated_at'), 'updated_at') or created_at,
+            published_at=published_at, votes_count=len(votes), upvotes_count=upvotes,
+            downvotes_count=len(votes) - upvotes, **values,
+        )
+        links = {
+            'categories': self.resolve('categories', self.category_id, _list(row.get('categories'))),
+            'tags': self.resolve('tags', self.tag_id, _list(row.get('tags'))),
+            'collaborators': [
+                pk for pk in self.resolve('collaborators', self.user_id, _list(row.get('collaborators')))
+                if pk != author_id
+            ],
+            'votes': votes,
+        }
+        return idea, links
+    
+    def insert(self, built):
+        ideas = [idea for idea, _ in built]
+        with transaction.atomic():
+            with explicit_timestamps(Idea):
+                Idea.objects.bulk_create(ideas)
+            if any(idea.pk is None for idea in ideas):
+                # Backends that can't return the new primary keys.
+                pks = dict(
+                    Idea.objects.filter(external_id__in=[idea.external_id for idea in ideas])
+                    .values_list('external_id', 'pk')
+                )
+                for idea in ideas:
+                    idea.pk = pks[idea.external_id]
+            
+            rows = {'categories': [], 'tags': [], 'collaborators': [], 'votes': []}
+            for idea, links in built:
+                rows['categories'] += [
+                    Idea.categories.through(idea_id=idea.pk, category_id=pk) for pk in links['categories']
+                ]
+                rows['tags'] += [Idea.tags.through(idea_id=idea.pk, tag_id=pk) for pk in links['tags']]
+                rows['collaborators'] += [
+                    IdeaCollaborator(idea_id=idea.pk, user_id=pk) for pk in links['collaborators']
+                ]
+                rows['votes'] += [
+                    Vote(idea_id=idea.pk, user_id=pk, vote_type=vote_type) for pk, vote_type in links['votes'].items()
+                ]
+            Idea.categories.through.objects.bulk_create(rows['categories'])
+            Idea.tags.through.objects.bulk_create(rows['tags'])
+            IdeaCollaborator.objects.bulk_create(rows['collaborators'])
+            Vote.objects.bulk_create(rows['votes'])
+        
+        idea_ids = [idea.pk for idea in ideas]
+        index_ideas(idea_ids)
+        update_trending_scores(idea_ids)
+        self.stats.created += len(ideas)
+        self.stats.links.update({name: len(items) for name, items in rows.items()})
+    
+    def finish(self):
+        """Recount category and tag ``ideas_count`` and drop cached idea responses."""
+        if self.stats.created:
+            recount_ideas_counts()
+            bump_versions()
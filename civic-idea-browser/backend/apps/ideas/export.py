@@ -0,0 +1,292 @@
+"""
+Streaming exports of ideas, votes and comments as CSV, JSON Lines or
+Parquet.
+
+Rows are read with ``QuerySet.iterator(chunk_size=...)`` (a server-side
+cursor on PostgreSQL) as plain values and written out one chunk at a
+time, so memory use depends on the chunk size and not on the number of
+rows. The idea export adds the categories, tags and collaborators of each
+chunk with one query per relation, keyed by idea id, instead of one query
+per row.
+
+``render_export`` yields the encoded output in pieces, for a
+``StreamingHttpResponse`` or a file. Parquet needs ``pyarrow``; every
+chunk of ``row_group_size`` rows becomes a row group, and is handed on
+as soon as it is written.
+"""
+import csv
+import io
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+from .models import Comment, Idea, IdeaCollaborator, Vote
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+CHUNK_SIZE = 2000
+ROW_GROUP_SIZE = 20000
+LIST_SEPARATOR = '|'
+
+
+class ExportError(Exception):
+    pass
+
+
+class Export:
+    """
+    One exported table: ``columns`` maps output names to value lookups on
+    ``model``, and ``list_columns`` names the many-to-many columns added
+    per chunk by ``extend()``.
+    """
+    name = None
+    model = None
+    columns = {}
+    list_columns = ()
+    
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.rows = 0
+    
+    def get_queryset(self):
+        return self.model.objects.order_by('pk')
+    
+    def chunks(self):
+        """Yield lists of row dicts of at most ``chunk_size`` rows."""
+        names = list(self.columns)
+        values = self.get_queryset().values_list(*self.columns.values()).iterator(chunk_size=self.chunk_size)
+        chunk = []
+        for row in values:
+            chunk.append(dict(zip(names, row)))
+            if len(chunk) == self.chunk_size:
+                yield self.finish(chunk)
+                chunk = []
+        if chunk:
+            yield self.finish(chunk)
+    
+    def finish(self, chunk):
+        self.extend(chunk)
+        self.rows += len(chunk)
+        return chunk
+    
+    def extend(self, chunk):
+        pass
+    
+    def field(self, lookup):
+        """Return the model field behind a value lookup such as ``author__username``."""
+        model, field = self.model, None
+        for part in lookup.split('__'):
+            field = model._meta.get_field(part)
+            model = field.related_model
+        return field.target_field if field.is_relation else field
+
+
+class IdeaExport(Export):
+    name = 'ideas'
+    model = Idea
+    columns = {
+        'id': 'id',
+        'title': 'title',
+        'summary': 'summary',
+        'description': 'description',
+        'status': 'status',
+        'priority': 'priority',
+        'author_id': 'author_id',
+        'author': 'author__username',
+        'location': 'location',
+        'scope': 'scope',
+        'estimated_cost': 'estimated_cost',
+        'estimated_timeline': 'estimated_timeline',
+        'views_count': 'views_count',
+        'votes_count': 'votes_count',
+        'upvotes_count': 'upvotes_count',
+        'downvotes_count': 'downvotes_count',
+        'comments_count': 'comments_count',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+        'published_at': 'published_at',
+    }
+    list_columns = ('categories', 'tags', 'collaborators')
+    
+    def extend(self, chunk):
+        ids = [row['id'] for row in chunk]
+        related = {
+            'categories': (Idea.categories.through, 'category__slug'),
+            'tags': (Idea.tags.through, 'tag__slug'),
+            'collaborators': (IdeaCollaborator, 'user__username'),
+        }
+        for column, (through, lookup) in related.items():
+            pairs = through.objects.filter(idea_id__in=ids).order_by('pk').values_list('idea_id', lookup)
+            by_idea = {}
+            for idea_id, value in pairs:
+                by_idea.setdefault(idea_id, []).append(value)
+            for row in chunk:
+                row[column] = by_idea.get(row['id'], [])
+
+
+class VoteExport(Export):
+    name = 'votes'
+    model = Vote
+    columns = {
+        'id': 'id',
+        'idea_id': 'idea_id',
+        'user_id': 'user_id',
+        'vote_type': 'vote_type',
+        'created_at': 'created_at',
+    }
+
+
+class CommentExport(Export):
+    name = 'comments'
+    model = Comment
+    columns = {
+        'id': 'id',
+        'idea_id': 'idea_id',
+        'author_id': 'author_id',
+        'parent_id': 'parent_id',
+        'root_id': 'root_id',
+        'depth': 'depth',
+        'is_public': 'is_public',
+        'content': 'content',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+
+
+EXPORTS = {export.name: export for export in (IdeaExport, VoteExport, CommentExport)}
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def write_csv(export):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([*export.columns, *export.list_columns])
+    for chunk in export.chunks():
+        for row in chunk:
+            writer.writerow([_csv_cell(value) for value in row.values()])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class ExportJSONEncoder(DjangoJSONEncoder):
+    """Keep full microseconds, which ``DjangoJSONEncoder`` cuts to milliseconds, as the CSV export does."""
+    
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def write_jsonl(export):
+    encoder = ExportJSONEncoder(ensure_ascii=False)
+    for chunk in export.chunks():
+        yield ''.join(f'{encoder.encode(row)}\n' for row in chunk).encode()
+
+
+def _arrow_type(pa, field):
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, (models.AutoField, models.BigAutoField, models.IntegerField)):
+        return pa.int64()
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    return pa.string()
+
+
+class _ChunkSink:
+    """
+    Write-only file that hands on what was written since the last ``drain()``.
+    """
+    closed = False
+    
+    def __init__(self):
+        self.pieces = []
+        self.position = 0
+    
+    def write(self, data):
+        self.pieces.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self.position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def drain(self):
+        data = b''.join(self.pieces)
+        self.pieces = []
+        return data
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportError('Parquet export requires pyarrow.')
+    return pyarrow, pyarrow.parquet
+
+
+def write_parquet(export, row_group_size=ROW_GROUP_SIZE):
+    pa, pq = _import_pyarrow()
+    
+    schema = pa.schema(
+        [(name, _arrow_type(pa, export.field(lookup))) for name, lookup in export.columns.items()]
+        + [(name, pa.list_(pa.string())) for name in export.list_columns]
+    )
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    pending, pending_rows = [], 0
+    for chunk in export.chunks():
+        pending.append(pa.RecordBatch.from_pylist(chunk, schema=schema))
+        pending_rows += len(chunk)
+        if pending_rows >= row_group_size:
+            writer.write_table(pa.Table.from_batches(pending, schema), row_group_size=pending_rows)
+            pending, pending_rows = [], 0
+            yield sink.drain()
+    if pending:
+        writer.write_table(pa.Table.from_batches(pending, schema), row_group_size=pending_rows)
+    writer.close()
+    yield sink.drain()
+
+
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl, 'parquet': write_parquet}
+
+
+def get_export(name, fmt, chunk_size=CHUNK_SIZE):
+    """Return the ``Export`` for ``name`` after checking that ``fmt`` can be written."""
+    if name not in EXPORTS:
+        raise ExportError(f'Unknown export {name!r}; choose from {", ".join(EXPORTS)}.')
+    if fmt not in WRITERS:
+        raise ExportError(f'Unknown format {fmt!r}; choose from {", ".join(WRITERS)}.')
+    if fmt == 'parquet':
+        _import_pyarrow()
+    return EXPORTS[name](chunk_size)
+
+
+def render_export(export, fmt):
+    """Yield the encoded export in pieces of about one chunk."""
+    return WRITERS[fmt](export)
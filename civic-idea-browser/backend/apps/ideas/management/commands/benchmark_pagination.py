@@ -0,0 +1,94 @@
+"""
+Django management command to compare page-number and cursor pagination
+latency on the idea feed from shallow to deep pages.
+"""
+import statistics
+import time
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.pagination import Cursor, PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from apps.core.pagination import FeedCursorPagination
+from apps.ideas.models import Idea
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark OFFSET vs keyset pagination of the idea feed at increasing page depth'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 1000, 10000])
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--seed', action='store_true',
+            help='Create benchmark ideas if there are too few to reach the deepest page'
+        )
+    
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        pages = sorted(options['pages'])
+        queryset = Idea.objects.exclude(status='draft').defer('search_vector')
+        
+        needed = pages[-1] * page_size
+        available = queryset.count()
+        if available < needed:
+            if not options['seed']:
+                pages = [page for page in pages if page * page_size <= available]
+                self.stdout.write(self.style.WARNING(
+                    f'Only {available} ideas; pass --seed to reach page {options["pages"][-1]}'
+                ))
+            else:
+                self.seed(needed - available)
+        
+        self.factory = APIRequestFactory()
+        self.stdout.write(f'{"page":>8} {"offset ms":>12} {"cursor ms":>12}')
+        for page in pages:
+            offset_ms = self.measure(options['repeat'], self.page_number_page, queryset, page, page_size)
+            cursor_ms = self.measure(options['repeat'], self.cursor_page, queryset, page, page_size)
+            self.stdout.write(f'{page:>8} {offset_ms:>12.2f} {cursor_ms:>12.2f}')
+    
+    def seed(self, count, batch_size=5000):
+        author, _ = User.objects.get_or_create(
+            username='pagination-bench', defaults={'email': 'pagination-bench@example.com'}
+        )
+        self.stdout.write(f'Seeding {count} ideas...')
+        for start in range(0, count, batch_size):
+            Idea.objects.bulk_create([
+                Idea(title=f'Benchmark idea {n}', description='Benchmark idea', author=author, status='submitted')
+                for n in range(start, min(start + batch_size, count))
+            ])
+    
+    def measure(self, repeat, func, *args):
+        timings = []
+        for _ in range(repeat):
+            request, paginator = func(*args)
+            started = time.perf_counter()
+            list(paginator.paginate_queryset(args[0], request))
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+    
+    def page_number_page(self, queryset, page, page_size):
+        paginator = PageNumberPagination()
+        paginator.page_size = page_size
+        request = Request(self.factory.get('/api/ideas/', {'page': page}))
+        return request, paginator
+    
+    def cursor_page(self, queryset, page, page_size):
+        paginator = FeedCursorPagination()
+        paginator.page_size = page_size
+        params = {}
+        if page > 1:
+            # Locating the cursor for a deep page is not part of the timing:
+            # clients reach it by following "next" links.
+            boundary = queryset.order_by(*paginator.ordering)[(page - 1) * page_size - 1]
+            paginator.base_url = 'http://testserver/api/ideas/'
+            position = paginator._get_position_from_instance(boundary, paginator.ordering)
+            link = paginator.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+            params = {key: values[0] for key, values in parse_qs(urlparse(link).query).items()}
+        request = Request(self.factory.get('/api/ideas/', params))
+        return request, paginator
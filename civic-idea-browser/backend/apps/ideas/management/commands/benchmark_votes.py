@@ -0,0 +1,88 @@
+"""
+Django management command to benchmark concurrent voting with and without
+sharded vote counters.
+"""
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from apps.ideas.models import Idea, Vote
+from apps.ideas.voting import cast_vote, fold_vote_counters
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark parallel voters hammering a single idea, with and without '
+        'sharded vote counters. Run against PostgreSQL; SQLite serializes all writes.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--voters', type=int, default=64, help='Number of parallel voters')
+        parser.add_argument('--votes-per-voter', type=int, default=20)
+        parser.add_argument('--shards', type=int, default=16, help='Shard count for the sharded run')
+    
+    def handle(self, *args, **options):
+        voters = options['voters']
+        votes_per_voter = options['votes_per_voter']
+        
+        results = {}
+        for shards in (0, options['shards']):
+            with override_settings(VOTE_COUNTER_SHARDS=shards):
+                results[shards] = self.run_round(voters, votes_per_voter)
+            label = f'{shards} shards' if shards > 1 else 'unsharded'
+            self.stdout.write(
+                f'{label}: {voters * votes_per_voter} votes in {results[shards]:.2f}s '
+                f'({voters * votes_per_voter / results[shards]:.0f} votes/s)'
+            )
+        
+        unsharded, sharded = results[0], results[options['shards']]
+        self.stdout.write(self.style.SUCCESS(f'Speedup with sharding: {unsharded / sharded:.2f}x'))
+    
+    def run_round(self, voters, votes_per_voter):
+        run_id = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create([
+            User(username=f'bench-{run_id}-{n}', email=f'bench-{run_id}-{n}@example.com', password='!')
+            for n in range(voters * votes_per_voter + 1)
+        ])
+        author, users = users[0], users[1:]
+        idea = Idea.objects.create(
+            title=f'Vote benchmark {run_id}', description='Benchmark idea', author=author, status='submitted'
+        )
+        barrier = threading.Barrier(voters)
+        
+        def vote_batch(batch):
+            barrier.wait()
+            try:
+                for user in batch:
+                    cast_vote(idea, user, random.choice(['up', 'up', 'down']))
+            finally:
+                connection.close()
+        
+        batches = [users[n::voters] for n in range(voters)]
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=voters) as executor:
+                list(executor.map(vote_batch, batches))
+            elapsed = time.perf_counter() - started
+            
+            fold_vote_counters()
+            idea.refresh_from_db()
+            # A lost update shows up as counters below the number of votes cast.
+            stored = Vote.objects.filter(idea=idea).count()
+            counted = {idea.votes_count, idea.upvotes_count + idea.downvotes_count}
+            if counted != {stored} or stored != len(users):
+                raise CommandError(
+                    f'Lost updates: {len(users)} votes cast, {stored} stored, counters say '
+                    f'{idea.votes_count} ({idea.upvotes_count} up, {idea.downvotes_count} down)'
+                )
+        finally:
+            User.objects.filter(username__startswith=f'bench-{run_id}-').delete()
+        return elapsed
@@ -0,0 +1,44 @@
+"""
+Django management command to export ideas, votes or comments to a file as
+CSV, JSON Lines or Parquet.
+"""
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.ideas.export import CHUNK_SIZE, EXPORTS, WRITERS, ExportError, get_export, render_export
+
+
+class Command(BaseCommand):
+    help = 'Stream all ideas (with categories, tags and collaborators), votes or comments to a file'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(EXPORTS))
+        parser.add_argument('output', help='File to write, or - for standard output')
+        parser.add_argument('--format', choices=list(WRITERS), default='csv')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows fetched per database round trip')
+    
+    def handle(self, *args, **options):
+        try:
+            export = get_export(options['dataset'], options['format'], options['chunk_size'])
+        except ExportError as exc:
+            raise CommandError(str(exc))
+        
+        to_stdout = options['output'] == '-'
+        output = sys.stdout.buffer if to_stdout else open(options['output'], 'wb')
+        started = time.perf_counter()
+        written = 0
+        try:
+            for piece in render_export(export, options['format']):
+                output.write(piece)
+                written += len(piece)
+        finally:
+            if not to_stdout:
+                output.close()
+        
+        if not to_stdout:
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'Exported {export.rows} {options["dataset"]} ({written / 1e6:.1f} MB) to {options["output"]} '
+                f'in {elapsed:.1f}s ({export.rows / elapsed:.0f} rows/s)'
+            ))
@@ -0,0 +1,64 @@
+"""
+Django management command to bulk import ideas from another portal's CSV
+or JSON Lines export.
+"""
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.ideas.bulkimport import BATCH_SIZE, READERS, IdeaImporter
+
+
+class Command(BaseCommand):
+    help = (
+        'Import ideas with their categories, tags, collaborators and votes in batches, '
+        'skipping external ids that were already imported'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='CSV or JSON Lines file, or - for standard input')
+        parser.add_argument('--format', choices=list(READERS), help='Defaults to the file extension')
+        parser.add_argument('--id-column', default='external_id', help='Column holding the id in the source portal')
+        parser.add_argument('--source', default='', help='Prefix for the external ids, e.g. the portal name')
+        parser.add_argument('--default-author', help='Username or email used when a row has an unknown author')
+        parser.add_argument('--no-create-tags', action='store_true', help='Leave out tags that do not exist')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    
+    def handle(self, *args, **options):
+        fmt = options['format'] or os.path.splitext(options['input'])[1].lstrip('.').lower()
+        if fmt not in READERS:
+            raise CommandError(f'Pass --format ({", ".join(READERS)}) for {options["input"]}')
+        try:
+            importer = IdeaImporter(
+                id_column=options['id_column'], source=options['source'],
+                default_author=options['default_author'], create_tags=not options['no_create_tags'],
+                batch_size=options['batch_size'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        
+        stream = sys.stdin if options['input'] == '-' else open(options['input'], newline='', encoding='utf-8')
+        try:
+            stats = importer.run(READERS[fmt](stream), progress=self.report)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        
+        self.stdout.write('Recounting categories and tags...')
+        importer.finish()
+        for error in stats.errors:
+            self.stdout.write(self.style.WARNING(error))
+        if stats.missing:
+            missing = ', '.join(f'{count} {kind}' for kind, count in sorted(stats.missing.items()))
+            self.stdout.write(self.style.WARNING(f'Unknown references left out: {missing}'))
+        links = ', '.join(f'{count} {name}' for name, count in sorted(stats.links.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {stats.created} ideas ({links or "no links"}) from {stats.read} rows: '
+            f'{stats.existing} already imported, {stats.invalid} invalid ({stats.rate:.0f} rows/s)'
+        ))
+    
+    def report(self, stats):
+        self.stdout.write(
+            f'{stats.read} rows: {stats.created} created, {stats.existing} existing, {stats.invalid} invalid, '
+            f'{stats.rate:.0f} rows/s'
+        )
@@ -0,0 +1,20 @@
+"""
+Django management command to rebuild comment thread paths.
+"""
+from django.core.management.base import BaseCommand
+from apps.ideas.models import Comment
+from apps.ideas.threads import rebuild_comment_paths
+
+
+class Command(BaseCommand):
+    help = 'Recompute Comment.root, path and depth from the parent links'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--missing-only', action='store_true', help='Only ideas with comments lacking a path')
+    
+    def handle(self, *args, **options):
+        queryset = Comment.objects.all()
+        if options['missing_only']:
+            queryset = queryset.filter(path='')
+        count = rebuild_comment_paths(queryset)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt thread paths for {count} comments'))
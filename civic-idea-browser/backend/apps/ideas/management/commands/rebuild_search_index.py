@@ -0,0 +1,35 @@
+"""
+Django management command to rebuild the idea full-text search index.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min
+from apps.ideas.models import Idea
+from apps.ideas.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for all ideas in id-range batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+    
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if backend is None:
+            raise CommandError('Full-text search is only supported on PostgreSQL and SQLite')
+        
+        backend.ensure_schema()
+        bounds = Idea.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            self.stdout.write('No ideas to index')
+            return
+        
+        batch_size = options['batch_size']
+        indexed = 0
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            with transaction.atomic():
+                indexed += backend.rebuild(start, start + batch_size)
+            self.stdout.write(f'Indexed ideas up to id {min(start + batch_size - 1, bounds["high"])}')
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search index for {indexed} ideas'))
@@ -1,15 +1,20 @@
 """
 Models for the ideas app.
 """
+import uuid
+
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
+from apps.core.models import DirtyFieldsMixin
 
 User = get_user_model()
 
 
-class Idea(models.Model):
+class Idea(DirtyFieldsMixin, models.Model):
     """
     Model for civic ideas and proposals.
     """
@@ -68,11 +73,15 @@ class Idea(models.Model):
     
     # Media and attachments
     image = models.ImageField(_('image'), upload_to='ideas/images/', blank=True, null=True)
+    # Thumbnails and WebP versions of the image, see apps.core.images.
+    image_variants = models.JSONField(_('image variants'), default=dict, blank=True, editable=False)
     attachments = models.ManyToManyField('IdeaAttachment', blank=True)
     
     # Engagement metrics
     views_count = models.PositiveIntegerField(_('views count'), default=0)
     votes_count = models.PositiveIntegerField(_('votes count'), default=0)
+    upvotes_count = models.PositiveIntegerField(_('upvotes count'), default=0)
+    downvotes_count = models.PositiveIntegerField(_('downvotes count'), default=0)
     comments_count = models.PositiveIntegerField(_('comments count'), default=0)
     
     # Timestamps
@@ -80,6 +89,17 @@ class Idea(models.Model):
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     published_at = models.DateTimeField(_('published at'), null=True, blank=True)
     
+    # Id of an idea imported from another portal (see apps.ideas.bulkimport),
+    # which makes re-running an import skip what it already created.
+    external_id = models.CharField(
+        _('external id'), max_length=100, unique=True, null=True, blank=True, editable=False
+    )
+    
+    # Full-text search vector (PostgreSQL), maintained by apps.ideas.search.
+    # Its GIN index is created in ensure_search_schema() so SQLite can still
+    # create this table.
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         verbose_name = _('idea')
         verbose_name_plural = _('ideas')
@@ -88,19 +108,36 @@ class Idea(models.Model):
             models.Index(fields=['status', 'created_at']),
             models.Index(fields=['author', 'created_at']),
             models.Index(fields=['priority', 'status']),
+            # Keyset pagination of the unfiltered feed.
+            models.Index(fields=['created_at']),
         ]
     
     def __str__(self):
         return self.title
     
+    @property
+    def score(self):
+        """Return the net vote score (upvotes minus downvotes)."""
+        return self.upvotes_count - self.downvotes_count
+    
     def save(self, *args, **kwargs):
-        # Update published_at when status changes to submitted
-        if self.pk:
-            old_instance = Idea.objects.get(pk=self.pk)
-            if old_instance.status != 'submitted' and self.status == 'submitted':
-                from django.utils import timezone
+        # Update published_at when status changes to submitted. The previous
+        # status comes from the loaded snapshot, so this costs no query.
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'status' in update_fields:
+            if self.status_changed_to('submitted'):
                 self.published_at = timezone.now()
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'published_at'}
         super().save(*args, **kwargs)
+    
+    def status_changed_to(self, status):
+        """Return True if this save moves the idea into ``status``."""
+        if self._state.adding:
+            return self.status == status
+        if not self.is_field_loaded('status'):
+            return False
+        return self.status == status and self.get_loaded_value('status') != status
 
 
 class IdeaCollaborator(models.Model):
@@ -127,10 +164,15 @@ class IdeaCollaborator(models.Model):
         return f"{self.user.username} - {self.idea.title} ({self.role})"
 
 
-class IdeaAttachment(models.Model):
+class IdeaAttachment(DirtyFieldsMixin, models.Model):
     """
     Model for idea attachments.
+    
+    Files uploaded through the chunked upload API point at a ``StoredBlob``
+    and share it with every identical upload.
     """
+    TRACKED_FIELDS = ('file',)
+    
     ATTACHMENT_TYPE_CHOICES = [
         ('document', _('Document')),
         ('image', _('Image')),
@@ -158,6 +200,72 @@ class IdeaAttachment(models.Model):
         return self.title
 
 
+class StoredBlob(models.Model):
+    """
+    A file stored once under its SHA-256 digest, shared by every idea image
+    and attachment with the same content.
+    
+    ``ref_count`` counts the images and attachments using it and is kept by
+    signal handlers; unreferenced blobs are removed by a retention policy
+    once ``last_used_at`` is old enough.
+    """
+    sha256 = models.CharField(_('SHA-256'), max_length=64, unique=True)
+    file = models.FileField(_('file'), max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(_('size'))
+    content_type = models.CharField(_('content type'), max_length=100, blank=True)
+    ref_count = models.PositiveIntegerField(_('reference count'), default=0)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    last_used_at = models.DateTimeField(_('last used at'), default=timezone.now)
+    
+    class Meta:
+        verbose_name = _('stored blob')
+        verbose_name_plural = _('stored blobs')
+        indexes = [
+            models.Index(fields=['ref_count', 'last_used_at']),
+        ]
+    
+    def __str__(self):
+        return self.sha256
+
+
+class UploadSession(models.Model):
+    """
+    A resumable chunked upload. Chunks are appended in order and kept as
+    separate ``parts`` in storage until the upload is completed and
+    assembled into a ``StoredBlob``.
+    """
+    STATUS_CHOICES = [
+        ('uploading', _('Uploading')),
+        ('assembling', _('Assembling')),
+        ('complete', _('Complete')),
+        ('failed', _('Failed')),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(_('filename'), max_length=255)
+    content_type = models.CharField(_('content type'), max_length=100, blank=True)
+    size = models.PositiveBigIntegerField(_('size'))
+    sha256 = models.CharField(_('SHA-256'), max_length=64, blank=True)
+    received = models.PositiveBigIntegerField(_('bytes received'), default=0)
+    parts = models.JSONField(_('parts'), default=list, blank=True)
+    status = models.CharField(_('status'), max_length=20, choices=STATUS_CHOICES, default='uploading')
+    error = models.CharField(_('error'), max_length=255, blank=True)
+    blob = models.ForeignKey(
+        StoredBlob, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions'
+    )
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('upload session')
+        verbose_name_plural = _('upload sessions')
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+
 class Vote(models.Model):
     """
     Model for idea votes.
@@ -182,6 +290,92 @@ class Vote(models.Model):
         return f"{self.user.username} {self.vote_type} on {self.idea.title}"
 
 
+class VoteCounterShard(models.Model):
+    """
+    Pending vote tally deltas for an idea, spread over several rows.
+    
+    Voters increment a random shard instead of the Idea row; the
+    ``fold_vote_counters`` task periodically moves the deltas onto
+    ``Idea.upvotes_count``/``downvotes_count``/``votes_count``.
+    """
+    idea = models.ForeignKey(Idea, on_delete=models.CASCADE, related_name='vote_shards')
+    shard = models.PositiveSmallIntegerField(_('shard'))
+    upvotes = models.IntegerField(_('upvotes'), default=0)
+    downvotes = models.IntegerField(_('downvotes'), default=0)
+    
+    class Meta:
+        unique_together = ['idea', 'shard']
+        verbose_name = _('vote counter shard')
+        verbose_name_plural = _('vote counter shards')
+    
+    def __str__(self):
+        return f"Shard {self.shard} of {self.idea_id}: +{self.upvotes}/-{self.downvotes}"
+
+
+class TrendingScore(models.Model):
+    """
+    Database fallback for the trending leaderboard when Redis is unavailable.
+    
+    One row per idea per feed segment (``all``, ``status:<status>``,
+    ``category:<id>`` and ``category:<id>:status:<status>``).
+    """
+    idea = models.ForeignKey(Idea, on_delete=models.CASCADE, related_name='trending_scores')
+    segment = models.CharField(_('segment'), max_length=64)
+    score = models.FloatField(_('score'))
+    
+    class Meta:
+        unique_together = ['idea', 'segment']
+        verbose_name = _('trending score')
+        verbose_name_plural = _('trending scores')
+        indexes = [
+            models.Index(fields=['segment', '-score']),
+        ]
+    
+    def __str__(self):
+        return f"{self.idea_id} in {self.segment}: {self.score:.4f}"
+
+
+class IdeaDailyStats(models.Model):
+    """
+    Per-idea, per-day engagement totals rolled up from views, votes and
+    comments by ``apps.ideas.analytics``.
+    """
+    idea = models.ForeignKey(Idea, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField(_('date'))
+    views = models.PositiveIntegerField(_('views'), default=0)
+    unique_viewers = models.PositiveIntegerField(_('unique viewers'), default=0)
+    upvotes = models.PositiveIntegerField(_('upvotes'), default=0)
+    downvotes = models.PositiveIntegerField(_('downvotes'), default=0)
+    comments = models.PositiveIntegerField(_('comments'), default=0)
+    
+    class Meta:
+        unique_together = ['idea', 'date']
+        verbose_name = _('idea daily stats')
+        verbose_name_plural = _('idea daily stats')
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.idea_id} on {self.date}: {self.views} views"
+
+
+class RollupWatermark(models.Model):
+    """
+    Last event id folded into ``IdeaDailyStats`` for one event source.
+    """
+    source = models.CharField(_('source'), max_length=50, unique=True)
+    last_id = models.BigIntegerField(_('last id'), default=0)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('rollup watermark')
+        verbose_name_plural = _('rollup watermarks')
+    
+    def __str__(self):
+        return f"{self.source} up to {self.last_id}"
+
+
 class Comment(models.Model):
     """
     Model for idea comments.
@@ -194,13 +388,39 @@ class Comment(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     
+    # Thread position, set on insert (see apps.ideas.threads).
+    root = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='thread_comments'
+    )
+    path = models.CharField(_('path'), max_length=255, blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(_('depth'), default=0, editable=False)
+    
     class Meta:
         verbose_name = _('comment')
         verbose_name_plural = _('comments')
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['idea', 'created_at']),
+            models.Index(fields=['idea', 'depth', 'path']),
+            models.Index(fields=['root', 'path']),
+        ]
     
     def __str__(self):
         return f"Comment by {self.author.username} on {self.idea.title}"
+    
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if adding and self.parent_id:
+            self.root_id = self.parent.root_id
+            self.depth = self.parent.depth + 1
+        super().save(*args, **kwargs)
+        if adding:
+            # The path ends with this comment's own id, so it is set after the insert.
+            from .threads import comment_path
+            self.path = comment_path(self.parent.path if self.parent_id else '', self.pk)
+            if not self.parent_id:
+                self.root_id = self.pk
+            Comment.objects.filter(pk=self.pk).update(path=self.path, root_id=self.root_id)
 
 
 class IdeaView(models.Model):
@@ -211,12 +431,17 @@ class IdeaView(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='viewed_ideas', null=True, blank=True)
     ip_address = models.GenericIPAddressField(_('IP address'), null=True, blank=True)
     user_agent = models.TextField(_('user agent'), blank=True)
-    viewed_at = models.DateTimeField(_('viewed at'), auto_now_add=True)
+    # Not auto_now_add: buffered views are bulk-inserted with their original timestamp.
+    viewed_at = models.DateTimeField(_('viewed at'), default=timezone.now)
     
     class Meta:
         verbose_name = _('idea view')
         verbose_name_plural = _('idea views')
         ordering = ['-viewed_at']
+        indexes = [
+            # Unique viewer recounts for one idea-day in the analytics rollup.
+            models.Index(fields=['idea', 'viewed_at']),
+        ]
     
     def __str__(self):
         return f"View of {self.idea.title} at {self.viewed_at}" 
\ No newline at end of file
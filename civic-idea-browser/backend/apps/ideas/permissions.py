@@ -0,0 +1,15 @@
+"""
+Permissions for the ideas app.
+"""
+from rest_framework import permissions
+
+
+class IsAuthorOrReadOnly(permissions.BasePermission):
+    """
+    Allow writes only to the author of the object.
+    """
+    
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return obj.author_id == request.user.pk
@@ -0,0 +1,137 @@
+"""
+Versioned response cache for the public idea list and detail endpoints.
+
+Cached responses are keyed by a version number: one per idea for detail
+responses and one global listing version for list pages. Writes never
+delete cached entries; they bump the affected versions after commit, so
+invalidation is a single ``incr`` per key and old entries simply stop being
+read and expire. Versions are seeded from the clock, so a version that was
+evicted never restarts at a value that older entries were stored under.
+
+Cached payloads are identical for every caller. Per-user fields such as
+``user_vote`` are merged in after the cache lookup. Counters that change
+without a version bump (``views_count``) may lag by up to
+``IDEA_RESPONSE_CACHE_TIMEOUT``.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Vote
+
+KEY_PREFIX = 'ideas:response:'
+LIST_VERSION_KEY = 'ideas:version:list'
+IDEA_VERSION_PREFIX = 'ideas:version:idea:'
+STATS_PREFIX = 'ideas:response:stats:'
+ENDPOINTS = ('list', 'detail')
+
+
+def _idea_version_key(idea_id):
+    return f'{IDEA_VERSION_PREFIX}{idea_id}'
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, None)
+        version = cache.get(key)
+    return version
+
+
+def is_enabled(endpoint):
+    """Return False if caching of ``endpoint`` is switched off in settings."""
+    return settings.IDEA_RESPONSE_CACHE_TIMEOUT > 0 and endpoint not in settings.IDEA_RESPONSE_CACHE_DISABLED
+
+
+def list_cache_key(request):
+    """Key for a list page: listing version plus the full request URL."""
+    digest = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'{KEY_PREFIX}list:{_get_version(LIST_VERSION_KEY)}:{digest}'
+
+
+def detail_cache_key(idea_id):
+    """Key for an idea's detail response at its current version."""
+    return f'{KEY_PREFIX}detail:{idea_id}:{_get_version(_idea_version_key(idea_id))}'
+
+
+def get_cached(endpoint, key):
+    """Return the cached payload for ``key`` or None, counting the outcome."""
+    data = cache.get(key)
+    _count(endpoint, 'hits' if data is not None else 'misses')
+    return data
+
+
+def set_cached(key, data):
+    cache.set(key, data, settings.IDEA_RESPONSE_CACHE_TIMEOUT)
+
+
+def bump_versions(idea_ids=(), listing=True):
+    """Invalidate the detail responses of ``idea_ids`` and, optionally, all list pages."""
+    keys = [_idea_version_key(idea_id) for idea_id in idea_ids]
+    if listing:
+        keys.append(LIST_VERSION_KEY)
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Not cached: the next read seeds a fresh version anyway.
+            pass
+
+
+def schedule_version_bump(idea_ids=(), listing=True):
+    """Bump versions once the current transaction commits."""
+    idea_ids = list(idea_ids)
+    transaction.on_commit(lambda: bump_versions(idea_ids, listing))
+
+
+def add_user_fields(request, items):
+    """
+    Merge per-user fields into serialized ideas in place.
+    
+    For authenticated users each idea gets ``user_vote`` (``'up'``,
+    ``'down'`` or None), read with one query for the whole page.
+    """
+    if not request.user.is_authenticated or not items:
+        return
+    votes = dict(
+        Vote.objects.filter(user=request.user, idea_id__in=[item['id'] for item in items])
+        .values_list('idea_id', 'vote_type')
+    )
+    for item in items:
+        item['user_vote'] = votes.get(item['id'])
+
+
+def _count(endpoint, outcome):
+    key = f'{STATS_PREFIX}{endpoint}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def get_cache_stats():
+    """Return hit/miss counts and the hit rate for each endpoint."""
+    counts = cache.get_many([
+        f'{STATS_PREFIX}{endpoint}:{outcome}' for endpoint in ENDPOINTS for outcome in ('hits', 'misses')
+    ])
+    stats = {}
+    for endpoint in ENDPOINTS:
+        hits = counts.get(f'{STATS_PREFIX}{endpoint}:hits', 0)
+        misses = counts.get(f'{STATS_PREFIX}{endpoint}:misses', 0)
+        stats[endpoint] = {
+            'enabled': is_enabled(endpoint),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+    return stats
+
+
+def reset_cache_stats():
+    cache.delete_many([
+        f'{STATS_PREFIX}{endpoint}:{outcome}' for endpoint in ENDPOINTS for outcome in ('hits', 'misses')
+    ])
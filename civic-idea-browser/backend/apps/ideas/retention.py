@@ -0,0 +1,74 @@
+"""
+Retention policies for idea views, upload sessions and stored blobs.
+"""
+from django.db import transaction
+from django.db.models import Min
+from apps.core.retention import RetentionPolicy
+from .analytics import get_watermark, update_daily_rollups
+from .uploads import delete_files
+
+
+class IdeaViewRetention(RetentionPolicy):
+    """
+    Delete idea views after ``RETENTION_IDEA_VIEWS_DAYS``.
+    
+    Views are rolled up into ``IdeaDailyStats`` first, and only rows at or
+    below the rollup watermark are removed. Buffered views are inserted
+    after the fact, so ids don't follow ``viewed_at``: partitions are only
+    dropped before the oldest view above the watermark.
+    """
+    name = 'idea-views'
+    model = 'ideas.IdeaView'
+    date_field = 'viewed_at'
+    days_setting = 'RETENTION_IDEA_VIEWS_DAYS'
+    
+    def expired(self, cutoff):
+        return super().expired(cutoff).filter(pk__lte=get_watermark('views'))
+    
+    def partition_cutoff(self, cutoff):
+        oldest_pending = self.get_model().objects.filter(
+            pk__gt=get_watermark('views')
+        ).aggregate(oldest=Min('viewed_at'))['oldest']
+        return min(cutoff, oldest_pending) if oldest_pending else cutoff
+    
+    def apply(self, now=None, dry_run=False):
+        if self.days and not dry_run:
+            update_daily_rollups()
+        return super().apply(now, dry_run)
+
+
+class UploadSessionRetention(RetentionPolicy):
+    """
+    Delete upload sessions, and any parts they still hold, after
+    ``RETENTION_UPLOAD_SESSIONS_DAYS`` without activity.
+    """
+    name = 'upload-sessions'
+    model = 'ideas.UploadSession'
+    date_field = 'updated_at'
+    days_setting = 'RETENTION_UPLOAD_SESSIONS_DAYS'
+    
+    def archive(self, queryset):
+        parts = [part for session_parts in queryset.values_list('parts', flat=True) for part in session_parts]
+        transaction.on_commit(lambda: delete_files(parts))
+
+
+class UnreferencedBlobRetention(RetentionPolicy):
+    """
+    Delete blobs, with their files, that no image or attachment has used for
+    ``RETENTION_UNREFERENCED_BLOBS_DAYS``.
+    """
+    name = 'unreferenced-blobs'
+    model = 'ideas.StoredBlob'
+    date_field = 'last_used_at'
+    days_setting = 'RETENTION_UNREFERENCED_BLOBS_DAYS'
+    filters = {'ref_count': 0}
+    
+    def iter_chunks(self, queryset):
+        # Re-check ref_count and last_used_at when deleting, in case a blob
+        # was attached or an upload reused it meanwhile.
+        for chunk in super().iter_chunks(queryset):
+            yield chunk & queryset
+    
+    def archive(self, queryset):
+        names = list(queryset.select_for_update().values_list('file', flat=True))
+        transaction.on_commit(lambda: delete_files(names))
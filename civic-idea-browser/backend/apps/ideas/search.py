@@ -0,0 +1,234 @@
+"""
+Full-text search over ideas.
+
+PostgreSQL keeps a weighted ``Idea.search_vector`` tsvector behind a GIN
+index; SQLite keeps an FTS5 shadow table keyed by idea id so search can be
+exercised locally. Both backends rank matches by text relevance blended
+with ``votes_count`` and recency, and highlight matches for one page of
+results at a time.
+
+On other databases ``search_ideas`` falls back to a case-insensitive
+substring match on the indexed fields, ranked by votes only, and nothing
+is highlighted.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, ExpressionWrapper, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Ln
+
+from .models import Idea
+
+INDEXED_FIELDS = ('title', 'summary', 'description')
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+
+_AGE_SOURCE = 'COALESCE("ideas_idea"."published_at", "ideas_idea"."created_at")'
+
+
+class PostgresSearchBackend:
+    """
+    tsvector/GIN backend.
+    """
+    age_days_sql = f'EXTRACT(EPOCH FROM (NOW() - {_AGE_SOURCE})) / 86400.0'
+    
+    def __init__(self):
+        from django.contrib.postgres.search import SearchVector
+        self.config = settings.IDEA_SEARCH_CONFIG
+        self.vector = (
+            SearchVector('title', weight='A', config=self.config)
+            + SearchVector('summary', weight='B', config=self.config)
+            + SearchVector('description', weight='C', config=self.config)
+        )
+    
+    def ensure_schema(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS ideas_idea_search_vector_gin '
+                'ON ideas_idea USING gin (search_vector)'
+            )
+    
+    def index(self, idea_ids):
+        Idea.objects.filter(pk__in=idea_ids).update(search_vector=self.vector)
+    
+    def remove(self, idea_ids):
+        # The vector lives on the idea row and goes away with it.
+        pass
+    
+    def rebuild(self, start_id, end_id):
+        return Idea.objects.filter(pk__gte=start_id, pk__lt=end_id).update(search_vector=self.vector)
+    
+    def _query(self, text):
+        from django.contrib.postgres.search import SearchQuery
+        return SearchQuery(text, config=self.config, search_type='websearch')
+    
+    def search(self, queryset, text):
+        from django.contrib.postgres.search import SearchRank
+        query = self._query(text)
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        )
+    
+    def highlight(self, idea_ids, text):
+        from django.contrib.postgres.search import SearchHeadline
+        query = self._query(text)
+        rows = Idea.objects.filter(pk__in=idea_ids).annotate(
+            title_highlight=SearchHeadline(
+                'title', query, config=self.config, highlight_all=True,
+                start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_STOP,
+            ),
+            snippet=SearchHeadline(
+                'description', query, config=self.config, max_words=35, min_words=15,
+                start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_STOP,
+            ),
+        ).values_list('pk', 'title_highlight', 'snippet')
+        return {pk: {'title': title, 'snippet': snippet} for pk, title, snippet in rows}
+
+
+class SQLiteSearchBackend:
+    """
+    FTS5 shadow-table backend for local development.
+    """
+    table = 'ideas_idea_fts'
+    age_days_sql = f"julianday('now') - julianday({_AGE_SOURCE})"
+    # bm25() column weights for title, summary and description.
+    rank_sql = f'-bm25({table}, 10.0, 5.0, 1.0)'
+    
+    def ensure_schema(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5('
+                f"{', '.join(INDEXED_FIELDS)}, tokenize='porter unicode61')"
+            )
+    
+    def index(self, idea_ids):
+        idea_ids = list(idea_ids)
+        self.remove(idea_ids)
+        placeholders = ', '.join(['%s'] * len(idea_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {', '.join(INDEXED_FIELDS)}) "
+                f"SELECT id, {', '.join(INDEXED_FIELDS)} FROM ideas_idea WHERE id IN ({placeholders})",
+                idea_ids,
+            )
+    
+    def remove(self, idea_ids):
+        idea_ids = list(idea_ids)
+        placeholders = ', '.join(['%s'] * len(idea_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', idea_ids)
+    
+    def rebuild(self, start_id, end_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid >= %s AND rowid < %s', [start_id, end_id])
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {', '.join(INDEXED_FIELDS)}) "
+                f"SELECT id, {', '.join(INDEXED_FIELDS)} FROM ideas_idea WHERE id >= %s AND id < %s",
+                [start_id, end_id],
+            )
+            return cursor.rowcount
+    
+    def _query(self, text):
+        # Quote every term so user input can't trip FTS5 query syntax; the
+        # last term is a prefix match to support search-as-you-type.
+        terms = re.findall(r'\w+', text)
+        if not terms:
+            return None
+        return ' '.join(f'"{term}"' for term in terms) + '*'
+    
+    def search(self, queryset, text):
+        match = self._query(text)
+        if match is None:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match])
+        ).annotate(
+            rank=RawSQL(
+                f'SELECT {self.rank_sql} FROM {self.table} '
+                f'WHERE {self.table} MATCH %s AND rowid = "ideas_idea"."id"',
+                [match], output_field=FloatField(),
+            )
+        )
+    
+    def highlight(self, idea_ids, text):
+        match = self._query(text)
+        idea_ids = list(idea_ids)
+        if match is None or not idea_ids:
+            return {}
+        placeholders = ', '.join(['%s'] * len(idea_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, highlight({self.table}, 0, %s, %s), "
+                f"snippet({self.table}, 2, %s, %s, '…', 24) "
+                f'FROM {self.table} WHERE {self.table} MATCH %s AND rowid IN ({placeholders})',
+                [HIGHLIGHT_START, HIGHLIGHT_STOP, HIGHLIGHT_START, HIGHLIGHT_STOP, match, *idea_ids],
+            )
+            return {pk: {'title': title, 'snippet': snippet} for pk, title, snippet in cursor.fetchall()}
+
+
+_BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_search_backend():
+    """Return the search backend for the default database, or None."""
+    backend_class = _BACKENDS.get(connection.vendor)
+    return backend_class() if backend_class else None
+
+
+def search_ideas(queryset, text):
+    """
+    Filter ``queryset`` to ideas matching ``text``, ordered by
+    ``search_score``: text rank boosted by votes and decayed by age.
+    """
+    backend = get_search_backend()
+    votes_weight = settings.IDEA_SEARCH_VOTES_WEIGHT
+    half_life = settings.IDEA_SEARCH_RECENCY_HALF_LIFE_DAYS
+    if backend is None:
+        matches = Q()
+        for field in INDEXED_FIELDS:
+            matches |= Q(**{f'{field}__icontains': text})
+        return queryset.filter(matches).annotate(
+            search_score=ExpressionWrapper(
+                1.0 + votes_weight * Ln(F('votes_count') + 1.0), output_field=FloatField(),
+            )
+        ).order_by('-search_score', '-pk')
+    return backend.search(queryset, text).annotate(
+        age_days=RawSQL(backend.age_days_sql, [], output_field=FloatField()),
+    ).annotate(
+        search_score=ExpressionWrapper(
+            F('rank') * (1.0 + votes_weight * Ln(F('votes_count') + 1.0))
+            / (1.0 + F('age_days') / half_life),
+            output_field=FloatField(),
+        )
+    ).order_by('-search_score', '-pk')
+
+
+def highlight_ideas(ideas, text):
+    """Return ``{idea_id: {'title': ..., 'snippet': ...}}`` for ``ideas``."""
+    backend = get_search_backend()
+    if backend is None:
+        return {}
+    return backend.highlight([idea.pk for idea in ideas], text)
+
+
+def index_ideas(idea_ids):
+    backend = get_search_backend()
+    if backend and idea_ids:
+        backend.index(idea_ids)
+
+
+def unindex_ideas(idea_ids):
+    backend = get_search_backend()
+    if backend and idea_ids:
+        backend.remove(idea_ids)
+
+
+def ensure_search_schema():
+    backend = get_search_backend()
+    if backend:
+        backend.ensure_schema()
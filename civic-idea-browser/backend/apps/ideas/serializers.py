@@ -0,0 +1,187 @@
+"""
+Serializers for the ideas app.
+"""
+import re
+
+from django.conf import settings
+from rest_framework import serializers
+from apps.core.serializers import ImageVariantsField, ValuesSerializer
+from .models import Idea, IdeaAttachment, Vote, Comment, UploadSession
+from .threads import MAX_COMMENT_DEPTH
+
+
+class CompletedUploadField(serializers.PrimaryKeyRelatedField):
+    """
+    Write-only reference to one of the requesting user's completed upload
+    sessions; validates to the ``UploadSession``.
+    """
+    
+    def __init__(self, **kwargs):
+        kwargs.setdefault('write_only', True)
+        super().__init__(**kwargs)
+    
+    def get_queryset(self):
+        return UploadSession.objects.filter(
+            user=self.context['request'].user, status='complete', blob__isnull=False
+        ).select_related('blob')
+
+
+class IdeaSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Idea model.
+    
+    The image can be sent as a file or, for chunked uploads, as the id of a
+    completed upload session in ``image_upload``.
+    """
+    author = serializers.ReadOnlyField(source='author.username')
+    score = serializers.ReadOnlyField()
+    image_upload = CompletedUploadField(required=False)
+    image_variants = ImageVariantsField('idea')
+    
+    class Meta:
+        model = Idea
+        fields = [
+            'id', 'title', 'description', 'summary', 'author', 'status', 'priority',
+            'categories', 'tags', 'location', 'scope', 'estimated_cost',
+            'estimated_timeline', 'implementation_plan', 'image', 'image_upload', 'image_variants',
+            'views_count', 'votes_count', 'upvotes_count', 'downvotes_count', 'score',
+            'comments_count', 'created_at', 'updated_at', 'published_at'
+        ]
+        read_only_fields = [
+            'id', 'views_count', 'votes_count', 'upvotes_count', 'downvotes_count', 'comments_count',
+            'created_at', 'updated_at', 'published_at'
+        ]
+    
+    def validate(self, attrs):
+        upload = attrs.pop('image_upload', None)
+        if upload is not None:
+            if not upload.blob.content_type.startswith('image/'):
+                raise serializers.ValidationError({'image_upload': 'The upload is not an image.'})
+            attrs['image'] = upload.blob.file.name
+        return attrs
+
+
+class IdeaValuesSerializer(ValuesSerializer):
+    """
+    Fast-path ``IdeaSerializer`` for idea lists.
+    """
+    serializer_class = IdeaSerializer
+    computed = {
+        'score': (
+            ('upvotes_count', 'downvotes_count'),
+            lambda row: row['upvotes_count'] - row['downvotes_count'],
+        ),
+    }
+
+
+class IdeaSearchResultSerializer(IdeaSerializer):
+    """
+    Serializer for search results, adding the blended score and highlights.
+    """
+    search_score = serializers.FloatField(read_only=True)
+    highlight = serializers.SerializerMethodField()
+    
+    class Meta(IdeaSerializer.Meta):
+        fields = IdeaSerializer.Meta.fields + ['search_score', 'highlight']
+    
+    def get_highlight(self, obj):
+        return self.context.get('highlights', {}).get(obj.pk)
+
+
+class VoteSerializer(serializers.ModelSerializer):
+    """
+    Serializer for casting a vote on an idea.
+    """
+    
+    class Meta:
+        model = Vote
+        fields = ['vote_type']
+
+
+class CommentSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Comment model.
+    """
+    author = serializers.ReadOnlyField(source='author.username')
+    author_avatar = ImageVariantsField('avatar', source='author')
+    is_public = serializers.BooleanField(default=True)
+    
+    class Meta:
+        model = Comment
+        fields = [
+            'id', 'idea', 'author', 'author_avatar', 'parent', 'content', 'is_public', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'idea', 'created_at', 'updated_at']
+    
+    def validate_parent(self, parent):
+        idea = self.context.get('idea')
+        if parent is not None and idea is not None and parent.idea_id != idea.pk:
+            raise serializers.ValidationError("Parent comment belongs to another idea")
+        if parent is not None and parent.depth + 1 >= MAX_COMMENT_DEPTH:
+            raise serializers.ValidationError("Replies cannot be nested any deeper")
+        return parent
+
+
+class ThreadedCommentSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for comments in a thread; ``replies`` is filled in
+    by ``threads.nest_comments``.
+    """
+    author = serializers.ReadOnlyField(source='author.username')
+    author_avatar = ImageVariantsField('avatar', source='author')
+    
+    class Meta:
+        model = Comment
+        fields = ['id', 'author', 'author_avatar', 'parent', 'depth', 'content', 'is_public', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for starting and following a chunked upload.
+    """
+    chunk_size = serializers.SerializerMethodField()
+    file = serializers.FileField(source='blob.file', read_only=True, default=None)
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'filename', 'content_type', 'size', 'sha256', 'received', 'status', 'error',
+            'chunk_size', 'file', 'created_at'
+        ]
+        read_only_fields = ['id', 'received', 'status', 'error', 'created_at']
+    
+    def get_chunk_size(self, obj):
+        return settings.UPLOAD_CHUNK_MAX_SIZE
+    
+    def validate_size(self, value):
+        if not 0 < value <= settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f'Must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes.')
+        return value
+    
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and not re.fullmatch(r'[0-9a-f]{64}', value):
+            raise serializers.ValidationError('Must be a hex SHA-256 digest.')
+        return value
+
+
+class IdeaAttachmentSerializer(serializers.ModelSerializer):
+    """
+    Serializer for idea attachments created from completed uploads.
+    """
+    uploaded_by = serializers.ReadOnlyField(source='uploaded_by.username')
+    upload = CompletedUploadField()
+    
+    class Meta:
+        model = IdeaAttachment
+        fields = [
+            'id', 'idea', 'file', 'title', 'description', 'attachment_type', 'uploaded_by', 'uploaded_at',
+            'upload'
+        ]
+        read_only_fields = ['id', 'idea', 'file', 'uploaded_at']
+    
+    def create(self, validated_data):
+        upload = validated_data.pop('upload')
+        validated_data['file'] = upload.blob.file.name
+        return super().create(validated_data)
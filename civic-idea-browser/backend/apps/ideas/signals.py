@@ -0,0 +1,194 @@
+"""
+Signal handlers for the ideas app.
+"""
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete
+from django.dispatch import receiver
+from apps.categories.counters import adjust_ideas_count, adjust_idea_memberships
+from apps.core.images import schedule_variants
+from apps.notifications.fanout import idea_recipients, notify_recipients
+from .models import Idea, IdeaAttachment, Comment
+from .responsecache import schedule_version_bump
+from .search import INDEXED_FIELDS, ensure_search_schema, index_ideas, unindex_ideas
+from .trending import schedule_trending_update
+from .uploads import acquire_blob, release_blob
+
+TRENDING_FIELDS = {'status', 'published_at'}
+NOTIFIED_STATUSES = ('approved', 'rejected', 'implemented')
+BLOB_FIELDS = {Idea: 'image', IdeaAttachment: 'file'}
+
+
+@receiver(post_migrate)
+def create_search_schema(sender, app_config=None, **kwargs):
+    """Create the GIN index / FTS5 table once the ideas tables exist."""
+    if app_config is not None and app_config.label == 'ideas':
+        ensure_search_schema()
+
+
+@receiver(post_save, sender=Idea)
+def update_search_index(sender, instance, created, update_fields=None, **kwargs):
+    """Reindex an idea when it is created or its searchable text changes."""
+    if update_fields is not None and not set(update_fields) & set(INDEXED_FIELDS):
+        return
+    if created or set(instance.get_dirty_fields()) & set(INDEXED_FIELDS):
+        index_ideas([instance.pk])
+
+
+@receiver(post_delete, sender=Idea)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_ideas([instance.pk])
+
+
+@receiver(post_save, sender=Idea)
+def update_trending_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """Rescore an idea when it is created or moves between statuses."""
+    if created or set(update_fields or instance.get_dirty_fields()) & TRENDING_FIELDS:
+        schedule_trending_update([instance.pk])
+
+
+@receiver(m2m_changed, sender=Idea.categories.through)
+def update_trending_on_categories_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Move ideas between category segments when their categories change."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        schedule_trending_update([instance.pk])
+    elif pk_set:
+        schedule_trending_update(pk_set)
+
+
+@receiver(post_delete, sender=Idea)
+def remove_from_trending(sender, instance, **kwargs):
+    schedule_trending_update([instance.pk])
+
+
+@receiver(post_save, sender=Idea)
+@receiver(post_delete, sender=Idea)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    schedule_version_bump([instance.pk])
+
+
+@receiver(m2m_changed, sender=Idea.categories.through)
+@receiver(m2m_changed, sender=Idea.tags.through)
+def invalidate_cached_responses_on_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        schedule_version_bump([instance.pk])
+    elif pk_set:
+        schedule_version_bump(pk_set)
+
+
+@receiver(m2m_changed, sender=Idea.categories.through)
+@receiver(m2m_changed, sender=Idea.tags.through)
+def update_ideas_count_on_membership_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """
+    Keep ``ideas_count`` on categories and tags in step with the relation.
+    
+    Removals are counted before the rows go away, and only for links that
+    exist and belong to non-draft ideas.
+    """
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+    delta = 1 if action == 'post_add' else -1
+    target = type(instance) if reverse else model
+    column = target._meta.model_name
+    
+    if not reverse:
+        if instance.status == 'draft':
+            return
+        if action == 'post_add':
+            adjust_ideas_count(target, pk_set, delta)
+            return
+        links = sender.objects.filter(idea=instance)
+        if pk_set is not None:
+            links = links.filter(**{f'{column}_id__in': pk_set})
+        adjust_ideas_count(target, links.values_list(f'{column}_id', flat=True), delta)
+        return
+    
+    links = sender.objects.filter(**{column: instance}).exclude(idea__status='draft')
+    if pk_set is not None:
+        links = links.filter(idea_id__in=pk_set)
+    adjust_ideas_count(target, [instance.pk], delta * links.count())
+
+
+@receiver(post_save, sender=Idea)
+def update_ideas_count_on_status_change(sender, instance, created, **kwargs):
+    """Count or uncount an idea's categories and tags when it leaves or enters draft."""
+    if created or 'status' not in instance.get_dirty_fields():
+        return
+    was_draft = instance.get_loaded_value('status') == 'draft'
+    if was_draft != (instance.status == 'draft'):
+        adjust_idea_memberships(instance, 1 if was_draft else -1)
+
+
+@receiver(post_save, sender=Idea)
+def notify_status_change(sender, instance, created, **kwargs):
+    """Notify the author, collaborators and voters when an idea is decided."""
+    if created or 'status' not in instance.get_dirty_fields():
+        return
+    if instance.status not in NOTIFIED_STATUSES:
+        return
+    notify_recipients(
+        idea_recipients(instance),
+        f'idea_{instance.status}',
+        title=f'Idea {instance.get_status_display().lower()}: {instance.title}'[:200],
+        message=f'"{instance.title}" is now {instance.get_status_display().lower()}.',
+        content_object=instance,
+    )
+
+
+@receiver(pre_delete, sender=Idea)
+def update_ideas_count_on_delete(sender, instance, **kwargs):
+    # pre_delete: the relation rows are already gone by post_delete.
+    if instance.get_loaded_value('status', instance.status) != 'draft':
+        adjust_idea_memberships(instance, -1)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        Idea.objects.filter(pk=instance.idea_id).update(comments_count=F('comments_count') + 1)
+        schedule_trending_update([instance.idea_id])
+        schedule_version_bump([instance.idea_id])
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs):
+    Idea.objects.filter(pk=instance.idea_id, comments_count__gt=0).update(
+        comments_count=F('comments_count') - 1
+    )
+    schedule_trending_update([instance.idea_id])
+    schedule_version_bump([instance.idea_id])
+
+
+def _file_name(value):
+    return getattr(value, 'name', value)
+
+
+@receiver(post_save, sender=Idea)
+@receiver(post_save, sender=IdeaAttachment)
+def count_blob_references(sender, instance, created, **kwargs):
+    """Move a stored blob reference when an idea image or attachment file changes."""
+    field = BLOB_FIELDS[sender]
+    if created:
+        acquire_blob(_file_name(getattr(instance, field)))
+        return
+    dirty = instance.get_dirty_fields()
+    if field in dirty:
+        release_blob(_file_name(dirty[field]))
+        acquire_blob(_file_name(getattr(instance, field)))
+
+
+@receiver(post_delete, sender=Idea)
+@receiver(post_delete, sender=IdeaAttachment)
+def release_blob_reference(sender, instance, **kwargs):
+    release_blob(_file_name(getattr(instance, BLOB_FIELDS[sender])))
+
+
+@receiver(post_save, sender=Idea)
+def render_image_variants(sender, instance, update_fields=None, **kwargs):
+    """Queue thumbnails and WebP versions of a new image."""
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    schedule_variants('idea', instance.image.name, instance.image_variants)
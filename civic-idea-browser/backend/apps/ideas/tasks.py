@@ -0,0 +1,58 @@
+"""
+Celery tasks for the ideas app.
+"""
+import logging
+
+from celery import shared_task
+
+from .analytics import acquire_rollup_lock, release_rollup_lock, update_daily_rollups as _update_daily_rollups
+from .models import UploadSession
+from .uploads import assemble_upload as _assemble_upload
+from .viewcounts import flush_view_buffer
+from .trending import rebuild_trending_scores as _rebuild_trending_scores
+from .voting import fold_vote_counters as _fold_vote_counters
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def flush_idea_views():
+    """Write buffered idea views to the database."""
+    return flush_view_buffer()
+
+
+@shared_task(ignore_result=True)
+def fold_vote_counters():
+    """Fold sharded vote counter deltas into the idea counters."""
+    return _fold_vote_counters()
+
+
+@shared_task(ignore_result=True)
+def rebuild_trending_scores():
+    """Recompute the trending leaderboard from scratch to repair drift."""
+    return _rebuild_trending_scores()
+
+
+@shared_task(ignore_result=True)
+def update_daily_rollups():
+    """Fold new views, votes and comments into the daily engagement rollups."""
+    if not acquire_rollup_lock():
+        return None
+    try:
+        return _update_daily_rollups()
+    finally:
+        release_rollup_lock()
+
+
+@shared_task(ignore_result=True)
+def assemble_upload(session_id):
+    """Assemble a completed chunked upload into its stored blob."""
+    session = UploadSession.objects.filter(pk=session_id, status='assembling').first()
+    if session is None:
+        return
+    try:
+        _assemble_upload(session)
+    except Exception:
+        logger.exception('Assembling upload %s failed', session_id)
+        UploadSession.objects.filter(pk=session_id).update(status='failed', error='The upload could not be assembled.')
+        raise
@@ -0,0 +1,32 @@
+"""
+Tests for the daily engagement rollups.
+"""
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.ideas.analytics import get_watermark, update_daily_rollups
+from apps.ideas.models import IdeaDailyStats, Vote
+
+
+def age(vote, seconds):
+    Vote.objects.filter(pk=vote.pk).update(created_at=timezone.now() - timedelta(seconds=seconds))
+
+
+def test_rollup_stays_behind_recent_events(make_idea, make_user, settings):
+    settings.ANALYTICS_ROLLUP_DELAY = 60
+    idea = make_idea()
+    settled = Vote.objects.create(idea=idea, user=make_user(), vote_type='up')
+    recent = Vote.objects.create(idea=idea, user=make_user(), vote_type='down')
+    age(settled, 300)
+    
+    assert update_daily_rollups()['votes'] == 1
+    assert get_watermark('votes') == settled.pk
+    
+    age(recent, 300)
+    
+    assert update_daily_rollups()['votes'] == 1
+    assert get_watermark('votes') == recent.pk
+    totals = IdeaDailyStats.objects.filter(idea=idea).aggregate(up=Sum('upvotes'), down=Sum('downvotes'))
+    assert totals == {'up': 1, 'down': 1}
@@ -0,0 +1,24 @@
+"""
+Tests for the ideas management commands.
+"""
+import pytest
+from django.core.management import CommandError, call_command
+
+from apps.ideas.models import IdeaDailyStats, Vote
+
+
+@pytest.mark.django_db
+def test_backfill_daily_rollups_refuses_parallel_workers_on_sqlite():
+    with pytest.raises(CommandError, match='--workers 1'):
+        call_command('backfill_daily_rollups', workers=4)
+
+
+def test_backfill_daily_rollups_runs_in_one_process_by_default(make_idea, user, settings):
+    settings.ANALYTICS_ROLLUP_DELAY = 0
+    idea = make_idea()
+    Vote.objects.create(idea=idea, user=user, vote_type='up')
+    IdeaDailyStats.objects.all().delete()
+    
+    call_command('backfill_daily_rollups')
+    
+    assert IdeaDailyStats.objects.get(idea=idea).upvotes == 1
@@ -0,0 +1,138 @@
+"""
+Tests for the streaming CSV, JSON Lines and Parquet exports.
+"""
+import csv
+import importlib.util
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+
+from apps.categories.models import Category, Tag
+from apps.ideas.bulkimport import READERS, IdeaImporter
+from apps.ideas.export import get_export
+from apps.ideas.models import Comment, Idea, IdeaCollaborator
+from apps.ideas.voting import cast_vote
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+@pytest.fixture
+def admin_client(api_client, make_user):
+    api_client.force_authenticate(make_user('admin', is_staff=True))
+    return api_client
+
+
+@pytest.fixture
+def ideas(make_idea, make_user):
+    parks = Category.objects.create(name='Parks', slug='parks')
+    transit = Category.objects.create(name='Transit', slug='transit')
+    trees = Tag.objects.create(name='Trees', slug='trees')
+    bob = make_user('bob')
+    
+    planted = make_idea(
+        title='Plant more trees', summary='Shade, "please"', description='Line one\nline two, with commas',
+        estimated_cost=Decimal('1250.50'), location='Main St',
+    )
+    planted.categories.add(parks, transit)
+    planted.tags.add(trees)
+    IdeaCollaborator.objects.create(idea=planted, user=bob)
+    cast_vote(planted, bob, 'up')
+    Comment.objects.create(idea=planted, author=bob, content='Yes — and benches.')
+    
+    bare = make_idea(title='Longer library hours', status='draft')
+    return [planted, bare]
+
+
+def download(client, dataset, fmt):
+    response = client.get(reverse('ideas:export', args=[dataset, fmt]))
+    assert response.status_code == 200
+    assert response['Content-Disposition'].startswith(f'attachment; filename="{dataset}-')
+    return b''.join(response.streaming_content)
+
+
+def test_csv_and_jsonl_hold_the_same_rows(admin_client, ideas):
+    from_csv = list(csv.DictReader(io.StringIO(download(admin_client, 'ideas', 'csv').decode())))
+    from_jsonl = [json.loads(line) for line in download(admin_client, 'ideas', 'jsonl').decode().splitlines()]
+    
+    assert [row['id'] for row in from_csv] == [str(idea.pk) for idea in ideas]
+    planted_csv, planted_jsonl = from_csv[0], from_jsonl[0]
+    assert planted_csv['description'] == planted_jsonl['description'] == 'Line one\nline two, with commas'
+    assert planted_csv['categories'] == 'parks|transit' and planted_jsonl['categories'] == ['parks', 'transit']
+    assert planted_jsonl['tags'] == ['trees'] and planted_jsonl['collaborators'] == ['bob']
+    assert planted_csv['estimated_cost'] == planted_jsonl['estimated_cost'] == '1250.50'
+    assert planted_jsonl['upvotes_count'] == 1 and planted_csv['upvotes_count'] == '1'
+    assert from_csv[1]['estimated_cost'] == '' and from_jsonl[1]['estimated_cost'] is None
+    assert from_csv[1]['categories'] == '' and from_jsonl[1]['categories'] == []
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'jsonl'])
+def test_export_imports_back_unchanged(admin_client, ideas, fmt):
+    data = download(admin_client, 'ideas', fmt).decode()
+    
+    importer = IdeaImporter(id_column='id', source='copy')
+    stats = importer.run(READERS[fmt](io.StringIO(data, newline='')))
+    
+    assert (stats.created, stats.invalid, dict(stats.missing)) == (2, 0, {})
+    fields = ('title', 'summary', 'description', 'status', 'estimated_cost', 'location', 'author_id', 'created_at')
+    for original in ideas:
+        copy = Idea.objects.get(external_id=f'copy:{original.pk}')
+        assert [getattr(copy, name) for name in fields] == [getattr(original, name) for name in fields]
+        for relation in ('categories', 'tags', 'collaborators'):
+            assert set(getattr(copy, relation).all()) == set(getattr(original, relation).all())
+
+
+def test_votes_and_comments_export(admin_client, ideas):
+    votes = [json.loads(line) for line in download(admin_client, 'votes', 'jsonl').decode().splitlines()]
+    comments = list(csv.DictReader(io.StringIO(download(admin_client, 'comments', 'csv').decode())))
+    
+    assert [(vote['idea_id'], vote['vote_type']) for vote in votes] == [(ideas[0].pk, 'up')]
+    assert [(row['idea_id'], row['content'], row['is_public']) for row in comments] == [
+        (str(ideas[0].pk), 'Yes — and benches.', 'True')
+    ]
+
+
+def test_export_reads_relations_per_chunk(ideas, make_idea, django_assert_num_queries):
+    for _ in range(3):
+        make_idea()
+    export = get_export('ideas', 'jsonl', chunk_size=2)
+    
+    # One values query read through a cursor, and three relation queries per chunk of two.
+    with django_assert_num_queries(1 + 3 * 3):
+        rows = [row for chunk in export.chunks() for row in chunk]
+    
+    assert export.rows == len(rows) == 5
+
+
+def test_exports_are_admin_only(api_client, user, db):
+    url = reverse('ideas:export', args=['ideas', 'csv'])
+    
+    assert api_client.get(url).status_code in (401, 403)
+    api_client.force_authenticate(user)
+    assert api_client.get(url).status_code == 403
+
+
+@pytest.mark.parametrize('dataset, fmt', [('users', 'csv'), ('ideas', 'xlsx')])
+def test_unknown_exports_404(admin_client, dataset, fmt):
+    assert admin_client.get(reverse('ideas:export', args=[dataset, fmt])).status_code == 404
+
+
+@pytest.mark.skipif(HAS_PYARROW, reason='pyarrow is installed')
+def test_parquet_without_pyarrow_404s(admin_client):
+    response = admin_client.get(reverse('ideas:export', args=['ideas', 'parquet']))
+    
+    assert response.status_code == 404
+    assert 'pyarrow' in response.data['detail']
+
+
+@pytest.mark.skipif(not HAS_PYARROW, reason='needs pyarrow')
+def test_parquet_round_trip(admin_client, ideas):
+    import pyarrow.parquet as pq
+    
+    table = pq.read_table(io.BytesIO(download(admin_client, 'ideas', 'parquet')))
+    
+    rows = table.to_pylist()
+    assert [row['id'] for row in rows] == [idea.pk for idea in ideas]
+    assert rows[0]['categories'] == ['parks', 'transit'] and rows[0]['estimated_cost'] == Decimal('1250.50')
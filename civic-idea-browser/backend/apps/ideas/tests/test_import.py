@@ -0,0 +1,220 @@
+"""
+Tests for the bulk idea import and the import_ideas command.
+"""
+import io
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from apps.categories.models import Category, Tag
+from apps.ideas.bulkimport import IdeaImporter, read_csv, read_jsonl
+from apps.ideas.models import Idea, IdeaCollaborator, Vote
+
+
+@pytest.fixture
+def people(make_user):
+    return {name: make_user(name, email=f'{name}@example.com') for name in ('alice', 'bob', 'carol')}
+
+
+@pytest.fixture
+def parks(db):
+    return Category.objects.create(name='Parks', slug='parks')
+
+
+def rows(count=4):
+    return [
+        {
+            'external_id': str(number),
+            'title': f'Idea {number}',
+            'author': 'alice',
+            'categories': ['parks'],
+            'tags': ['Trees'],
+            'collaborators': ['bob'],
+            'votes': ['bob:up', {'user': 'carol@example.com', 'vote_type': 'down'}],
+        }
+        for number in range(1, count + 1)
+    ]
+
+
+def run(data, **kwargs):
+    importer = IdeaImporter(**kwargs)
+    stats = importer.run(data)
+    importer.finish()
+    return stats
+
+
+def table_counts():
+    return (
+        Idea.objects.count(), Idea.categories.through.objects.count(), Idea.tags.through.objects.count(),
+        IdeaCollaborator.objects.count(), Vote.objects.count(), Tag.objects.count(),
+    )
+
+
+def test_import_creates_ideas_with_links_and_counters(people, parks):
+    stats = run(rows(), source='old')
+    
+    assert (stats.read, stats.created, stats.existing, stats.invalid) == (4, 4, 0, 0)
+    assert dict(stats.links) == {'categories': 4, 'tags': 4, 'collaborators': 4, 'votes': 8}
+    idea = Idea.objects.get(external_id='old:1')
+    assert idea.author == people['alice'] and idea.status == 'submitted' and idea.published_at is not None
+    assert (idea.votes_count, idea.upvotes_count, idea.downvotes_count) == (2, 1, 1)
+    assert [tag.slug for tag in idea.tags.all()] == ['trees']
+    parks.refresh_from_db()
+    assert parks.ideas_count == 4 and Tag.objects.get(slug='trees').ideas_count == 4
+
+
+@pytest.mark.parametrize('batch_size', [1000, 3])
+def test_rerun_is_idempotent(people, parks, batch_size):
+    run(rows(), batch_size=batch_size)
+    before = table_counts()
+    
+    stats = run(rows(), batch_size=batch_size)
+    
+    assert (stats.read, stats.created, stats.existing, stats.invalid) == (4, 0, 4, 0)
+    assert not stats.links and not stats.missing
+    assert table_counts() == before
+
+
+def test_rerun_after_partial_import_adds_only_the_rest(people, parks):
+    run(rows(2))
+    
+    stats = run(rows(5), batch_size=2)
+    
+    assert (stats.created, stats.existing) == (3, 2)
+    assert sorted(Idea.objects.values_list('external_id', flat=True)) == ['1', '2', '3', '4', '5']
+    assert Vote.objects.count() == 10
+
+
+def test_sources_keep_external_ids_apart(people, parks):
+    run(rows(2), source='north')
+    
+    stats = run(rows(2), source='south')
+    
+    assert stats.created == 2 and Idea.objects.count() == 4
+
+
+def test_invalid_rows_are_counted_and_reported(people):
+    data = [
+        {'external_id': '1', 'title': 'Fine', 'author': 'alice'},
+        {'title': 'No id', 'author': 'alice'},
+        {'external_id': '1', 'title': 'Same id', 'author': 'alice'},
+        {'external_id': '2', 'title': '', 'author': 'alice'},
+        {'external_id': '3', 'title': 'Who?', 'author': 'mallory'},
+        {'external_id': '4', 'title': 'Odd', 'author': 'alice', 'status': 'shelved'},
+        {'external_id': '5', 'title': 'Odd', 'author': 'alice', 'priority': 'urgent'},
+        {'external_id': '6', 'title': 'Costly', 'author': 'alice', 'estimated_cost': 'a lot'},
+        {'external_id': '7', 'title': 'Late', 'author': 'alice', 'created_at': 'yesterday'},
+        {'external_id': '8', 'title': 'Also fine', 'author': 'bob@example.com'},
+    ]
+    
+    stats = run(data, batch_size=4)
+    
+    assert (stats.read, stats.created, stats.invalid) == (10, 2, 8)
+    assert stats.errors == [
+        'row 2: external_id is missing',
+        "row 3: duplicate external id '1'",
+        'row 4: title is missing',
+        "row 5: unknown author 'mallory'",
+        "row 6: unknown status 'shelved'",
+        "row 7: unknown priority 'urgent'",
+        "row 8: estimated_cost is not a number: 'a lot'",
+        "row 9: created_at is not a date and time: 'yesterday'",
+    ]
+    assert sorted(Idea.objects.values_list('title', flat=True)) == ['Also fine', 'Fine']
+
+
+def test_reported_errors_are_capped(people, monkeypatch):
+    monkeypatch.setattr('apps.ideas.bulkimport.MAX_ERRORS', 2)
+    
+    stats = run([{'external_id': str(number), 'author': 'alice'} for number in range(5)])
+    
+    assert stats.invalid == 5 and len(stats.errors) == 2
+
+
+def test_default_author_takes_unknown_authors(people):
+    stats = run([{'external_id': '1', 'title': 'Who?', 'author': 'mallory'}], default_author='CAROL@example.com')
+    
+    assert stats.created == 1 and Idea.objects.get().author == people['carol']
+    with pytest.raises(ValueError, match='mallory'):
+        IdeaImporter(default_author='mallory')
+
+
+def test_missing_lookups_are_counted_and_left_out(people, parks):
+    data = [{
+        'external_id': '1',
+        'title': 'Half known',
+        'author': 'alice',
+        'categories': ['parks', 'harbours', 'Parks'],
+        'tags': ['Trees', 'benches'],
+        'collaborators': ['bob', 'mallory', 'alice'],
+        'votes': ['bob:up', 'mallory:up', 'carol:sideways', 'carol'],
+    }]
+    Tag.objects.create(name='Trees', slug='trees')
+    
+    stats = run(data, create_tags=False)
+    
+    assert stats.created == 1
+    assert dict(stats.missing) == {'categories': 1, 'tags': 1, 'collaborators': 1, 'voters': 3}
+    assert dict(stats.links) == {'categories': 1, 'tags': 1, 'collaborators': 1, 'votes': 1}
+    idea = Idea.objects.get()
+    assert list(idea.categories.all()) == [parks]
+    assert list(idea.collaborators.all()) == [people['bob']]
+    assert idea.votes_count == 1 and not Tag.objects.filter(slug='benches').exists()
+
+
+def test_new_tags_are_created_once(people):
+    data = [
+        {'external_id': '1', 'title': 'One', 'author': 'alice', 'tags': ['Street Art', 'murals']},
+        {'external_id': '2', 'title': 'Two', 'author': 'alice', 'tags': ['street art']},
+    ]
+    
+    stats = run(data)
+    
+    assert not stats.missing
+    assert sorted(Tag.objects.values_list('slug', 'ideas_count')) == [('murals', 1), ('street-art', 2)]
+
+
+def test_readers_parse_lists_and_bad_lines(people, parks):
+    csv_data = 'external_id,title,author,categories,votes\r\n1,From CSV,alice,parks,bob:up|carol:down\r\n'
+    jsonl_data = '\n'.join([
+        json.dumps({'external_id': '2', 'title': 'From JSON', 'author': 'alice', 'categories': ['parks']}),
+        '{not json',
+        '["a list"]',
+        '',
+    ])
+    
+    stats = run([*read_csv(io.StringIO(csv_data, newline='')), *read_jsonl(io.StringIO(jsonl_data))])
+    
+    assert (stats.read, stats.created, stats.invalid) == (4, 2, 2)
+    assert stats.errors[0].startswith('row 3: line 2: ') and stats.errors[1] == 'row 4: line 3: not an object'
+    assert Idea.objects.get(title='From CSV').votes_count == 2
+    assert parks.ideas.count() == 2
+
+
+def test_import_ideas_command_reports_counts(people, parks, tmp_path):
+    path = tmp_path / 'ideas.jsonl'
+    data = rows(2) + [{'external_id': '3', 'title': 'Who?', 'author': 'mallory'}]
+    data[0]['categories'].append('harbours')
+    path.write_text(''.join(json.dumps(row) + '\n' for row in data))
+    
+    first, second = io.StringIO(), io.StringIO()
+    call_command('import_ideas', str(path), source='old', stdout=first)
+    call_command('import_ideas', str(path), source='old', stdout=second)
+    
+    assert "row 3: unknown author 'mallory'" in first.getvalue()
+    assert 'Unknown references left out: 1 categories' in first.getvalue()
+    assert 'Imported 2 ideas (2 categories, 2 collaborators, 2 tags, 4 votes) from 3 rows: ' \
+        '0 already imported, 1 invalid' in first.getvalue()
+    assert 'Imported 0 ideas (no links) from 3 rows: 2 already imported, 1 invalid' in second.getvalue()
+    assert Idea.objects.count() == 2
+
+
+def test_import_ideas_command_needs_a_known_format(db, tmp_path):
+    path = tmp_path / 'ideas.txt'
+    path.write_text('')
+    
+    with pytest.raises(CommandError, match='--format'):
+        call_command('import_ideas', str(path))
+    with pytest.raises(CommandError, match='mallory'):
+        call_command('import_ideas', str(path), format='csv', default_author='mallory')
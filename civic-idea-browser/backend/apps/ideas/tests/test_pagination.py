@@ -0,0 +1,78 @@
+"""
+Tests for cursor pagination of the idea feed.
+"""
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.ideas.models import Idea
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(settings):
+    settings.IDEA_RESPONSE_CACHE_TIMEOUT = 0
+
+
+@pytest.fixture(params=[True, False], ids=['fast', 'drf'])
+def fast_serializers(request, settings):
+    settings.FAST_SERIALIZERS_ENABLED = request.param
+
+
+@pytest.fixture
+def make_dated_idea(make_idea):
+    start = timezone.now() - timedelta(days=1)
+    
+    def make(minutes):
+        idea = make_idea(title=f'Idea {minutes}')
+        Idea.objects.filter(pk=idea.pk).update(created_at=start + timedelta(minutes=minutes))
+        return idea
+    return make
+
+
+def get_page(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return [result['id'] for result in response.data['results']], response.data['next']
+
+
+def test_cursor_pages_are_stable_under_inserts(api_client, make_dated_idea, fast_serializers):
+    ideas = [make_dated_idea(minutes) for minutes in range(10)]
+    newest_first = [idea.pk for idea in reversed(ideas)]
+    
+    first, next_url = get_page(api_client, reverse('ideas:idea_list') + '?page_size=4')
+    assert first == newest_first[:4]
+    
+    # New ideas arrive at the head of the feed while the client reads on.
+    for minutes in range(10, 13):
+        make_dated_idea(minutes)
+    
+    second, next_url = get_page(api_client, next_url)
+    third, next_url = get_page(api_client, next_url)
+    assert second == newest_first[4:8]
+    assert third == newest_first[8:]
+    assert next_url is None
+
+
+def test_cursor_pages_split_ties_on_created_at(api_client, make_idea, fast_serializers):
+    ideas = [make_idea() for _ in range(5)]
+    Idea.objects.update(created_at=timezone.now())
+    
+    seen = []
+    url = reverse('ideas:idea_list') + '?page_size=2'
+    while url:
+        page, url = get_page(api_client, url)
+        seen.extend(page)
+    
+    assert sorted(seen) == sorted(idea.pk for idea in ideas)
+
+
+@pytest.mark.parametrize('cursor', ['bogus', 'cD0yMDI0', 'bz0tMQ=='])
+def test_bad_cursor_is_rejected(api_client, make_idea, cursor):
+    make_idea()
+    
+    response = api_client.get(reverse('ideas:idea_list'), {'cursor': cursor})
+    
+    assert response.status_code == 404
+    assert 'Invalid cursor' in str(response.data['detail'])
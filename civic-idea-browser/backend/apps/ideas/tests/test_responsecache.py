@@ -0,0 +1,127 @@
+"""
+Tests for the versioned idea response cache.
+"""
+import pytest
+from django.urls import reverse
+
+from apps.ideas import responsecache
+from apps.ideas.voting import cast_vote
+
+LIST_URL = reverse('ideas:idea_list')
+
+
+@pytest.fixture
+def idea(make_idea):
+    return make_idea()
+
+
+def detail_url(idea):
+    return reverse('ideas:idea_detail', args=[idea.pk])
+
+
+def cache_status(client, url, **params):
+    response = client.get(url, params)
+    assert response.status_code == 200
+    return response.get('X-Cache')
+
+
+def test_version_bumps_change_the_keys(idea, make_idea, rf):
+    other = make_idea()
+    request = rf.get(LIST_URL)
+    list_key = responsecache.list_cache_key(request)
+    detail_key = responsecache.detail_cache_key(idea.pk)
+    other_key = responsecache.detail_cache_key(other.pk)
+    
+    responsecache.bump_versions([idea.pk], listing=False)
+    assert responsecache.list_cache_key(request) == list_key
+    assert responsecache.detail_cache_key(idea.pk) != detail_key
+    assert responsecache.detail_cache_key(other.pk) == other_key
+    
+    responsecache.bump_versions()
+    assert responsecache.list_cache_key(request) != list_key
+    assert responsecache.list_cache_key(rf.get(LIST_URL, {'status': 'approved'})) != list_key
+
+
+def test_responses_miss_then_hit(api_client, idea):
+    assert cache_status(api_client, LIST_URL) == 'MISS'
+    assert cache_status(api_client, LIST_URL) == 'HIT'
+    assert cache_status(api_client, LIST_URL, status='submitted') == 'MISS'
+    assert cache_status(api_client, detail_url(idea)) == 'MISS'
+    assert cache_status(api_client, detail_url(idea)) == 'HIT'
+    
+    stats = responsecache.get_cache_stats()
+    assert stats['list'] == {'enabled': True, 'hits': 1, 'misses': 2, 'hit_rate': 0.3333}
+    assert stats['detail'] == {'enabled': True, 'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_saving_an_idea_misses_the_next_read(api_client, idea, make_idea, django_capture_on_commit_callbacks):
+    other = make_idea()
+    for url in (LIST_URL, detail_url(idea), detail_url(other)):
+        cache_status(api_client, url)
+    
+    with django_capture_on_commit_callbacks(execute=True):
+        idea.title = 'Plant more oaks'
+        idea.save()
+    
+    assert cache_status(api_client, LIST_URL) == 'MISS'
+    response = api_client.get(detail_url(idea))
+    assert response['X-Cache'] == 'MISS'
+    assert response.data['title'] == 'Plant more oaks'
+    assert cache_status(api_client, detail_url(other)) == 'HIT'
+
+
+def test_voting_misses_the_next_read(api_client, idea, make_user, django_capture_on_commit_callbacks):
+    for url in (LIST_URL, detail_url(idea)):
+        cache_status(api_client, url)
+    
+    with django_capture_on_commit_callbacks(execute=True):
+        cast_vote(idea, make_user('voter'), 'up')
+    
+    assert cache_status(api_client, LIST_URL) == 'MISS'
+    response = api_client.get(detail_url(idea))
+    assert response['X-Cache'] == 'MISS'
+    assert response.data['upvotes_count'] == 1
+
+
+def test_cached_pages_carry_each_users_own_vote(api_client, idea, make_user, django_capture_on_commit_callbacks):
+    voter, other = make_user('voter'), make_user('other')
+    with django_capture_on_commit_callbacks(execute=True):
+        cast_vote(idea, voter, 'down')
+    
+    api_client.force_authenticate(voter)
+    assert api_client.get(detail_url(idea)).data['user_vote'] == 'down'
+    api_client.force_authenticate(other)
+    response = api_client.get(detail_url(idea))
+    
+    assert response['X-Cache'] == 'HIT'
+    assert response.data['user_vote'] is None
+
+
+def test_signed_in_lists_are_shared_only_without_own_drafts(api_client, user, make_idea, make_user, django_assert_num_queries):
+    draft = make_idea(status='draft')
+    api_client.force_authenticate(user)
+    
+    with django_assert_num_queries(4):  # page, categories, tags, votes; no draft check
+        response = api_client.get(LIST_URL)
+    assert 'X-Cache' not in response
+    assert draft.pk in [result['id'] for result in response.data['results']]
+    
+    assert cache_status(api_client, LIST_URL, status='submitted') == 'MISS'
+    assert cache_status(api_client, LIST_URL, author=make_user('bob').pk) == 'MISS'
+    assert cache_status(api_client, LIST_URL, status='draft') is None
+    assert cache_status(api_client, LIST_URL, author=user.pk) is None
+    
+    api_client.force_authenticate(None)
+    assert draft.pk not in [result['id'] for result in api_client.get(LIST_URL).data['results']]
+
+
+def test_endpoints_can_be_switched_off(api_client, idea, settings):
+    settings.IDEA_RESPONSE_CACHE_DISABLED = ['detail']
+    
+    assert cache_status(api_client, detail_url(idea)) is None
+    assert cache_status(api_client, LIST_URL) == 'MISS'
+    assert responsecache.get_cache_stats()['detail']['enabled'] is False
+    
+    settings.IDEA_RESPONSE_CACHE_TIMEOUT = 0
+    assert cache_status(api_client, LIST_URL) is None
+    assert responsecache.get_cache_stats()['list']['enabled'] is False
@@ -0,0 +1,73 @@
+"""
+Tests for the idea view retention policy.
+"""
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from apps.core import partitions
+from apps.ideas import retention
+from apps.ideas.models import IdeaView, RollupWatermark
+from apps.ideas.retention import IdeaViewRetention
+
+
+@pytest.fixture
+def views(make_idea, settings, monkeypatch):
+    """Three views 40, 45 and 50 days old, only the first of them rolled up."""
+    settings.RETENTION_IDEA_VIEWS_DAYS = 30
+    # The rollup is behind: it does not get past the first view this run.
+    monkeypatch.setattr(retention, 'update_daily_rollups', lambda: {})
+    idea = make_idea()
+    now = timezone.now()
+    rows = [IdeaView.objects.create(idea=idea, viewed_at=now - timedelta(days=age)) for age in (40, 45, 50)]
+    RollupWatermark.objects.create(source='views', last_id=rows[0].pk)
+    return rows
+
+
+@pytest.fixture
+def monthly_partitions(monkeypatch):
+    """
+    Stand-in for a PostgreSQL partitioned table: one partition per 30 days,
+    and dropping one deletes its rows without signals.
+    """
+    def drop_partition(name):
+        lower, upper = bounds[name]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM "{IdeaView._meta.db_table}" WHERE "viewed_at" >= %s AND "viewed_at" < %s',
+                [lower, upper],
+            )
+    
+    end = timezone.now() - timedelta(days=35)
+    bounds = {'older': (end - timedelta(days=60), end - timedelta(days=30)), 'old': (end - timedelta(days=30), end)}
+    monkeypatch.setattr(partitions, 'is_partitioned', lambda table: True)
+    monkeypatch.setattr(partitions, 'list_partitions', lambda table: [
+        (name, lower, upper) for name, (lower, upper) in sorted(bounds.items(), key=lambda item: item[1])
+    ])
+    monkeypatch.setattr(partitions, 'drop_partition', drop_partition)
+
+
+def test_only_rolled_up_views_are_deleted(views):
+    stats = IdeaViewRetention().apply()
+    
+    assert stats == {'deleted': 1, 'partitions_dropped': 0}
+    assert set(IdeaView.objects.values_list('pk', flat=True)) == {views[1].pk, views[2].pk}
+
+
+def test_partitions_holding_views_above_the_watermark_are_kept(views, monthly_partitions):
+    stats = IdeaViewRetention().apply()
+    
+    # 'older' has nothing to keep; 'old' still holds the unrolled views.
+    assert stats == {'deleted': 1, 'partitions_dropped': 1}
+    assert set(IdeaView.objects.values_list('pk', flat=True)) == {views[1].pk, views[2].pk}
+
+
+def test_partitions_are_dropped_once_rolled_up(views, monthly_partitions):
+    RollupWatermark.objects.filter(source='views').update(last_id=views[-1].pk)
+    
+    stats = IdeaViewRetention().apply()
+    
+    assert stats == {'deleted': 0, 'partitions_dropped': 2}
+    assert not IdeaView.objects.exists()
@@ -0,0 +1,37 @@
+"""
+Tests for idea search.
+"""
+import pytest
+from django.urls import reverse
+
+from apps.ideas import search
+
+
+@pytest.fixture
+def ideas(make_idea):
+    return [
+        make_idea(title='Plant more trees', votes_count=1),
+        make_idea(title='More bike lanes', description='Protected lanes with trees.', votes_count=5),
+        make_idea(title='Longer library hours', description='Open on Sundays.'),
+    ]
+
+
+def test_search_ranks_full_text_matches(api_client, ideas):
+    response = api_client.get(reverse('ideas:idea_search'), {'q': 'trees'})
+    
+    assert response.status_code == 200
+    results = response.data['results']
+    assert {result['id'] for result in results} == {ideas[0].pk, ideas[1].pk}
+    highlights = [result['highlight'] for result in results]
+    assert all('<mark>' in highlight['title'] + highlight['snippet'] for highlight in highlights)
+
+
+def test_search_without_backend_falls_back_to_substring_match(api_client, ideas, monkeypatch):
+    monkeypatch.setattr(search, 'get_search_backend', lambda: None)
+    
+    response = api_client.get(reverse('ideas:idea_search'), {'q': 'TREES'})
+    
+    assert response.status_code == 200
+    results = response.data['results']
+    assert [result['id'] for result in results] == [ideas[1].pk, ideas[0].pk]
+    assert all(result['highlight'] is None for result in results)
@@ -0,0 +1,121 @@
+"""
+Tests for threaded comment loading on a large thread.
+"""
+import pytest
+from django.urls import reverse
+
+from apps.ideas.models import Comment
+from apps.ideas.threads import comment_path, rebuild_comment_paths
+
+REPLIES = 100
+NESTED_REPLIES = 99
+
+
+def thread_rows(idea):
+    return {
+        pk: (root_id, depth, path)
+        for pk, root_id, depth, path in Comment.objects.filter(idea=idea).values_list('pk', 'root_id', 'depth', 'path')
+    }
+
+
+def count_nested(node):
+    return 1 + sum(count_nested(reply) for reply in node['replies'])
+
+
+@pytest.fixture
+def make_thread(make_idea, user):
+    """
+    Insert a comment tree for a new idea: ``shape`` lists how many replies
+    each comment of the previous level gets, starting with the number of
+    top-level comments; with ``first_root_only`` only the first of those
+    gets replies. Ids are assigned up front so ``root``, ``depth`` and
+    ``path`` can be written in the same insert.
+    """
+    def make(shape, first_root_only=False):
+        idea = make_idea()
+        next_id = (Comment.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+        levels, parents = [], [None]
+        for depth, per_parent in enumerate(shape):
+            level = []
+            for parent in parents:
+                for _ in range(per_parent):
+                    path = comment_path(parent.path if parent else '', next_id)
+                    level.append(Comment(
+                        pk=next_id, idea=idea, author=user, parent=parent, content='Agreed.',
+                        root_id=parent.root_id if parent else next_id, depth=depth, path=path,
+                    ))
+                    next_id += 1
+            levels.append(level)
+            parents = level[:1] if first_root_only and depth == 0 else level
+        Comment.objects.bulk_create([comment for level in levels for comment in level], batch_size=2000)
+        return idea, levels
+    return make
+
+
+@pytest.fixture
+def big_thread(make_thread):
+    """
+    Ten top-level comments, the first with 100 replies of 99 replies each:
+    10,001 comments in one thread.
+    """
+    idea, (roots, replies, _) = make_thread([10, REPLIES, NESTED_REPLIES], first_root_only=True)
+    return idea, roots, replies
+
+
+def test_rebuild_comment_paths_sets_root_path_and_depth(make_thread):
+    idea, levels = make_thread([3, 2, 2, 2, 2])
+    expected = thread_rows(idea)
+    assert max(depth for _, depth, _ in expected.values()) == 4
+    Comment.objects.filter(idea=idea).update(root=None, depth=0, path='')
+    
+    assert rebuild_comment_paths(Comment.objects.filter(pk=levels[-1][0].pk), batch_size=50) == len(expected)
+    assert thread_rows(idea) == expected
+    
+    # New replies get the same values on insert.
+    parent = levels[-1][-1]
+    reply = Comment.objects.create(idea=idea, author=parent.author, parent=parent, content='Yes.')
+    assert thread_rows(idea)[reply.pk] == (parent.root_id, 5, f'{parent.path}{reply.pk:010d}/')
+
+
+def test_threads_page_runs_constant_queries(api_client, big_thread, django_assert_num_queries):
+    idea, roots, replies = big_thread
+    
+    with django_assert_num_queries(3):  # idea, roots, first replies
+        response = api_client.get(reverse('ideas:idea_comment_threads', args=[idea.pk]), {'replies': 3})
+    
+    assert response.status_code == 200
+    threads = response.data['results']
+    assert [thread['id'] for thread in threads] == [root.pk for root in roots]
+    first = threads[0]
+    assert [reply['id'] for reply in first['replies']] == [replies[0].pk]
+    assert [reply['depth'] for reply in first['replies'][0]['replies']] == [2, 2]
+    assert first['more_replies'] is not None
+    assert all(count_nested(thread) == 1 and thread['more_replies'] is None for thread in threads[1:])
+
+
+def test_more_replies_continue_the_thread(api_client, big_thread, django_assert_num_queries):
+    idea, roots, replies = big_thread
+    threads = api_client.get(reverse('ideas:idea_comment_threads', args=[idea.pk]), {'replies': 3}).data
+    shown = threads['results'][0]['replies'][0]['replies']
+    
+    with django_assert_num_queries(2):  # the comment and one page
+        response = api_client.get(threads['results'][0]['more_replies'])
+    
+    assert response.status_code == 200
+    page = response.data['results']
+    assert len(page) == 10
+    assert page[0]['id'] == shown[-1]['id'] + 1
+    assert {row['parent'] for row in page} == {replies[0].pk}
+
+
+def test_whole_thread_runs_constant_queries(api_client, big_thread, django_assert_num_queries):
+    idea, roots, replies = big_thread
+    deep_reply = Comment.objects.filter(parent=replies[-1]).last()
+    
+    with django_assert_num_queries(2):  # the comment and the thread
+        response = api_client.get(reverse('ideas:comment_thread', args=[deep_reply.pk]))
+    
+    assert response.status_code == 200
+    assert response.data['id'] == roots[0].pk
+    assert len(response.data['replies']) == REPLIES
+    assert count_nested(response.data) == 1 + REPLIES * (1 + NESTED_REPLIES)
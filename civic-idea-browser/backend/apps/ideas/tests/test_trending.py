@@ -0,0 +1,103 @@
+"""
+Tests for the trending leaderboard.
+"""
+from datetime import timedelta
+
+import fakeredis
+import pytest
+from django.urls import reverse
+
+from apps.ideas import trending
+from apps.ideas.models import Idea
+
+
+@pytest.fixture(params=['database', 'redis'])
+def store(request, monkeypatch):
+    client = fakeredis.FakeRedis() if request.param == 'redis' else None
+    monkeypatch.setattr(trending, 'get_redis_connection', lambda: client)
+    return request.param
+
+
+@pytest.fixture
+def now():
+    return trending.EPOCH + timedelta(days=100)
+
+
+def publish(make_idea, published_at, **counts):
+    idea = make_idea()
+    Idea.objects.filter(pk=idea.pk).update(published_at=published_at, **counts)
+    return idea
+
+
+def trending_ids(client, **params):
+    response = client.get(reverse('ideas:idea_trending'), params)
+    assert response.status_code == 200
+    return [result['id'] for result in response.data['results']]
+
+
+def test_hot_score_grows_with_engagement(now):
+    assert trending.hot_score(0, 0, 0, now) == trending.hot_score(1, 0, 0, now)
+    assert trending.hot_score(10, 0, 0, now) < trending.hot_score(5, 3, 0, now)
+    assert trending.hot_score(100, 0, 0, now) - trending.hot_score(10, 0, 0, now) == pytest.approx(1)
+
+
+def test_hot_score_decays_with_age(now, settings):
+    settings.TRENDING_DECAY_HOURS = 12
+    later = now + timedelta(hours=12)
+    
+    # Ten times the engagement buys exactly one decay period.
+    assert trending.hot_score(100, 0, 0, now) == pytest.approx(trending.hot_score(10, 0, 0, later))
+    assert trending.hot_score(50, 0, 0, now) < trending.hot_score(10, 0, 0, later)
+    assert trending.hot_score(1000, 0, 0, now) > trending.hot_score(10, 0, 0, later)
+
+
+def test_feed_orders_by_hot_score(api_client, make_idea, store, now):
+    old_popular = publish(make_idea, now - timedelta(days=2), votes_count=500)
+    fresh = publish(make_idea, now, votes_count=5)
+    fresh_popular = publish(make_idea, now, votes_count=50, comments_count=10)
+    make_idea(status='draft')
+    
+    assert trending.rebuild_trending_scores() == 3
+    
+    assert trending_ids(api_client) == [fresh_popular.pk, fresh.pk, old_popular.pk]
+
+
+def test_rescoring_one_idea_moves_it(api_client, make_idea, store, now):
+    first = publish(make_idea, now, votes_count=20)
+    second = publish(make_idea, now, votes_count=10)
+    trending.rebuild_trending_scores()
+    
+    Idea.objects.filter(pk=second.pk).update(votes_count=40)
+    trending.update_trending_scores([second.pk])
+    
+    assert trending_ids(api_client) == [second.pk, first.pk]
+
+
+def test_feed_segments_follow_status_changes(api_client, make_idea, store, now):
+    approved = publish(make_idea, now, votes_count=10, status='approved')
+    submitted = publish(make_idea, now, votes_count=20)
+    trending.rebuild_trending_scores()
+    
+    assert trending_ids(api_client, status='approved') == [approved.pk]
+    
+    Idea.objects.filter(pk=submitted.pk).update(status='draft')
+    trending.update_trending_scores([submitted.pk])
+    
+    assert trending_ids(api_client) == [approved.pk]
+    assert trending_ids(api_client, status='submitted') == []
+
+
+def test_rebuild_drops_deleted_ideas(api_client, make_idea, store, now):
+    kept = publish(make_idea, now)
+    deleted = publish(make_idea, now)
+    trending.rebuild_trending_scores()
+    
+    Idea.objects.filter(pk=deleted.pk).delete()
+    trending.rebuild_trending_scores()
+    
+    assert trending_ids(api_client) == [kept.pk]
+
+
+def test_feed_rejects_unknown_filters(api_client, db):
+    assert api_client.get(reverse('ideas:idea_trending'), {'status': 'bogus'}).status_code == 400
+    assert api_client.get(reverse('ideas:idea_trending'), {'category': 'x'}).status_code == 400
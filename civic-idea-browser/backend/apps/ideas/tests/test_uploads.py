@@ -0,0 +1,207 @@
+"""
+Tests for resumable chunked uploads.
+"""
+import hashlib
+import resource
+import time
+import tracemalloc
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.retention import RetentionPolicy
+from apps.ideas import uploads
+from apps.ideas.models import StoredBlob, UploadSession
+from apps.ideas.retention import UnreferencedBlobRetention
+from apps.ideas.uploads import assemble_upload, write_chunk
+
+LARGE_UPLOAD_SIZE = 320 * 1024 * 1024
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def upload(client, content, sha256='', chunk_size=4):
+    response = client.post(reverse('ideas:upload_create'), {
+        'filename': 'notes.txt', 'content_type': 'text/plain', 'size': len(content), 'sha256': sha256,
+    })
+    assert response.status_code == 201, response.data
+    session_id = response.data['id']
+    for first in range(0, len(content), chunk_size):
+        chunk = content[first:first + chunk_size]
+        response = client.put(
+            reverse('ideas:upload_detail', args=[session_id]), chunk, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {first}-{first + len(chunk) - 1}/{len(content)}',
+        )
+        assert response.status_code == 200, response.data
+    response = client.post(reverse('ideas:upload_complete', args=[session_id]))
+    assert response.status_code == 202, response.data
+    return session_id
+
+
+@pytest.fixture
+def complete_upload(api_client, make_user, django_capture_on_commit_callbacks):
+    def run(user, content, **kwargs):
+        api_client.force_authenticate(user)
+        with django_capture_on_commit_callbacks(execute=True):
+            session_id = upload(api_client, content, **kwargs)
+        return UploadSession.objects.get(pk=session_id)
+    return run
+
+
+def test_upload_is_stored_under_its_digest(complete_upload, user):
+    content = b'chunked upload content'
+    
+    session = complete_upload(user, content, sha256=hashlib.sha256(content).hexdigest())
+    
+    assert session.status == 'complete' and session.parts == []
+    assert session.blob.sha256 == hashlib.sha256(content).hexdigest()
+    with session.blob.file.open('rb') as stored:
+        assert stored.read() == content
+
+
+def test_duplicate_upload_reuses_the_blob(complete_upload, user, make_user):
+    content = b'the same file twice'
+    first = complete_upload(user, content)
+    
+    second = complete_upload(make_user(), content)
+    
+    assert second.status == 'complete' and second.blob_id == first.blob_id
+    assert StoredBlob.objects.count() == 1
+
+
+def test_known_digest_alone_does_not_complete_a_session(complete_upload, user, api_client, make_user):
+    content = b'private minutes'
+    complete_upload(user, content)
+    api_client.force_authenticate(make_user())
+    
+    response = api_client.post(reverse('ideas:upload_create'), {
+        'filename': 'guess.txt', 'size': len(content), 'sha256': hashlib.sha256(content).hexdigest(),
+    })
+    
+    assert response.status_code == 201
+    assert (response.data['status'], response.data['received'], response.data['file']) == ('uploading', 0, None)
+
+
+def test_claimed_digest_must_match_the_bytes(complete_upload, user, make_user):
+    stored = complete_upload(user, b'private minutes')
+    
+    session = complete_upload(make_user(), b'something else!', sha256=stored.blob.sha256)
+    
+    assert session.status == 'failed' and session.blob is None
+    assert 'SHA-256' in session.error
+
+
+
+@pytest.fixture
+def stale_blob(complete_upload, user, settings):
+    """A blob nothing has used for 90 days, with a 30-day retention."""
+    settings.RETENTION_UNREFERENCED_BLOBS_DAYS = 30
+    session = complete_upload(user, b'old minutes')
+    StoredBlob.objects.update(last_used_at=timezone.now() - timedelta(days=90))
+    return StoredBlob.objects.get(pk=session.blob_id)
+
+
+def test_reused_blob_is_kept_by_retention(stale_blob, complete_upload, make_user, django_capture_on_commit_callbacks):
+    session = complete_upload(make_user(), b'old minutes')
+    
+    with django_capture_on_commit_callbacks(execute=True):
+        stats = UnreferencedBlobRetention().apply()
+    
+    assert session.blob_id == stale_blob.pk and stats['deleted'] == 0
+    assert StoredBlob.objects.get(pk=stale_blob.pk).last_used_at > timezone.now() - timedelta(minutes=1)
+    assert stale_blob.file.storage.exists(stale_blob.file.name)
+
+
+def test_blob_touched_during_retention_is_kept(stale_blob, monkeypatch):
+    list_chunks = RetentionPolicy.iter_chunks
+    
+    def reuse_after_listing(self, queryset):
+        for chunk in list_chunks(self, queryset):
+            StoredBlob.objects.update(last_used_at=timezone.now())
+            yield chunk
+    monkeypatch.setattr(RetentionPolicy, 'iter_chunks', reuse_after_listing)
+    
+    assert UnreferencedBlobRetention().apply()['deleted'] == 0
+    assert StoredBlob.objects.filter(pk=stale_blob.pk).exists()
+
+
+def test_blob_removed_before_reuse_is_stored_again(stale_blob, complete_upload, make_user, monkeypatch,
+                                                   django_capture_on_commit_callbacks):
+    # Retention removes the blob between the digest lookup and the reuse.
+    monkeypatch.setattr(uploads, 'find_blob', lambda sha256: stale_blob)
+    with django_capture_on_commit_callbacks(execute=True):
+        UnreferencedBlobRetention().apply()
+    
+    session = complete_upload(make_user(), b'old minutes')
+    
+    assert session.status == 'complete' and session.blob_id != stale_blob.pk
+    with session.blob.file.open('rb') as stored:
+        assert stored.read() == b'old minutes'
+
+
+class GeneratedStream:
+    """
+    Deterministic pseudo-random bytes read in pieces, hashed as they go.
+    """
+    
+    def __init__(self, size):
+        self.remaining = size
+        self.block = hashlib.sha256(b'seed').digest() * (64 * 1024 // 32)
+        self.offset = 0
+        self.sha256 = hashlib.sha256()
+    
+    def read(self, size=-1):
+        size = min(self.remaining, len(self.block) if size is None or size < 0 else size)
+        data = bytearray()
+        while len(data) < size:
+            piece = self.block[self.offset:self.offset + size - len(data)]
+            data += piece
+            self.offset = (self.offset + len(piece)) % len(self.block)
+        # Vary the content so identical blocks don't repeat across the file.
+        data[:8] = self.remaining.to_bytes(8, 'big')[:len(data[:8])]
+        data = bytes(data)
+        self.remaining -= len(data)
+        self.sha256.update(data)
+        return data
+
+
+def upload_large_file(user, size=LARGE_UPLOAD_SIZE):
+    session = UploadSession.objects.create(user=user, filename='video.mp4', content_type='video/mp4', size=size)
+    stream = GeneratedStream(size)
+    for first in range(0, size, CHUNK_SIZE):
+        write_chunk(session, stream, first, min(first + CHUNK_SIZE, size) - 1)
+    assemble_upload(session)
+    return session, stream.sha256.hexdigest()
+
+
+@pytest.mark.slow
+def test_large_upload_throughput(user, django_capture_on_commit_callbacks):
+    started = time.perf_counter()
+    with django_capture_on_commit_callbacks(execute=True):
+        session, sha256 = upload_large_file(user)
+    seconds = time.perf_counter() - started
+    
+    assert session.status == 'complete' and session.blob.sha256 == sha256
+    assert session.blob.file.size == LARGE_UPLOAD_SIZE
+    # Chunks are written once and read twice when assembled; on local disk
+    # this runs at hundreds of MB/s, so the floor only catches regressions
+    # to buffering or per-byte work.
+    assert LARGE_UPLOAD_SIZE / seconds > 25 * 1024 * 1024
+
+
+@pytest.mark.slow
+def test_large_upload_memory_stays_flat(user, django_capture_on_commit_callbacks):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            session, sha256 = upload_large_file(user)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    rss_growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) * 1024  # KiB on Linux
+    
+    assert session.status == 'complete' and session.blob.sha256 == sha256
+    assert peak < 4 * 1024 * 1024
+    assert rss_growth < 64 * 1024 * 1024
@@ -0,0 +1,95 @@
+"""
+Tests for write-behind idea view counting.
+"""
+import time
+
+import fakeredis
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.ideas import viewcounts
+from apps.ideas.models import Idea, IdeaView
+from apps.ideas.tasks import flush_idea_views
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(viewcounts, 'get_redis_connection', lambda: client)
+    return client
+
+
+def view(client, idea, **headers):
+    response = client.get(reverse('ideas:idea_detail', args=[idea.pk]), **headers)
+    assert response.status_code == 200
+    return response
+
+
+def test_detail_only_reads_and_the_task_writes_the_views(api_client, make_idea, redis):
+    idea = make_idea()
+    
+    with CaptureQueriesContext(connection) as queries:
+        for address in ('10.0.0.1', '10.0.0.2', '10.0.0.1'):
+            view(api_client, idea, REMOTE_ADDR=address)
+    
+    assert all(query['sql'].startswith('SELECT') for query in queries)
+    assert len(viewcounts.get_view_buffer()) == 2
+    assert not IdeaView.objects.exists()
+    
+    assert flush_idea_views() == 2
+    
+    assert IdeaView.objects.filter(idea=idea).count() == 2
+    assert Idea.objects.get(pk=idea.pk).views_count == 2
+    assert len(viewcounts.get_view_buffer()) == 0
+
+
+def test_flush_writes_in_batches(api_client, make_idea, redis, settings):
+    ideas = [make_idea() for _ in range(3)]
+    for n in range(5):
+        for idea in ideas:
+            view(api_client, idea, REMOTE_ADDR=f'10.0.0.{n}')
+    
+    assert viewcounts.flush_view_buffer(batch_size=4, max_batches=2) == 8
+    assert viewcounts.flush_view_buffer(batch_size=4) == 7
+    
+    assert sorted(Idea.objects.values_list('views_count', flat=True)) == [5, 5, 5]
+
+
+def test_failed_flush_puts_the_views_back(api_client, make_idea, redis, monkeypatch):
+    idea = make_idea()
+    view(api_client, idea, REMOTE_ADDR='10.0.0.1')
+    
+    def fail(events):
+        raise RuntimeError('database unavailable')
+    monkeypatch.setattr(viewcounts, '_write_events', fail)
+    with pytest.raises(RuntimeError):
+        flush_idea_views()
+    
+    assert len(viewcounts.get_view_buffer()) == 1
+
+
+def test_dedup_window_expires(api_client, make_idea, redis, settings):
+    settings.IDEA_VIEWS_DEDUP_WINDOW = 1
+    idea = make_idea()
+    
+    view(api_client, idea, REMOTE_ADDR='10.0.0.1')
+    view(api_client, idea, REMOTE_ADDR='10.0.0.1')
+    time.sleep(1.1)
+    view(api_client, idea, REMOTE_ADDR='10.0.0.1')
+    
+    assert flush_idea_views() == 2
+
+
+def test_views_are_written_at_once_without_redis(api_client, make_idea, user, monkeypatch):
+    monkeypatch.setattr(viewcounts, 'get_redis_connection', lambda: None)
+    idea = make_idea()
+    api_client.force_authenticate(user)
+    
+    view(api_client, idea)
+    view(api_client, idea)
+    
+    assert IdeaView.objects.filter(idea=idea, user=user).count() == 1
+    assert Idea.objects.get(pk=idea.pk).views_count == 1
+    assert flush_idea_views() == 0
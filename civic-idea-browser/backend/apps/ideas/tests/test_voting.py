@@ -0,0 +1,69 @@
+"""
+Tests for vote casting and the vote tallies.
+"""
+from django.db.models import QuerySet
+
+from apps.ideas.models import Idea, Vote
+from apps.ideas.voting import cast_vote, fold_vote_counters, get_vote_tally, retract_vote
+
+
+def tally(idea):
+    return Idea.objects.values('upvotes_count', 'downvotes_count', 'votes_count').get(pk=idea.pk)
+
+
+def test_cast_change_and_retract(make_idea, make_user):
+    idea = make_idea()
+    voter = make_user('voter')
+    
+    assert cast_vote(idea, voter, 'up')[1] is True
+    assert cast_vote(idea, voter, 'up')[1] is False
+    assert tally(idea) == {'upvotes_count': 1, 'downvotes_count': 0, 'votes_count': 1}
+    
+    cast_vote(idea, voter, 'down')
+    assert tally(idea) == {'upvotes_count': 0, 'downvotes_count': 1, 'votes_count': 1}
+    
+    assert retract_vote(idea, voter) is True
+    assert retract_vote(idea, voter) is False
+    assert tally(idea) == {'upvotes_count': 0, 'downvotes_count': 0, 'votes_count': 0}
+
+
+def test_type_change_already_applied_elsewhere_is_not_counted_again(make_idea, make_user, monkeypatch):
+    idea = make_idea()
+    voter = make_user('voter')
+    cast_vote(idea, voter, 'up')
+    
+    # Another request switches the vote to 'down' between our read and write.
+    stale = Vote.objects.get(idea=idea, user=voter)
+    cast_vote(idea, voter, 'down')
+    monkeypatch.setattr(Vote.objects, 'get_or_create', lambda **kwargs: (stale, False))
+    cast_vote(idea, voter, 'down')
+    
+    assert tally(idea) == {'upvotes_count': 0, 'downvotes_count': 1, 'votes_count': 1}
+
+
+def test_retraction_already_applied_elsewhere_is_not_counted_again(make_idea, make_user, monkeypatch):
+    idea = make_idea()
+    voter = make_user('voter')
+    cast_vote(idea, voter, 'up')
+    
+    # Another request deletes the vote between our read and delete.
+    stale = Vote.objects.get(idea=idea, user=voter)
+    retract_vote(idea, voter)
+    monkeypatch.setattr(QuerySet, 'first', lambda self: stale)
+    
+    assert retract_vote(idea, voter) is False
+    assert tally(idea) == {'upvotes_count': 0, 'downvotes_count': 0, 'votes_count': 0}
+
+
+def test_sharded_tallies_are_folded_onto_the_idea(make_idea, make_user, settings):
+    settings.VOTE_COUNTER_SHARDS = 4
+    idea = make_idea()
+    for n in range(6):
+        cast_vote(idea, make_user(f'voter{n}'), 'up' if n % 3 else 'down')
+    
+    assert tally(idea)['votes_count'] == 0
+    assert get_vote_tally(idea) == {'up': 4, 'down': 2, 'total': 6, 'score': 2}
+    
+    assert fold_vote_counters() == 1
+    assert tally(idea) == {'upvotes_count': 4, 'downvotes_count': 2, 'votes_count': 6}
+    assert get_vote_tally(idea) == {'up': 4, 'down': 2, 'total': 6, 'score': 2}
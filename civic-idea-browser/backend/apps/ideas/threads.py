@@ -0,0 +1,83 @@
+"""
+Threaded comment loading.
+
+Every comment stores its thread ``root`` and a materialized ``path`` of
+zero-padded ids from the root down (``0000000012/0000000040/``), so a
+thread sorted by ``path`` comes back in display (depth-first, oldest
+first) order from one indexed query and is nested in Python.
+"""
+from collections import defaultdict, deque
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+PATH_WIDTH = 10
+MAX_COMMENT_DEPTH = 20  # keeps paths within Comment.path's max_length
+
+
+def comment_path(parent_path, pk):
+    return f'{parent_path}{pk:0{PATH_WIDTH}d}/'
+
+
+def with_first_replies(queryset, root_ids, limit):
+    """
+    Return the roots in ``root_ids`` plus the first ``limit`` replies of
+    each (in thread order) as a single query ordered by path.
+    """
+    return (
+        queryset.filter(root_id__in=root_ids)
+        .annotate(thread_position=Window(RowNumber(), partition_by=F('root_id'), order_by=F('path').asc()))
+        .filter(thread_position__lte=limit + 1)
+        .order_by('path')
+    )
+
+
+def nest_comments(rows):
+    """
+    Nest serialized comments (dicts with ``id``, ``parent`` and ``depth``,
+    ordered by path) under their parents. Rows whose parent is missing
+    (e.g. hidden) are dropped along with their replies. Returns the roots.
+    """
+    roots, by_id = [], {}
+    for row in rows:
+        row['replies'] = []
+        if row['parent'] is None:
+            roots.append(row)
+        elif row['parent'] in by_id:
+            by_id[row['parent']]['replies'].append(row)
+        else:
+            continue
+        by_id[row['id']] = row
+    return roots
+
+
+def rebuild_comment_paths(queryset, batch_size=1000):
+    """
+    Recompute ``root``, ``path`` and ``depth`` for every comment on the
+    ideas of the comments in ``queryset``, one idea at a time. Returns the
+    number of comments updated.
+    """
+    from .models import Comment
+    updated = 0
+    for idea_id in queryset.order_by('idea_id').values_list('idea_id', flat=True).distinct():
+        children = defaultdict(list)
+        for pk, parent_id in Comment.objects.filter(idea_id=idea_id).order_by('pk').values_list('pk', 'parent_id'):
+            children[parent_id].append(pk)
+        
+        threads = {pk: (pk, 0, comment_path('', pk)) for pk in children[None]}
+        queue = deque(children[None])
+        while queue:
+            root_id, depth, path = threads[queue[0]]
+            for child in children[queue.popleft()]:
+                threads[child] = (root_id, depth + 1, comment_path(path, child))
+                queue.append(child)
+        
+        Comment.objects.bulk_update(
+            [
+                Comment(pk=pk, root_id=root_id, depth=depth, path=path)
+                for pk, (root_id, depth, path) in threads.items()
+            ],
+            ['root', 'depth', 'path'], batch_size=batch_size,
+        )
+        updated += len(threads)
+    return updated
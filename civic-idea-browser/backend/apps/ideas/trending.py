@@ -0,0 +1,248 @@
+"""
+Precomputed trending leaderboard for ideas.
+
+Each published idea gets a hot score::
+
+    log10(engagement) + (published_at - EPOCH) / (TRENDING_DECAY_HOURS * 3600)
+
+where engagement weighs ``votes_count``, ``comments_count`` and
+``views_count``. Newer ideas get a linearly larger time term, so relative
+order decays with age without ever recomputing old scores. A change to one
+idea only rescores that idea.
+
+Scores are kept in one sorted set per feed segment (all ideas, per status,
+per category and per category+status) in Redis. When Redis is not
+available they are kept in the ``TrendingScore`` table instead.
+"""
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.core.cache import get_redis_connection
+from .models import Idea, TrendingScore
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+VOTE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+VIEW_WEIGHT = 0.05
+REBUILD_BATCH_SIZE = 2000
+
+SCORE_FIELDS = ('id', 'status', 'votes_count', 'comments_count', 'views_count', 'published_at', 'created_at')
+
+
+def hot_score(votes_count, comments_count, views_count, published_at):
+    engagement = VOTE_WEIGHT * votes_count + COMMENT_WEIGHT * comments_count + VIEW_WEIGHT * views_count
+    order = math.log10(max(engagement, 1.0))
+    seconds = (published_at - EPOCH).total_seconds()
+    return round(order + seconds / (settings.TRENDING_DECAY_HOURS * 3600), 7)
+
+
+def segment_name(category=None, status=None):
+    """Return the segment holding ideas filtered by ``category``/``status``."""
+    parts = []
+    if category is not None:
+        parts.append(f'category:{category}')
+    if status is not None:
+        parts.append(f'status:{status}')
+    return ':'.join(parts) or 'all'
+
+
+def _segments_for(status, category_ids):
+    segments = ['all', segment_name(status=status)]
+    for category_id in category_ids:
+        segments.append(segment_name(category=category_id))
+        segments.append(segment_name(category=category_id, status=status))
+    return segments
+
+
+def _score_rows(ideas):
+    """Map idea id -> {segment: score} for an iterable of value dicts."""
+    ideas = [idea for idea in ideas if idea['status'] != 'draft']
+    categories = defaultdict(list)
+    through = Idea.categories.through.objects.filter(idea_id__in=[idea['id'] for idea in ideas])
+    for idea_id, category_id in through.values_list('idea_id', 'category_id'):
+        categories[idea_id].append(category_id)
+    
+    rows = {}
+    for idea in ideas:
+        score = hot_score(
+            idea['votes_count'], idea['comments_count'], idea['views_count'],
+            idea['published_at'] or idea['created_at'],
+        )
+        rows[idea['id']] = {
+            segment: score for segment in _segments_for(idea['status'], categories[idea['id']])
+        }
+    return rows
+
+
+class RedisTrendingStore:
+    """
+    Sorted sets ``trending:<segment>`` plus a per-idea set of the segments
+    it currently belongs to, so stale memberships can be removed.
+    """
+    prefix = 'trending:'
+    
+    def __init__(self, client):
+        self.client = client
+    
+    def _key(self, segment):
+        return f'{self.prefix}{segment}'
+    
+    def _member_key(self, idea_id):
+        return f'{self.prefix}member:{idea_id}'
+    
+    def replace(self, rows, idea_ids):
+        idea_ids = list(idea_ids)
+        pipe = self.client.pipeline(transaction=False)
+        for idea_id in idea_ids:
+            pipe.smembers(self._member_key(idea_id))
+        previous = dict(zip(idea_ids, pipe.execute()))
+        
+        pipe = self.client.pipeline()
+        for idea_id in idea_ids:
+            segments = rows.get(idea_id, {})
+            # Always include 'all' so entries without a member set get cleaned up too.
+            for stale in {'all', *(s.decode() for s in previous[idea_id])} - set(segments):
+                pipe.zrem(self._key(stale), idea_id)
+            for segment, score in segments.items():
+                pipe.zadd(self._key(segment), {idea_id: score})
+            pipe.delete(self._member_key(idea_id))
+            if segments:
+                pipe.sadd(self._member_key(idea_id), *segments)
+        pipe.execute()
+    
+    def page(self, segment, start, stop):
+        members = self.client.zrevrange(self._key(segment), start, stop - 1)
+        return [int(member) for member in members]
+    
+    def count(self, segment):
+        return self.client.zcard(self._key(segment))
+    
+    def iter_idea_ids(self, batch_size):
+        batch = []
+        for member, _ in self.client.zscan_iter(self._key('all'), count=batch_size):
+            batch.append(int(member))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class DatabaseTrendingStore:
+    """
+    ``TrendingScore`` rows, read with an index scan on ``(segment, -score)``.
+    """
+    
+    def replace(self, rows, idea_ids):
+        with transaction.atomic():
+            TrendingScore.objects.filter(idea_id__in=list(idea_ids)).delete()
+            TrendingScore.objects.bulk_create([
+                TrendingScore(idea_id=idea_id, segment=segment, score=score)
+                for idea_id, segments in rows.items()
+                for segment, score in segments.items()
+            ])
+    
+    def page(self, segment, start, stop):
+        return list(
+            TrendingScore.objects.filter(segment=segment)
+            .order_by('-score', '-idea_id')
+            .values_list('idea_id', flat=True)[start:stop]
+        )
+    
+    def count(self, segment):
+        return TrendingScore.objects.filter(segment=segment).count()
+    
+    def iter_idea_ids(self, batch_size):
+        queryset = TrendingScore.objects.filter(segment='all').values_list('idea_id', flat=True)
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(idea_id__gt=last_id).order_by('idea_id')[:batch_size])
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1]
+
+
+def get_trending_store():
+    client = get_redis_connection()
+    if client is None:
+        return DatabaseTrendingStore()
+    return RedisTrendingStore(client)
+
+
+def update_trending_scores(idea_ids):
+    """Rescore ``idea_ids`` and move them into their current segments."""
+    idea_ids = set(idea_ids)
+    if not idea_ids:
+        return
+    rows = _score_rows(Idea.objects.filter(pk__in=idea_ids).values(*SCORE_FIELDS))
+    get_trending_store().replace(rows, idea_ids)
+
+
+def schedule_trending_update(idea_ids):
+    """Rescore ``idea_ids`` once the current transaction commits."""
+    idea_ids = list(idea_ids)
+    if idea_ids:
+        transaction.on_commit(lambda: update_trending_scores(idea_ids))
+
+
+def rebuild_trending_scores(batch_size=REBUILD_BATCH_SIZE):
+    """
+    Recompute every score to repair drift, then drop entries for ideas that
+    were deleted or went back to draft. Returns the number of ideas scored.
+    """
+    store = get_trending_store()
+    scored = 0
+    last_id = 0
+    queryset = Idea.objects.exclude(status='draft').order_by('pk').values(*SCORE_FIELDS)
+    while True:
+        ideas = list(queryset.filter(pk__gt=last_id)[:batch_size])
+        if not ideas:
+            break
+        store.replace(_score_rows(ideas), [idea['id'] for idea in ideas])
+        scored += len(ideas)
+        last_id = ideas[-1]['id']
+    
+    for idea_ids in store.iter_idea_ids(batch_size):
+        live = set(Idea.objects.filter(pk__in=idea_ids).exclude(status='draft').values_list('pk', flat=True))
+        stale = set(idea_ids) - live
+        if stale:
+            store.replace({}, stale)
+    
+    logger.info('Rebuilt trending scores for %d ideas', scored)
+    return scored
+
+
+class TrendingFeed:
+    """
+    Lazy, sliceable view of one segment for Django's ``Paginator``.
+    
+    ``count()`` is a ZCARD and each page is one ZREVRANGE plus one query
+    for the ideas on that page.
+    """
+    
+    def __init__(self, queryset, segment):
+        self.queryset = queryset
+        self.segment = segment
+        self.store = get_trending_store()
+    
+    def count(self):
+        return self.store.count(self.segment)
+    
+    def __len__(self):
+        return self.count()
+    
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('TrendingFeed only supports slicing')
+        stop = index.stop if index.stop is not None else self.count()
+        idea_ids = self.store.page(self.segment, index.start or 0, stop)
+        ideas = self.queryset.in_bulk(idea_ids)
+        return [ideas[idea_id] for idea_id in idea_ids if idea_id in ideas]
@@ -0,0 +1,239 @@
+"""
+Resumable chunked uploads stored by content.
+
+An upload session receives its file as a sequence of ``PUT`` requests, each
+carrying the next byte range (``Content-Range: bytes <first>-<last>/<size>``).
+Every chunk is streamed from the request into its own part in the default
+storage, in pieces of ``READ_SIZE`` bytes, so neither a chunk nor the file is
+ever held in memory, and a client that loses its connection asks the
+session for ``received`` and continues from there.
+
+Completing the session hashes the received parts and concatenates them
+into a ``StoredBlob`` named after the file's SHA-256 digest. A file whose
+digest is already stored is not stored again: its parts are discarded
+and the session points at the existing blob. Every session uploads all
+of its bytes, since a digest alone proves nothing about who holds the
+file; a ``sha256`` sent when creating the session is only checked
+against the bytes received.
+
+Idea images and attachments that point at a blob hold a reference on it
+(``acquire_blob``/``release_blob``, called from signal handlers), and
+unreferenced blobs are removed by ``UnreferencedBlobRetention``.
+"""
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import StoredBlob, UploadSession
+
+READ_SIZE = 64 * 1024
+BLOB_PREFIX = 'blobs/'
+PART_PREFIX = 'uploads/'
+
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    """
+    A chunk or upload that cannot be accepted; ``status`` is the HTTP status
+    to answer with.
+    """
+    
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class _LimitedReader:
+    """
+    File-like view of the next ``size`` bytes of ``stream``.
+    """
+    
+    def __init__(self, stream, size):
+        self.stream = stream
+        self.size = size
+        self.remaining = size
+    
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(min(size, READ_SIZE)) if size else b''
+        self.remaining -= len(data)
+        return data
+
+
+class _PartsReader:
+    """
+    File-like concatenation of stored parts that hashes what it reads.
+    """
+    
+    def __init__(self, names, size):
+        self.names = list(names)
+        self.size = size
+        self.sha256 = hashlib.sha256()
+        self._current = None
+    
+    def read(self, size=-1):
+        while self.names or self._current is not None:
+            if self._current is None:
+                self._current = default_storage.open(self.names.pop(0), 'rb')
+            data = self._current.read(READ_SIZE if size is None or size < 0 else size)
+            if data:
+                self.sha256.update(data)
+                return data
+            self._current.close()
+            self._current = None
+        return b''
+    
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+
+
+def parse_content_range(header, size):
+    """Return ``(first, last)`` from a ``Content-Range`` header for a file of ``size`` bytes."""
+    match = _CONTENT_RANGE.match(header or '')
+    if match is None:
+        raise UploadError('Content-Range must be "bytes <first>-<last>/<size>".')
+    first, last, total = map(int, match.groups())
+    if total != size or first > last or last >= size:
+        raise UploadError(f'Content-Range does not fit an upload of {size} bytes.')
+    if last - first + 1 > settings.UPLOAD_CHUNK_MAX_SIZE:
+        raise UploadError(f'Chunks may be at most {settings.UPLOAD_CHUNK_MAX_SIZE} bytes.', status=413)
+    return first, last
+
+
+def find_blob(sha256):
+    return StoredBlob.objects.filter(sha256=sha256).first()
+
+
+def write_chunk(session, stream, first, last):
+    """
+    Stream bytes ``first``-``last`` of the upload from ``stream`` into a new
+    part and append it to ``session``. Returns the new ``received`` offset.
+    """
+    if session.status != 'uploading':
+        raise UploadError(f'Upload is {session.status}.', status=409)
+    if first != session.received:
+        raise UploadError(f'Expected a chunk starting at byte {session.received}.', status=409)
+    
+    length = last - first + 1
+    reader = _LimitedReader(stream, length)
+    part = default_storage.save(f'{PART_PREFIX}{session.pk}/{first:015d}', File(reader))
+    if reader.remaining:
+        default_storage.delete(part)
+        raise UploadError(f'Chunk ended {reader.remaining} bytes early.')
+    
+    with transaction.atomic():
+        # Lock only to append: the chunk itself was written without a lock.
+        locked = UploadSession.objects.select_for_update().get(pk=session.pk)
+        appended = locked.status == 'uploading' and locked.received == first
+        if appended:
+            locked.parts.append(part)
+            locked.received = last + 1
+            locked.save(update_fields=['parts', 'received', 'updated_at'])
+    if not appended:
+        # A concurrent request delivered this range first.
+        default_storage.delete(part)
+        raise UploadError(f'Expected a chunk starting at byte {locked.received}.', status=409)
+    session.parts, session.received = locked.parts, locked.received
+    return session.received
+
+
+def blob_name(sha256, filename):
+    extension = os.path.splitext(filename)[1].lower()[:10]
+    return f'{BLOB_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}'
+
+
+def _hash_parts(names, size):
+    reader = _PartsReader(names, size)
+    try:
+        while reader.read(READ_SIZE):
+            pass
+    finally:
+        reader.close()
+    return reader.sha256.hexdigest()
+
+
+def _finish(session, blob, status='complete', error=''):
+    parts = session.parts
+    session.blob, session.status, session.error, session.parts = blob, status, error, []
+    session.save(update_fields=['blob', 'status', 'error', 'parts', 'updated_at'])
+    transaction.on_commit(lambda: delete_files(parts))
+
+
+def assemble_upload(session):
+    """
+    Turn the parts of a fully received ``session`` into a ``StoredBlob``, or
+    reuse the blob already stored with the same digest.
+    
+    The parts are read twice for a new file, once to hash them and once to
+    copy them into the blob, and once for a file that is already stored.
+    A reused blob gets a fresh ``last_used_at`` in the transaction that
+    completes the session, so ``UnreferencedBlobRetention`` leaves it alone
+    until it can be attached; if retention removed it first, the file is
+    stored again.
+    """
+    sha256 = _hash_parts(session.parts, session.size)
+    if session.sha256 and session.sha256 != sha256:
+        with transaction.atomic():
+            _finish(session, None, 'failed', 'The uploaded file does not match its SHA-256 digest.')
+        return session
+    
+    blob = find_blob(sha256)
+    if blob is not None:
+        with transaction.atomic():
+            if StoredBlob.objects.filter(pk=blob.pk).update(last_used_at=timezone.now()):
+                _finish(session, blob)
+                return session
+        # Removed by retention since it was found: store the file again.
+    
+    reader = _PartsReader(session.parts, session.size)
+    try:
+        name = default_storage.save(blob_name(sha256, session.filename), File(reader))
+    finally:
+        reader.close()
+    if reader.sha256.hexdigest() != sha256:
+        # The parts changed in storage between the two reads.
+        default_storage.delete(name)
+        with transaction.atomic():
+            _finish(session, None, 'failed', 'The uploaded file does not match its SHA-256 digest.')
+        return session
+    with transaction.atomic():
+        blob, created = StoredBlob.objects.get_or_create(sha256=sha256, defaults={
+            'file': name, 'size': session.size, 'content_type': session.content_type,
+        })
+    if not created:
+        # Another upload of the same file finished first.
+        default_storage.delete(name)
+    
+    with transaction.atomic():
+        _finish(session, blob)
+    return session
+
+
+def acquire_blob(name):
+    """Count a new reference to the blob stored as ``name``, if it is one."""
+    if name and name.startswith(BLOB_PREFIX):
+        StoredBlob.objects.filter(file=name).update(ref_count=F('ref_count') + 1, last_used_at=timezone.now())
+
+
+def release_blob(name):
+    """Drop a reference to the blob stored as ``name``, if it is one."""
+    if name and name.startswith(BLOB_PREFIX):
+        StoredBlob.objects.filter(file=name, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1, last_used_at=timezone.now()
+        )
+
+
+def delete_files(names):
+    for name in names:
+        default_storage.delete(name)
@@ -0,0 +1,30 @@
+"""
+URL patterns for the ideas app.
+"""
+from django.urls import path
+from . import views
+
+app_name = 'ideas'
+
+urlpatterns = [
+    path('ideas/', views.IdeaListCreateView.as_view(), name='idea_list'),
+    path('ideas/trending/', views.TrendingIdeasView.as_view(), name='idea_trending'),
+    path('ideas/search/', views.IdeaSearchView.as_view(), name='idea_search'),
+    path('ideas/cache-stats/', views.IdeaResponseCacheStatsView.as_view(), name='idea_cache_stats'),
+    path('ideas/<int:pk>/', views.IdeaDetailView.as_view(), name='idea_detail'),
+    path('ideas/<int:pk>/vote/', views.IdeaVoteView.as_view(), name='idea_vote'),
+    path('ideas/<int:pk>/comments/', views.IdeaCommentListCreateView.as_view(), name='idea_comments'),
+    path('ideas/<int:pk>/comments/threads/', views.IdeaCommentThreadsView.as_view(), name='idea_comment_threads'),
+    path('comments/<int:pk>/replies/', views.CommentRepliesView.as_view(), name='comment_replies'),
+    path('comments/<int:pk>/thread/', views.CommentThreadView.as_view(), name='comment_thread'),
+    path('ideas/<int:pk>/attachments/', views.IdeaAttachmentListCreateView.as_view(), name='idea_attachments'),
+    path('attachments/<int:pk>/', views.IdeaAttachmentDetailView.as_view(), name='attachment_detail'),
+    path('uploads/', views.UploadSessionCreateView.as_view(), name='upload_create'),
+    path('uploads/<uuid:pk>/', views.UploadSessionView.as_view(), name='upload_detail'),
+    path('uploads/<uuid:pk>/complete/', views.UploadSessionCompleteView.as_view(), name='upload_complete'),
+    path('ideas/<int:pk>/analytics/', views.IdeaAnalyticsView.as_view(), name='idea_analytics'),
+    path('analytics/daily/', views.EngagementOverTimeView.as_view(), name='analytics_daily'),
+    path('analytics/top-ideas/', views.TopIdeasView.as_view(), name='analytics_top_ideas'),
+    path('analytics/by-scope/', views.EngagementByScopeView.as_view(), name='analytics_by_scope'),
+    path('exports/<slug:dataset>.<slug:fmt>', views.ExportView.as_view(), name='export'),
+]
@@ -0,0 +1,181 @@
+"""
+Write-behind view counting for ideas.
+
+Idea detail requests only push a view event into a buffer kept in Redis;
+a periodic Celery task drains the buffer, bulk-inserts ``IdeaView`` rows
+and applies a single ``F()`` increment per idea.
+
+The buffer needs the default cache to be backed by django-redis, since it
+is shared by the web processes and the Celery worker. Without it (local
+memory in development) each counted view is written synchronously in the
+request instead, deduplicated through the default cache.
+"""
+import json
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from apps.core.cache import get_redis_connection
+from .models import Idea, IdeaView
+from .trending import schedule_trending_update
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'idea_views:pending'
+SEEN_KEY_PREFIX = 'idea_views:seen:'
+USER_AGENT_MAX_LENGTH = 512
+
+
+class RedisViewBuffer:
+    """
+    View buffer stored in a Redis list, deduplicated with expiring keys.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def add(self, dedup_key, event, window):
+        if dedup_key and not self.client.set(SEEN_KEY_PREFIX + dedup_key, 1, nx=True, ex=window):
+            return False
+        self.client.rpush(PENDING_KEY, json.dumps(event))
+        return True
+
+    def drain(self, limit):
+        pipe = self.client.pipeline()
+        pipe.lrange(PENDING_KEY, 0, limit - 1)
+        pipe.ltrim(PENDING_KEY, limit, -1)
+        raw_events, _ = pipe.execute()
+        return [json.loads(raw) for raw in raw_events]
+
+    def requeue(self, events):
+        if events:
+            self.client.lpush(PENDING_KEY, *[json.dumps(event) for event in reversed(events)])
+
+    def __len__(self):
+        return self.client.llen(PENDING_KEY)
+
+
+def get_view_buffer():
+    """Return the Redis-backed buffer, or None without Redis."""
+    client = get_redis_connection()
+    return RedisViewBuffer(client) if client is not None else None
+
+
+def get_client_ip(request):
+    """Return the client IP, honouring the first X-Forwarded-For hop."""
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded_for:
+        return forwarded_for.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def record_idea_view(request, idea):
+    """
+    Buffer a view of ``idea`` without touching the database, or write it
+    at once when there is no Redis buffer (see the module docstring).
+
+    Repeated views by the same user (or IP for anonymous visitors) within
+    ``IDEA_VIEWS_DEDUP_WINDOW`` seconds are ignored. Returns True if the
+    view was counted.
+    """
+    user_id = request.user.pk if request.user.is_authenticated else None
+    ip_address = get_client_ip(request)
+
+    if user_id:
+        dedup_key = f'{idea.pk}:u{user_id}'
+    elif ip_address:
+        dedup_key = f'{idea.pk}:ip{ip_address}'
+    else:
+        dedup_key = None
+
+    event = {
+        'idea': idea.pk,
+        'user': user_id,
+        'ip': ip_address,
+        'ua': request.META.get('HTTP_USER_AGENT', '')[:USER_AGENT_MAX_LENGTH],
+        'ts': time.time(),
+    }
+
+    window = settings.IDEA_VIEWS_DEDUP_WINDOW
+    buffer = get_view_buffer()
+    if buffer is not None:
+        return buffer.add(dedup_key, event, window)
+    
+    if dedup_key and not cache.add(SEEN_KEY_PREFIX + dedup_key, 1, window):
+        return False
+    _write_events([event])
+    return True
+
+
+def flush_view_buffer(buffer=None, batch_size=None, max_batches=None):
+    """
+    Drain buffered views into the database in batches.
+
+    Each batch is one ``bulk_create`` of ``IdeaView`` rows plus one
+    ``UPDATE`` per idea. A batch that fails is pushed back onto the buffer.
+    Returns the number of views written.
+    """
+    buffer = buffer or get_view_buffer()
+    if buffer is None:
+        return 0
+    batch_size = batch_size or settings.IDEA_VIEWS_FLUSH_BATCH_SIZE
+    max_batches = max_batches or settings.IDEA_VIEWS_FLUSH_MAX_BATCHES
+
+    written = 0
+    for _ in range(max_batches):
+        events = buffer.drain(batch_size)
+        if not events:
+            break
+        try:
+            written += _write_events(events)
+        except Exception:
+            buffer.requeue(events)
+            raise
+        if len(events) < batch_size:
+            break
+
+    if written:
+        logger.info('Flushed %d buffered idea views', written)
+    return written
+
+
+def _write_events(events):
+    idea_ids = set(
+        Idea.objects.filter(pk__in={event['idea'] for event in events}).values_list('pk', flat=True)
+    )
+    user_ids = set(
+        User.objects.filter(
+            pk__in={event['user'] for event in events if event['user']}
+        ).values_list('pk', flat=True)
+    )
+
+    rows = []
+    per_idea = Counter()
+    for event in events:
+        if event['idea'] not in idea_ids:
+            continue
+        rows.append(IdeaView(
+            idea_id=event['idea'],
+            user_id=event['user'] if event['user'] in user_ids else None,
+            ip_address=event['ip'],
+            user_agent=event['ua'],
+            viewed_at=datetime.fromtimestamp(event['ts'], tz=dt_timezone.utc),
+        ))
+        per_idea[event['idea']] += 1
+
+    with transaction.atomic():
+        IdeaView.objects.bulk_create(rows)
+        # Sorted to take row locks in a consistent order across workers.
+        for idea_id in sorted(per_idea):
+            Idea.objects.filter(pk=idea_id).update(views_count=F('views_count') + per_idea[idea_id])
+        schedule_trending_update(per_idea)
+    return len(rows)
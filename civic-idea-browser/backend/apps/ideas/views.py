@@ -0,0 +1,592 @@
+"""
+Views for the ideas app.
+"""
+from rest_framework import status, generics, permissions
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.pagination import Cursor
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+from apps.core.pagination import FeedCursorPagination, ChronologicalCursorPagination, ThreadCursorPagination
+from apps.core.views import FastListMixin
+from apps.users.authentication import ClaimsJWTAuthentication
+from .analytics import STAT_FIELDS
+from .export import CONTENT_TYPES, ExportError, get_export, render_export
+from .models import Idea, IdeaAttachment, IdeaDailyStats, Comment, UploadSession
+from .permissions import IsAuthorOrReadOnly
+from .responsecache import (
+    add_user_fields, detail_cache_key, get_cache_stats, get_cached, is_enabled, list_cache_key, set_cached
+)
+from .search import search_ideas, highlight_ideas
+from .serializers import (
+    IdeaSerializer, IdeaValuesSerializer, IdeaSearchResultSerializer, VoteSerializer, CommentSerializer,
+    ThreadedCommentSerializer, UploadSessionSerializer, IdeaAttachmentSerializer
+)
+from .tasks import assemble_upload
+from .threads import nest_comments, with_first_replies
+from .trending import TrendingFeed, segment_name
+from .uploads import UploadError, parse_content_range, write_chunk
+from .viewcounts import record_idea_view
+from .voting import cast_vote, retract_vote, get_vote_tally
+
+# Read-heavy views take the user from the token claims on GET (see ClaimsJWTAuthentication).
+CLAIMS_AUTHENTICATION = [ClaimsJWTAuthentication, SessionAuthentication]
+
+
+class IdeaQuerysetMixin:
+    """
+    Restrict ideas to published ones plus the requesting user's drafts.
+    """
+    
+    def get_queryset(self):
+        queryset = (
+            Idea.objects.select_related('author')
+            .prefetch_related('categories', 'tags')
+            .defer('search_vector')
+        )
+        user = self.request.user
+        if user.is_authenticated:
+            return queryset.filter(~Q(status='draft') | Q(author=user))
+        return queryset.exclude(status='draft')
+
+
+class IdeaListCreateView(IdeaQuerysetMixin, FastListMixin, generics.ListCreateAPIView):
+    """
+    View for listing and creating ideas.
+    """
+    authentication_classes = CLAIMS_AUTHENTICATION
+    serializer_class = IdeaSerializer
+    fast_serializer_class = IdeaValuesSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = FeedCursorPagination
+    filterset_fields = ['status', 'priority', 'categories', 'tags', 'author']
+    search_fields = ['title', 'description', 'summary']
+    ordering_fields = ['created_at', 'published_at', 'votes_count', 'views_count', 'comments_count']
+    ordering = ['-created_at', '-pk']
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        category_tree = self.request.query_params.get('category_tree')
+        if category_tree:
+            if not category_tree.isdigit():
+                raise ValidationError({'category_tree': 'Must be a category id.'})
+            # Ideas in the category or any subcategory, via the closure table.
+            queryset = queryset.filter(pk__in=Idea.categories.through.objects.filter(
+                category__ancestor_links__ancestor_id=category_tree
+            ).values('idea_id'))
+        return queryset
+    
+    def use_response_cache(self):
+        # Signed-in users see their own drafts in the list, so their pages are
+        # only shared when the filters rule drafts out.
+        user = self.request.user
+        if not is_enabled('list'):
+            return False
+        if not user.is_authenticated:
+            return True
+        params = self.request.query_params
+        return (params.get('status') or 'draft') != 'draft' or (params.get('author') or str(user.pk)) != str(user.pk)
+    
+    def list(self, request, *args, **kwargs):
+        if not self.use_response_cache():
+            response = super().list(request, *args, **kwargs)
+            add_user_fields(request, response.data['results'])
+            return response
+        
+        key = list_cache_key(request)
+        data = get_cached('list', key)
+        cache_status = 'HIT'
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            set_cached(key, data)
+            cache_status = 'MISS'
+        add_user_fields(request, data['results'])
+        return Response(data, headers={'X-Cache': cache_status})
+    
+    def perform_create(self, serializer):
+        serializer.save(author=self.request.user)
+
+
+class IdeaSearchView(IdeaQuerysetMixin, generics.ListAPIView):
+    """
+    Full-text search over ideas (``?q=``), ranked by relevance, votes and
+    recency, with highlighted titles and description snippets.
+    """
+    authentication_classes = CLAIMS_AUTHENTICATION
+    serializer_class = IdeaSearchResultSerializer
+    permission_classes = [permissions.AllowAny]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['status', 'priority', 'categories', 'tags']
+    
+    def get_search_text(self):
+        text = self.request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'This query parameter is required.'})
+        return text
+    
+    def get_queryset(self):
+        return search_ideas(super().get_queryset(), self.get_search_text())
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        ideas = page if page is not None else list(queryset)
+        context = self.get_serializer_context()
+        context['highlights'] = highlight_ideas(ideas, self.get_search_text())
+        serializer = self.get_serializer_class()(ideas, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+
+class TrendingIdeasView(IdeaQuerysetMixin, generics.ListAPIView):
+    """
+    Trending ideas, read page by page from the precomputed leaderboard.
+    
+    Filter with ``?category=<id>`` and/or ``?status=<status>``.
+    """
+    authentication_classes = CLAIMS_AUTHENTICATION
+    serializer_class = IdeaSerializer
+    permission_classes = [permissions.AllowAny]
+    filter_backends = []
+    
+    def get_segment(self):
+        params = self.request.query_params
+        category = params.get('category')
+        if category is not None and not category.isdigit():
+            raise ValidationError({'category': 'Must be a category id.'})
+        status_filter = params.get('status')
+        if status_filter is not None and status_filter not in dict(Idea.STATUS_CHOICES):
+            raise ValidationError({'status': 'Unknown status.'})
+        return segment_name(category=category, status=status_filter)
+    
+    def get_queryset(self):
+        return TrendingFeed(super().get_queryset(), self.get_segment())
+
+
+class IdeaDetailView(IdeaQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
+    """
+    View for retrieving, updating and deleting an idea.
+    
+    Reads only SELECT, or nothing at all when the response is cached; the
+    view itself is buffered and counted later by the ``flush_idea_views``
+    task.
+    """
+    authentication_classes = CLAIMS_AUTHENTICATION
+    serializer_class = IdeaSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
+    
+    def retrieve(self, request, *args, **kwargs):
+        headers = {}
+        data = None
+        if is_enabled('detail'):
+            key = detail_cache_key(self.kwargs['pk'])
+            data = get_cached('detail', key)
+            headers['X-Cache'] = 'HIT' if data is not None else 'MISS'
+        if data is None:
+            idea = self.get_object()
+            data = self.get_serializer(idea).data
+            # Drafts are only visible to their author and never cached.
+            if 'X-Cache' in headers and idea.status != 'draft':
+                set_cached(key, data)
+        
+        record_idea_view(request, Idea(pk=data['id']))
+        add_user_fields(request, [data])
+        return Response(data, headers=headers)
+
+
+class IdeaVoteView(APIView):
+    """
+    View for casting (POST) or retracting (DELETE) a vote on an idea.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_idea(self, pk):
+        return get_object_or_404(Idea.objects.exclude(status='draft'), pk=pk)
+    
+    def post(self, request, pk):
+        idea = self.get_idea(pk)
+        serializer = VoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        vote, created = cast_vote(idea, request.user, serializer.validated_data['vote_type'])
+        return Response(
+            get_vote_tally(idea),
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+    
+    def delete(self, request, pk):
+        idea = self.get_idea(pk)
+        if not retract_vote(idea, request.user):
+            return Response({'detail': 'No vote to retract'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(get_vote_tally(idea), status=status.HTTP_200_OK)
+
+
+class CommentVisibilityMixin:
+    """
+    Restrict comments to public ones plus the requesting user's own.
+    """
+    
+    def get_visible_comments(self):
+        queryset = Comment.objects.select_related('author')
+        user = self.request.user
+        if user.is_authenticated:
+            return queryset.filter(Q(is_public=True) | Q(author=user))
+        return queryset.filter(is_public=True)
+
+
+class IdeaCommentListCreateView(CommentVisibilityMixin, generics.ListCreateAPIView):
+    """
+    View for listing and adding comments on an idea, oldest first.
+    """
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = ChronologicalCursorPagination
+    filter_backends = []
+    
+    def get_idea(self):
+        if not hasattr(self, '_idea'):
+            self._idea = get_object_or_404(Idea.objects.exclude(status='draft').only('id'), pk=self.kwargs['pk'])
+        return self._idea
+    
+    def get_queryset(self):
+        return self.get_visible_comments().filter(idea=self.get_idea())
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['idea'] = self.get_idea()
+        return context
+    
+    def perform_create(self, serializer):
+        serializer.save(idea=self.get_idea(), author=self.request.user)
+
+
+class IdeaCommentThreadsView(CommentVisibilityMixin, generics.ListAPIView):
+    """
+    Top-level comments of an idea with their first ``?replies=`` replies
+    (default 3) nested beneath them.
+    
+    A page costs one query for the roots and one for all of their replies.
+    Roots with more replies carry a ``more_replies`` URL that continues
+    from the last reply shown.
+    """
+    authentication_classes = CLAIMS_AUTHENTICATION
+    serializer_class = ThreadedCommentSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = ThreadCursorPagination
+    filter_backends = []
+    max_replies = 50
+    
+    def get_idea(self):
+        return get_object_or_404(Idea.objects.exclude(status='draft').only('id'), pk=self.kwargs['pk'])
+    
+    def get_queryset(self):
+        return (
+            self.get_visible_comments().filter(idea=self.get_idea(), depth=0)
+            .select_related(None).only('id', 'path')
+        )
+    
+    def get_reply_limit(self):
+        replies = self.request.query_params.get('replies', '3')
+        if not replies.isdigit() or int(replies) > self.max_replies:
+            raise ValidationError({'replies': f'Must be between 0 and {self.max_replies}.'})
+        return int(replies)
+    
+    def list(self, request, *args, **kwargs):
+        limit = self.get_reply_limit()
+        roots = self.paginate_queryset(self.get_queryset())
+        # Fetch one extra reply per thread to know whether there are more.
+        comments = list(with_first_replies(self.get_visible_comments(), [root.pk for root in roots], limit + 1))
+        
+        last_shown, has_more = {}, set()
+        shown = []
+        for comment in comments:
+            if comment.thread_position > limit + 1:
+                has_more.add(comment.root_id)
+                continue
+            shown.append(comment)
+            last_shown[comment.root_id] = comment.path
+        
+        threads = nest_comments(self.get_serializer(shown, many=True).data)
+        for thread in threads:
+            thread['more_replies'] = (
+                self.get_more_replies_url(thread['id'], last_shown[thread['id']])
+                if thread['id'] in has_more else None
+            )
+        return self.get_paginated_response(threads)
+    
+    def get_more_replies_url(self, root_id, after_path):
+        paginator = ThreadCursorPagination()
+        paginator.base_url = self.request.build_absolute_uri(reverse('ideas:comment_replies', args=[root_id]))
+        return paginator.encode_cursor(Cursor(offset=0, reverse=False, position=after_path))
+
+
+class CommentRepliesView(CommentVisibilityMixin, generics.ListAPIView):
+    """
+    Replies below a comment, flat in thread order (each with ``parent`` and
+    ``depth``), paginated by path for "load more replies".
+    """
+    authentication_classes = CLAIMS_AUTHENTICATION
+    serializer_class = ThreadedCommentSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = ThreadCursorPagination
+    filter_backends = []
+    
+    def get_queryset(self):
+        comment = get_object_or_404(
+            Comment.objects.exclude(idea__status='draft').only('id', 'root_id', 'path'), pk=self.kwargs['pk']
+        )
+        return self.get_visible_comments().filter(
+            root_id=comment.root_id, path__startswith=comment.path
+        ).exclude(pk=comment.pk)
+
+
+class CommentThreadView(CommentVisibilityMixin, APIView):
+    """
+    The whole thread containing a comment, nested, from one query.
+    """
+    authentication_classes = CLAIMS_AUTHENTICATION
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request, pk):
+        comment = get_object_or_404(
+            Comment.objects.exclude(idea__status='draft').only('id', 'root_id'), pk=pk
+        )
+        comments = self.get_visible_comments().filter(root_id=comment.root_id).order_by('path')
+        threads = nest_comments(ThreadedCommentSerializer(comments, many=True).data)
+        return Response(threads[0] if threads else None)
+
+
+class IdeaResponseCacheStatsView(APIView):
+    """
+    Hit/miss counts of the idea response cache per endpoint (admin only).
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return Response(get_cache_stats())
+
+
+class AnalyticsMixin:
+    """
+    Shared parameters for the analytics views, which read only the
+    ``IdeaDailyStats`` rollups.
+    
+    ``?days=<n>`` (default 30, at most 365) sets the window; ``?category=<id>``
+    limits it to ideas in the category or its subcategories.
+    """
+    permission_classes = [permissions.AllowAny]
+    max_days = 365
+    
+    def get_days(self):
+        days = self.request.query_params.get('days', '30')
+        if not days.isdigit() or not 1 <= int(days) <= self.max_days:
+            raise ValidationError({'days': f'Must be between 1 and {self.max_days}.'})
+        return int(days)
+    
+    def get_stats(self):
+        since = timezone.localdate() - timedelta(days=self.get_days() - 1)
+        stats = IdeaDailyStats.objects.filter(date__gte=since).exclude(idea__status='draft')
+        category = self.request.query_params.get('category')
+        if category is not None:
+            if not category.isdigit():
+                raise ValidationError({'category': 'Must be a category id.'})
+            stats = stats.filter(idea_id__in=Idea.categories.through.objects.filter(
+                category__ancestor_links__ancestor_id=category
+            ).values('idea_id'))
+        return stats
+    
+    def totals(self):
+        return {field: Sum(field) for field in STAT_FIELDS}
+
+
+class EngagementOverTimeView(AnalyticsMixin, APIView):
+    """
+    Daily engagement totals across ideas (optionally one category).
+    """
+    
+    def get(self, request):
+        rows = self.get_stats().values('date').annotate(**self.totals()).order_by('date')
+        return Response(list(rows))
+
+
+class IdeaAnalyticsView(AnalyticsMixin, APIView):
+    """
+    Daily engagement for one idea.
+    """
+    
+    def get(self, request, pk):
+        idea = get_object_or_404(Idea.objects.exclude(status='draft').only('id'), pk=pk)
+        rows = self.get_stats().filter(idea=idea).values('date', *STAT_FIELDS).order_by('date')
+        return Response(list(rows))
+
+
+class TopIdeasView(AnalyticsMixin, APIView):
+    """
+    Ideas with the most engagement in the window, by ``?metric=`` (a stats
+    field or ``engagement`` = votes + comments, default ``views``).
+    """
+    metrics = (*STAT_FIELDS, 'engagement')
+    
+    def get(self, request):
+        metric = request.query_params.get('metric', 'views')
+        if metric not in self.metrics:
+            raise ValidationError({'metric': f'Must be one of {", ".join(self.metrics)}.'})
+        limit = request.query_params.get('limit', '10')
+        if not limit.isdigit() or not 1 <= int(limit) <= 100:
+            raise ValidationError({'limit': 'Must be between 1 and 100.'})
+        rows = (
+            self.get_stats().values('idea_id', title=F('idea__title'))
+            .annotate(**self.totals())
+            .annotate(engagement=F('upvotes') + F('downvotes') + F('comments'))
+            .order_by(f'-{metric}', 'idea_id')[:int(limit)]
+        )
+        return Response(list(rows))
+
+
+class EngagementByScopeView(AnalyticsMixin, APIView):
+    """
+    Engagement totals grouped by idea scope (local, regional, ...).
+    """
+    
+    def get(self, request):
+        rows = (
+            self.get_stats().values(scope=F('idea__scope'))
+            .annotate(ideas=Count('idea_id', distinct=True), **self.totals())
+            .order_by('scope')
+        )
+        return Response(list(rows))
+
+
+class UploadSessionCreateView(generics.CreateAPIView):
+    """
+    Start a chunked upload. An optional ``sha256`` is checked against the
+    received bytes when the upload is completed.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class UploadSessionView(APIView):
+    """
+    Report an upload's progress (``GET``) or append its next chunk (``PUT``
+    with ``Content-Range``; the body is streamed to storage).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_session(self, pk):
+        return get_object_or_404(UploadSession, pk=pk, user=self.request.user)
+    
+    def get(self, request, pk):
+        return Response(UploadSessionSerializer(self.get_session(pk), context={'request': request}).data)
+    
+    def put(self, request, pk):
+        session = self.get_session(pk)
+        try:
+            first, last = parse_content_range(request.headers.get('Content-Range'), session.size)
+            if int(request.headers.get('Content-Length') or 0) != last - first + 1:
+                raise UploadError('Content-Length does not match Content-Range.')
+            received = write_chunk(session, request.stream, first, last)
+        except UploadError as exc:
+            return Response({'detail': str(exc), 'received': session.received}, status=exc.status)
+        return Response({'received': received})
+
+
+class UploadSessionCompleteView(APIView):
+    """
+    Finish an upload once every byte was received. The parts are assembled
+    by the ``assemble_upload`` task; poll the session until it is complete.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, pk):
+        with transaction.atomic():
+            session = get_object_or_404(UploadSession.objects.select_for_update(), pk=pk, user=request.user)
+            if session.status == 'uploading':
+                if session.received != session.size:
+                    return Response(
+                        {'detail': f'Only {session.received} of {session.size} bytes were received.'},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+                session.status = 'assembling'
+                session.save(update_fields=['status', 'updated_at'])
+                transaction.on_commit(lambda: assemble_upload.delay(str(session.pk)))
+        data = UploadSessionSerializer(session, context={'request': request}).data
+        return Response(data, status=status.HTTP_202_ACCEPTED if session.status == 'assembling' else status.HTTP_200_OK)
+
+
+class IdeaAttachmentListCreateView(generics.ListCreateAPIView):
+    """
+    List an idea's attachments, or attach a completed upload (author and
+    collaborators only).
+    """
+    serializer_class = IdeaAttachmentSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    filter_backends = []
+    
+    def get_idea(self):
+        ideas = Idea.objects.only('id', 'author_id', 'status')
+        user = self.request.user
+        if user.is_authenticated:
+            ideas = ideas.filter(~Q(status='draft') | Q(author=user))
+        else:
+            ideas = ideas.exclude(status='draft')
+        return get_object_or_404(ideas, pk=self.kwargs['pk'])
+    
+    def get_queryset(self):
+        return IdeaAttachment.objects.filter(idea=self.get_idea()).select_related('uploaded_by')
+    
+    def perform_create(self, serializer):
+        idea = self.get_idea()
+        user = self.request.user
+        if idea.author_id != user.pk and not idea.collaborator_relations.filter(user=user).exists():
+            raise PermissionDenied('Only the author and collaborators can add attachments.')
+        serializer.save(idea=idea, uploaded_by=user)
+
+
+class IdeaAttachmentDetailView(generics.RetrieveDestroyAPIView):
+    """
+    Retrieve an attachment, or remove it (its uploader or the idea's author).
+    """
+    serializer_class = IdeaAttachmentSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    
+    def get_queryset(self):
+        queryset = IdeaAttachment.objects.select_related('uploaded_by', 'idea')
+        user = self.request.user
+        if user.is_authenticated:
+            return queryset.filter(~Q(idea__status='draft') | Q(idea__author=user))
+        return queryset.exclude(idea__status='draft')
+    
+    def perform_destroy(self, instance):
+        if self.request.user.pk not in (instance.uploaded_by_id, instance.idea.author_id):
+            raise PermissionDenied('Only the uploader or the idea author can remove an attachment.')
+        instance.delete()
+
+
+class ExportView(APIView):
+    """
+    Stream every idea, vote or comment as CSV, JSON Lines or Parquet
+    (admin only), e.g. ``/api/exports/ideas.parquet``.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request, dataset, fmt):
+        try:
+            export = get_export(dataset, fmt)
+        except ExportError as exc:
+            raise NotFound(str(exc))
+        response = StreamingHttpResponse(render_export(export, fmt), content_type=CONTENT_TYPES[fmt])
+        filename = f'{dataset}-{timezone.localdate():%Y%m%d}.{fmt}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
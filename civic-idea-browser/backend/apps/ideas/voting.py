@@ -0,0 +1,155 @@
+"""
+Vote casting and vote counter maintenance for ideas.
+
+With ``VOTE_COUNTER_SHARDS`` set above 1, tally changes are written to one
+of N ``VoteCounterShard`` rows picked at random, so concurrent voters on a
+popular idea no longer serialize on the same ``Idea`` row. The
+``fold_vote_counters`` task moves the pending deltas onto the idea.
+Otherwise the idea counters are updated directly with ``F()`` expressions.
+"""
+import logging
+import random
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import Idea, Vote, VoteCounterShard
+from .responsecache import schedule_version_bump
+from .trending import schedule_trending_update
+
+logger = logging.getLogger(__name__)
+
+FOLD_BATCH_SIZE = 500
+
+
+def sharding_enabled():
+    return settings.VOTE_COUNTER_SHARDS > 1
+
+
+def apply_vote_delta(idea_id, up=0, down=0):
+    """
+    Add ``up``/``down`` to an idea's vote tallies.
+    
+    Goes through a random shard row when sharding is enabled, else updates
+    the ``Idea`` row directly.
+    """
+    if not up and not down:
+        return
+    
+    if not sharding_enabled():
+        Idea.objects.filter(pk=idea_id).update(
+            upvotes_count=F('upvotes_count') + up,
+            downvotes_count=F('downvotes_count') + down,
+            votes_count=F('votes_count') + up + down,
+        )
+        schedule_trending_update([idea_id])
+        schedule_version_bump([idea_id])
+        return
+    
+    shard = random.randrange(settings.VOTE_COUNTER_SHARDS)
+    shard_rows = VoteCounterShard.objects.filter(idea_id=idea_id, shard=shard)
+    if shard_rows.update(upvotes=F('upvotes') + up, downvotes=F('downvotes') + down):
+        return
+    try:
+        with transaction.atomic():
+            VoteCounterShard.objects.create(idea_id=idea_id, shard=shard, upvotes=up, downvotes=down)
+    except IntegrityError:
+        # Another voter created the shard first.
+        shard_rows.update(upvotes=F('upvotes') + up, downvotes=F('downvotes') + down)
+
+
+@transaction.atomic
+def cast_vote(idea, user, vote_type):
+    """
+    Record ``user``'s vote on ``idea``, replacing any previous vote.
+    
+    Returns ``(vote, created)``. A type change is applied with an update
+    conditional on the type just read, so of two concurrent requests making
+    the same change only the one that actually changed the row moves the
+    tallies.
+    """
+    vote, created = Vote.objects.get_or_create(
+        idea=idea, user=user, defaults={'vote_type': vote_type}
+    )
+    if created:
+        apply_vote_delta(idea.pk, **{vote_type: 1})
+    elif vote.vote_type != vote_type:
+        previous = vote.vote_type
+        vote.vote_type = vote_type
+        if Vote.objects.filter(pk=vote.pk, vote_type=previous).update(vote_type=vote_type):
+            apply_vote_delta(idea.pk, **{vote_type: 1, previous: -1})
+    return vote, created
+
+
+@transaction.atomic
+def retract_vote(idea, user):
+    """
+    Remove ``user``'s vote on ``idea``. Returns True if one existed.
+    
+    The tallies only move if this call deleted the row, so a concurrent
+    retraction of the same vote is not counted twice.
+    """
+    vote = Vote.objects.filter(idea=idea, user=user).first()
+    if vote is None:
+        return False
+    if Vote.objects.filter(pk=vote.pk).delete()[0] != 1:
+        return False
+    apply_vote_delta(idea.pk, **{vote.vote_type: -1})
+    return True
+
+
+def get_vote_tally(idea):
+    """
+    Return the current up/down/total/net tally for ``idea``, including
+    deltas that have not been folded yet.
+    """
+    up, down = Idea.objects.filter(pk=idea.pk).values_list('upvotes_count', 'downvotes_count').get()
+    if sharding_enabled():
+        pending = idea.vote_shards.aggregate(up=Sum('upvotes'), down=Sum('downvotes'))
+        up += pending['up'] or 0
+        down += pending['down'] or 0
+    return {'up': up, 'down': down, 'total': up + down, 'score': up - down}
+
+
+def fold_vote_counters(batch_size=FOLD_BATCH_SIZE):
+    """
+    Move pending shard deltas onto the ``Idea`` counters.
+    
+    Shard rows are locked while they are folded and reset, so increments
+    that arrive meanwhile wait instead of being lost. Returns the number of
+    ideas updated.
+    """
+    idea_ids = list(
+        VoteCounterShard.objects.exclude(upvotes=0, downvotes=0)
+        .values_list('idea_id', flat=True).distinct().order_by('idea_id')
+    )
+    
+    for start in range(0, len(idea_ids), batch_size):
+        with transaction.atomic():
+            shards = list(
+                VoteCounterShard.objects.select_for_update()
+                .filter(idea_id__in=idea_ids[start:start + batch_size])
+                .exclude(upvotes=0, downvotes=0)
+                .order_by('idea_id', 'shard')
+            )
+            totals = {}
+            for shard in shards:
+                up, down = totals.get(shard.idea_id, (0, 0))
+                totals[shard.idea_id] = (up + shard.upvotes, down + shard.downvotes)
+            
+            for idea_id, (up, down) in totals.items():
+                Idea.objects.filter(pk=idea_id).update(
+                    upvotes_count=F('upvotes_count') + up,
+                    downvotes_count=F('downvotes_count') + down,
+                    votes_count=F('votes_count') + up + down,
+                )
+            VoteCounterShard.objects.filter(pk__in=[shard.pk for shard in shards]).update(
+                upvotes=0, downvotes=0
+            )
+            schedule_trending_update(totals)
+            schedule_version_bump(totals)
+    
+    if idea_ids:
+        logger.info('Folded vote counter shards for %d ideas', len(idea_ids))
+    return len(idea_ids)
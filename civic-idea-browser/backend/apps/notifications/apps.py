@@ -0,0 +1,11 @@
+"""
+App configuration for the notifications app.
+"""
+from django.apps import AppConfig
+
+
+class NotificationsConfig(AppConfig):
+    name = 'apps.notifications'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,153 @@
+"""
+Email delivery of notifications according to ``digest_frequency``.
+
+``send_digests(frequency)`` streams unsent notifications for users on that
+frequency, ordered by recipient, and sends one email per recipient over a
+single reused SMTP connection. Rows are marked ``is_email_sent`` with one
+bulk ``UPDATE`` per batch once the batch has been handed to the mail
+server, so memory stays bounded by the batch size and a crashed run can
+simply be started again: it picks up the rows that are still unsent (at
+worst the last unfinished batch is delivered twice).
+
+Rows that will never be emailed (the recipient has no address, turned
+email off, is on ``never`` or opted out of the category) are read along
+with the rest and marked in the same ``UPDATE``, so they don't pile up in
+the pending index. Recipients on ``never`` are cleared by the
+``immediate`` run.
+"""
+import logging
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import BooleanField, Case, Q, Value, When
+
+from .fanout import PREFERENCE_CATEGORIES
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+DIGEST_MAX_ITEMS = 50
+UPDATE_CHUNK_SIZE = 1000
+LOCK_TIMEOUT = 60 * 60
+
+ROW_FIELDS = (
+    'pk', 'recipient_id', 'recipient__email', 'recipient__username',
+    'title', 'message', 'created_at', 'skip',
+)
+
+
+def pending_notifications(frequency):
+    """
+    Return unsent notifications of the recipients handled by the
+    ``frequency`` run, annotated with ``skip`` for those that must not be
+    emailed (see the module docstring). Users without a preference row get
+    the defaults (``immediate``).
+    """
+    preference = 'recipient__notification_preferences'
+    queryset = Notification.objects.filter(is_email_sent=False)
+    if frequency == 'immediate':
+        queryset = queryset.filter(
+            Q(**{f'{preference}__isnull': True})
+            | Q(**{f'{preference}__digest_frequency__in': ['immediate', 'never']})
+        )
+    else:
+        queryset = queryset.filter(**{f'{preference}__digest_frequency': frequency})
+    
+    skip = (
+        Q(recipient__email='')
+        | Q(recipient__email_notifications=False)
+        | Q(**{f'{preference}__email_notifications': False})
+        | Q(**{f'{preference}__digest_frequency': 'never'})
+    )
+    categories = {}
+    for notification_type, category in PREFERENCE_CATEGORIES.items():
+        categories.setdefault(category, []).append(notification_type)
+    for category, notification_types in categories.items():
+        skip |= Q(notification_type__in=notification_types, **{f'{preference}__email_{category}': False})
+    return queryset.annotate(
+        skip=Case(When(skip, then=Value(True)), default=Value(False), output_field=BooleanField())
+    )
+
+
+def build_digest(rows, total, frequency):
+    """Build the email for one recipient from up to ``DIGEST_MAX_ITEMS`` rows."""
+    _, _, email, username, first_title, _, _ = rows[0]
+    if total == 1:
+        subject = first_title
+    else:
+        label = 'Your' if frequency == 'immediate' else f'Your {frequency}'
+        subject = f'{label} Civic Ideas digest: {total} new notifications'
+    
+    lines = [f'Hi {username},', '']
+    for _, _, _, _, title, message, created_at in rows:
+        lines.append(f"- {title} ({created_at:%Y-%m-%d %H:%M})")
+        lines.append(f'  {message}')
+    if total > len(rows):
+        lines.append(f'...and {total - len(rows)} more.')
+    return EmailMessage(subject, '\n'.join(lines), settings.DEFAULT_FROM_EMAIL, [email])
+
+
+def send_digests(frequency, batch_size=None, chunk_size=None):
+    """
+    Send pending notification emails for ``frequency``.
+    
+    Returns ``{'digests': ..., 'notifications': ..., 'skipped': ...}``, or
+    None when another run for the same frequency is still in progress.
+    """
+    batch_size = batch_size or settings.NOTIFICATION_DIGEST_BATCH_SIZE
+    chunk_size = chunk_size or settings.NOTIFICATION_DIGEST_CHUNK_SIZE
+    lock_key = f'notifications:digest:{frequency}:lock'
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        logger.info('Skipping %s digests: a previous run is still in progress', frequency)
+        return None
+    
+    stats = {'digests': 0, 'notifications': 0, 'skipped': 0}
+    try:
+        rows = (
+            pending_notifications(frequency)
+            .order_by('recipient_id', 'pk')
+            .values_list(*ROW_FIELDS)
+            .iterator(chunk_size=chunk_size)
+        )
+        messages, handled_ids, emailed = [], [], 0
+        with get_connection() as connection:
+            for _, recipient_rows in groupby(rows, key=itemgetter(1)):
+                shown, total = [], 0
+                for row in recipient_rows:
+                    handled_ids.append(row[0])
+                    if row[-1]:
+                        stats['skipped'] += 1
+                        continue
+                    total += 1
+                    if len(shown) < DIGEST_MAX_ITEMS:
+                        shown.append(row[:-1])
+                if total:
+                    messages.append(build_digest(shown, total, frequency))
+                    emailed += total
+                if len(messages) >= batch_size or len(handled_ids) >= chunk_size:
+                    _deliver(connection, messages, handled_ids, emailed, stats)
+                    messages, handled_ids, emailed = [], [], 0
+            if handled_ids:
+                _deliver(connection, messages, handled_ids, emailed, stats)
+    finally:
+        cache.delete(lock_key)
+    
+    logger.info(
+        'Sent %d %s digests covering %d notifications, skipped %d',
+        stats['digests'], frequency, stats['notifications'], stats['skipped'],
+    )
+    return stats
+
+
+def _deliver(connection, messages, handled_ids, emailed, stats):
+    if messages:
+        connection.send_messages(messages)
+    for start in range(0, len(handled_ids), UPDATE_CHUNK_SIZE):
+        Notification.objects.filter(pk__in=handled_ids[start:start + UPDATE_CHUNK_SIZE]).update(
+            is_email_sent=True
+        )
+    stats['digests'] += len(messages)
+    stats['notifications'] += emailed
@@ -0,0 +1,167 @@
+"""
+Bulk notification fan-out.
+
+``notify_recipients`` hands a recipient spec and an event to the
+``fan_out_notification`` task. A spec is plain JSON, either the roles of
+the users around an idea (``idea_recipients``) or a list of user ids
+(``user_recipients``), and the task turns it back into a queryset with
+``load_recipients``. The task walks recipient ids in primary key
+order, drops users whose ``NotificationPreference`` opts out of the event in
+SQL, and writes the notifications with ``bulk_create``. Only one chunk of
+ids is held in memory at a time.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Notification
+from .unread import reset_unread_counts
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+# NotificationPreference push_<category> flag consulted for each type.
+PREFERENCE_CATEGORIES = {
+    'idea_created': 'idea_updates',
+    'idea_updated': 'idea_updates',
+    'idea_approved': 'idea_updates',
+    'idea_rejected': 'idea_updates',
+    'idea_implemented': 'idea_updates',
+    'comment_added': 'comments',
+    'mention': 'comments',
+    'vote_received': 'votes',
+    'collaboration_invite': 'collaboration',
+    'system': 'system',
+}
+
+
+def build_event(notification_type, title, message, sender=None, content_object=None, data=None):
+    """Return a JSON-serializable event for ``fan_out``."""
+    event = {
+        'notification_type': notification_type,
+        'title': title,
+        'message': message,
+        'sender_id': sender.pk if sender else None,
+        'content_type_id': None,
+        'object_id': None,
+        'data': data or {},
+    }
+    if content_object is not None:
+        event['content_type_id'] = ContentType.objects.get_for_model(content_object).pk
+        event['object_id'] = content_object.pk
+    return event
+
+
+IDEA_ROLES = ('author', 'collaborators', 'voters')
+
+
+def idea_recipients(idea, roles=IDEA_ROLES):
+    """Return a recipient spec for the users with ``roles`` on ``idea``."""
+    unknown = set(roles) - set(IDEA_ROLES)
+    if unknown:
+        raise ValueError(f'Unknown idea roles: {", ".join(sorted(unknown))}')
+    return {'idea_id': idea.pk, 'roles': list(roles)}
+
+
+def user_recipients(user_ids):
+    """Return a recipient spec for the given user ids."""
+    return {'user_ids': sorted(set(user_ids))}
+
+
+def load_recipients(spec):
+    """Return the ``User`` queryset described by a recipient spec."""
+    from apps.ideas.models import Idea, IdeaCollaborator, Vote
+    if 'user_ids' in spec:
+        return User.objects.filter(pk__in=spec['user_ids'])
+    
+    idea_id = spec['idea_id']
+    roles = {
+        'author': Idea.objects.filter(pk=idea_id).values('author_id'),
+        'collaborators': IdeaCollaborator.objects.filter(idea_id=idea_id).values('user_id'),
+        'voters': Vote.objects.filter(idea_id=idea_id).values('user_id'),
+    }
+    condition = Q(pk__in=[])
+    for role in spec['roles']:
+        condition |= Q(pk__in=roles[role])
+    return User.objects.filter(condition)
+
+
+def filter_by_preferences(queryset, notification_type):
+    """
+    Exclude users who turned off in-app notifications for this type.
+    Users without a preference row keep the defaults and are included.
+    """
+    queryset = queryset.exclude(notification_preferences__push_notifications=False)
+    category = PREFERENCE_CATEGORIES.get(notification_type)
+    if category:
+        queryset = queryset.exclude(**{f'notification_preferences__push_{category}': False})
+    return queryset
+
+
+def iter_recipient_ids(queryset, chunk_size):
+    """Yield distinct recipient ids in ascending chunks using keyset paging."""
+    ids = queryset.values_list('pk', flat=True).distinct()
+    last_id = 0
+    while True:
+        chunk = list(ids.filter(pk__gt=last_id).order_by('pk')[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]
+
+
+def fan_out(recipients, event, chunk_size=None, batch_size=None):
+    """
+    Create the ``event`` notification for every user in ``recipients``
+    except the sender. Returns ``{'created', 'seconds', 'per_second'}``.
+    """
+    chunk_size = chunk_size or settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+    batch_size = batch_size or settings.NOTIFICATION_FANOUT_BATCH_SIZE
+    started = time.monotonic()
+    
+    recipients = filter_by_preferences(recipients, event['notification_type'])
+    if event['sender_id']:
+        recipients = recipients.exclude(pk=event['sender_id'])
+    
+    created = 0
+    for chunk in iter_recipient_ids(recipients, chunk_size):
+        Notification.objects.bulk_create(
+            [Notification(recipient_id=recipient_id, **event) for recipient_id in chunk],
+            batch_size=batch_size,
+        )
+        reset_unread_counts(chunk)
+        created += len(chunk)
+    
+    seconds = time.monotonic() - started
+    stats = {
+        'created': created,
+        'seconds': round(seconds, 3),
+        'per_second': round(created / seconds) if seconds else created,
+    }
+    logger.info(
+        'Fanned out %s notification to %d recipients in %.2fs (%d/s)',
+        event['notification_type'], created, seconds, stats['per_second'],
+    )
+    return stats
+
+
+def notify_recipients(recipients, notification_type, title, message, sender=None, content_object=None, data=None):
+    """
+    Queue one notification for every user in the ``recipients`` spec once
+    the transaction commits. Id lists are split into one task per chunk.
+    """
+    from .tasks import fan_out_notification
+    event = build_event(notification_type, title, message, sender, content_object, data)
+    specs = [recipients]
+    if 'user_ids' in recipients:
+        chunk_size = settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+        ids = recipients['user_ids']
+        specs = [user_recipients(ids[start:start + chunk_size]) for start in range(0, len(ids), chunk_size)]
+    for spec in specs:
+        transaction.on_commit(lambda spec=spec: fan_out_notification.delay(spec, event))
@@ -65,8 +65,14 @@ class Notification(models.Model):
         verbose_name_plural = _('notifications')
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['recipient', 'is_read']),
+            models.Index(fields=['recipient', 'is_read', 'created_at']),
+            models.Index(fields=['recipient', 'created_at']),
             models.Index(fields=['notification_type', 'created_at']),
+            # Pending email scan in digest.send_digests().
+            models.Index(
+                fields=['recipient', 'id'], condition=models.Q(is_email_sent=False),
+                name='notification_email_pending',
+            ),
         ]
     
     def __str__(self):
@@ -77,8 +83,13 @@ class Notification(models.Model):
         if not self.is_read:
             self.is_read = True
             from django.utils import timezone
+            from .unread import adjust_unread_count
             self.read_at = timezone.now()
-            self.save(update_fields=['is_read', 'read_at'])
+            # Conditional update so concurrent reads only decrement the count once.
+            updated = Notification.objects.filter(pk=self.pk, is_read=False).update(
+                is_read=True, read_at=self.read_at
+            )
+            adjust_unread_count(self.recipient_id, -updated)
     
     @classmethod
     def create_notification(cls, recipient, notification_type, title, message, 
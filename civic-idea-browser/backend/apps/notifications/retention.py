@@ -0,0 +1,33 @@
+"""
+Retention policies for notifications.
+"""
+from apps.core.retention import RetentionPolicy
+from .unread import reset_unread_counts
+
+
+class ReadNotificationRetention(RetentionPolicy):
+    """
+    Delete read notifications after ``RETENTION_READ_NOTIFICATIONS_DAYS``.
+    """
+    name = 'read-notifications'
+    model = 'notifications.Notification'
+    date_field = 'created_at'
+    days_setting = 'RETENTION_READ_NOTIFICATIONS_DAYS'
+    filters = {'is_read': True}
+
+
+class NotificationRetention(RetentionPolicy):
+    """
+    Delete every notification after ``RETENTION_NOTIFICATIONS_DAYS``.
+    
+    Unread rows are removed too, and dropped partitions skip the delete
+    signals, so the cached unread counts of their recipients are reset.
+    """
+    name = 'notifications'
+    model = 'notifications.Notification'
+    date_field = 'created_at'
+    days_setting = 'RETENTION_NOTIFICATIONS_DAYS'
+    
+    def archive(self, queryset):
+        recipients = queryset.filter(is_read=False).order_by().values_list('recipient_id', flat=True).distinct()
+        reset_unread_counts(list(recipients))
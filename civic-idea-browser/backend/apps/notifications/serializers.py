@@ -0,0 +1,29 @@
+"""
+Serializers for the notifications app.
+"""
+from rest_framework import serializers
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Notification model.
+    """
+    sender = serializers.ReadOnlyField(source='sender.username')
+    
+    class Meta:
+        model = Notification
+        fields = [
+            'id', 'notification_type', 'title', 'message', 'sender',
+            'content_type', 'object_id', 'is_read', 'data', 'created_at', 'read_at'
+        ]
+        read_only_fields = fields
+
+
+class MarkReadSerializer(serializers.Serializer):
+    """
+    Serializer for marking notifications read; omit ``ids`` to mark all.
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, max_length=1000
+    )
@@ -0,0 +1,19 @@
+"""
+Signal handlers for the notifications app.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Notification
+from .unread import adjust_unread_count
+
+
+@receiver(post_save, sender=Notification)
+def count_new_unread(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        adjust_unread_count(instance.recipient_id, 1)
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_unread(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread_count(instance.recipient_id, -1)
@@ -0,0 +1,19 @@
+"""
+Celery tasks for the notifications app.
+"""
+from celery import shared_task
+
+from .digest import send_digests
+from .fanout import fan_out, load_recipients
+
+
+@shared_task
+def fan_out_notification(recipients, event):
+    """Create one notification per recipient; see ``fanout.notify_recipients``."""
+    return fan_out(load_recipients(recipients), event)
+
+
+@shared_task(ignore_result=True)
+def send_notification_digests(frequency):
+    """Email pending notifications to users on ``frequency`` delivery."""
+    return send_digests(frequency)
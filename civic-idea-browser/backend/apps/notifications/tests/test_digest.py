@@ -0,0 +1,32 @@
+"""
+Tests for notification email delivery.
+"""
+from django.core import mail
+
+from apps.notifications.digest import send_digests
+from apps.notifications.models import Notification, NotificationPreference
+
+
+def notify(user, notification_type='vote_received'):
+    return Notification.objects.create(
+        recipient=user, notification_type=notification_type, title=f'Hello {user.username}', message='Message',
+    )
+
+
+def test_skipped_notifications_are_marked_handled(make_user):
+    default, never, no_votes, daily = (make_user(name) for name in ('default', 'never', 'novotes', 'daily'))
+    NotificationPreference.objects.create(user=never, digest_frequency='never')
+    NotificationPreference.objects.create(user=no_votes, email_votes=False)
+    NotificationPreference.objects.create(user=daily, digest_frequency='daily')
+    no_email = make_user('noemail', email='')
+    for user in (default, never, no_votes, daily, no_email):
+        notify(user)
+    notify(no_votes, 'comment_added')
+    
+    stats = send_digests('immediate', batch_size=1, chunk_size=2)
+    
+    assert stats == {'digests': 2, 'notifications': 2, 'skipped': 3}
+    assert sorted(message.to[0] for message in mail.outbox) == ['default@example.com', 'novotes@example.com']
+    pending = Notification.objects.filter(is_email_sent=False).values_list('recipient__username', flat=True)
+    assert list(pending) == ['daily']
+    assert send_digests('immediate') == {'digests': 0, 'notifications': 0, 'skipped': 0}
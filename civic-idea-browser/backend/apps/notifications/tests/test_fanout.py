@@ -0,0 +1,58 @@
+"""
+Tests for bulk notification fan-out.
+"""
+import json
+
+import pytest
+
+from apps.ideas.models import IdeaCollaborator, Vote
+from apps.notifications import tasks
+from apps.notifications.fanout import idea_recipients, notify_recipients, user_recipients
+from apps.notifications.models import Notification
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    """Run queued fan-outs after a JSON round trip, as the broker would."""
+    specs = []
+    
+    def delay(recipients, event):
+        recipients, event = json.loads(json.dumps([recipients, event]))
+        specs.append(recipients)
+        return tasks.fan_out_notification(recipients, event)
+    monkeypatch.setattr(tasks.fan_out_notification, 'delay', delay)
+    return specs
+
+
+def test_status_change_notifies_author_collaborators_and_voters(
+        make_user, make_idea, queued, django_capture_on_commit_callbacks):
+    idea = make_idea()
+    collaborator, voter, bystander = make_user(), make_user(), make_user()
+    IdeaCollaborator.objects.create(idea=idea, user=collaborator)
+    Vote.objects.create(idea=idea, user=voter, vote_type='up')
+    Vote.objects.create(idea=idea, user=collaborator, vote_type='up')
+    
+    with django_capture_on_commit_callbacks(execute=True):
+        idea.status = 'approved'
+        idea.save()
+    
+    assert queued == [{'idea_id': idea.pk, 'roles': ['author', 'collaborators', 'voters']}]
+    recipients = Notification.objects.filter(notification_type='idea_approved').values_list('recipient', flat=True)
+    assert sorted(recipients) == sorted([idea.author_id, collaborator.pk, voter.pk])
+    assert bystander.pk not in recipients
+
+
+def test_user_ids_are_queued_in_chunks(make_user, queued, settings, django_capture_on_commit_callbacks):
+    settings.NOTIFICATION_FANOUT_CHUNK_SIZE = 2
+    users = [make_user() for _ in range(5)]
+    
+    with django_capture_on_commit_callbacks(execute=True):
+        notify_recipients(user_recipients(user.pk for user in users), 'system', 'Notice', 'Message')
+    
+    assert [len(spec['user_ids']) for spec in queued] == [2, 2, 1]
+    assert Notification.objects.filter(notification_type='system').count() == 5
+
+
+def test_unknown_idea_role_is_rejected(make_idea):
+    with pytest.raises(ValueError):
+        idea_recipients(make_idea(), roles=['followers'])
@@ -0,0 +1,106 @@
+"""
+Tests for cached unread notification counts.
+"""
+import time
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core import partitions
+from apps.notifications import unread
+from apps.notifications.models import Notification
+from apps.notifications.retention import NotificationRetention
+from apps.notifications.unread import get_unread_count
+from apps.users.serializers import ClaimsTokenObtainPairSerializer
+
+
+@pytest.fixture
+def old_unread(user, settings, django_capture_on_commit_callbacks):
+    settings.RETENTION_NOTIFICATIONS_DAYS = 30
+    with django_capture_on_commit_callbacks(execute=True):
+        for age in (0, 40, 50):
+            notification = Notification.objects.create(
+                recipient=user, notification_type='system', title='Notice', message='Message',
+            )
+            Notification.objects.filter(pk=notification.pk).update(
+                created_at=timezone.now() - timedelta(days=age)
+            )
+    assert get_unread_count(user.pk) == 3
+    return user
+
+
+def test_retention_delete_updates_unread_count(old_unread, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        stats = NotificationRetention().apply()
+    
+    assert stats['deleted'] == 2
+    assert get_unread_count(old_unread.pk) == 1
+
+
+def test_dropped_partition_resets_unread_count(old_unread, monkeypatch, django_capture_on_commit_callbacks):
+    # Stand-in for a PostgreSQL partition drop: rows vanish without signals.
+    def drop_partition(name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{Notification._meta.db_table}" WHERE "created_at" < %s', [upper])
+    
+    upper = timezone.now() - timedelta(days=35)
+    monkeypatch.setattr(partitions, 'is_partitioned', lambda table: True)
+    monkeypatch.setattr(partitions, 'list_partitions', lambda table: [('old', upper - timedelta(days=30), upper)])
+    monkeypatch.setattr(partitions, 'drop_partition', drop_partition)
+    
+    with django_capture_on_commit_callbacks(execute=True):
+        stats = NotificationRetention().apply()
+    
+    assert stats == {'deleted': 0, 'partitions_dropped': 1}
+    assert get_unread_count(old_unread.pk) == 1
+
+
+def notify(user):
+    return Notification.objects.create(
+        recipient=user, notification_type='system', title='Notice', message='Message',
+    )
+
+
+def test_count_rebuilt_during_a_write_expires(user, settings, monkeypatch, django_capture_on_commit_callbacks):
+    settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT = 1
+    real_add = unread.cache.add
+    
+    def add_after_a_concurrent_write(*args, **kwargs):
+        # A notification commits between the COUNT and the add, so its incr is dropped.
+        monkeypatch.setattr(unread.cache, 'add', real_add)
+        with django_capture_on_commit_callbacks(execute=True):
+            notify(user)
+        return real_add(*args, **kwargs)
+    monkeypatch.setattr(unread.cache, 'add', add_after_a_concurrent_write)
+    
+    assert get_unread_count(user.pk) == 0
+    assert get_unread_count(user.pk) == 0
+    time.sleep(1.1)
+    assert get_unread_count(user.pk) == 1
+
+
+def test_unread_count_poll(api_client, user, django_capture_on_commit_callbacks, django_assert_num_queries):
+    token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    url = reverse('notifications:unread_count')
+    with django_capture_on_commit_callbacks(execute=True):
+        notify(user)
+    
+    assert api_client.get(url).data == {'unread_count': 1}
+    with django_assert_num_queries(0):
+        assert api_client.get(url).data == {'unread_count': 1}
+
+
+def test_unread_count_rejects_deactivated_users(api_client, user, django_capture_on_commit_callbacks):
+    token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    with django_capture_on_commit_callbacks(execute=True):
+        user.is_active = False
+        user.save()
+    
+    response = api_client.get(reverse('notifications:unread_count'))
+    
+    assert response.status_code == 401
@@ -0,0 +1,78 @@
+"""
+Cached per-user unread notification counts.
+
+Counts live in the default cache (Redis in production, local memory in
+development) under ``notifications:unread:<user_id>``. A missing entry is
+rebuilt with one ``COUNT`` on the next read; after that, creating and
+reading notifications only adjust it with atomic ``incr``/``decr``, so
+polling the count runs at most one query per
+``NOTIFICATION_UNREAD_CACHE_TIMEOUT``. Adjustments to a missing entry are
+dropped since the next read rebuilds it anyway. Bulk writes and removals
+that bypass the signals (fan-out, dropped partitions in
+``retention.NotificationRetention``) reset the affected counts instead.
+
+An adjustment committed while a read is rebuilding the entry (after its
+``COUNT``, before its ``cache.add``) is lost, and the stored count stays
+one off. Rebuilt entries therefore expire after the short timeout instead
+of living until the next reset; adjustments do not extend it.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+
+KEY_PREFIX = 'notifications:unread:'
+
+
+def _key(user_id):
+    return f'{KEY_PREFIX}{user_id}'
+
+
+def get_unread_count(user_id):
+    """
+    Return the number of unread notifications for ``user_id``, rebuilding
+    the cached count for ``NOTIFICATION_UNREAD_CACHE_TIMEOUT`` on a miss.
+    """
+    count = cache.get(_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        cache.add(_key(user_id), count, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """Add ``delta`` to the cached count once the current transaction commits."""
+    if not delta:
+        return
+    
+    def apply():
+        try:
+            count = cache.incr(_key(user_id), delta)
+        except ValueError:
+            return
+        if count < 0:
+            cache.delete(_key(user_id))
+    
+    transaction.on_commit(apply)
+
+
+def reset_unread_counts(user_ids):
+    """Drop cached counts so they are rebuilt, e.g. after a ``bulk_create``."""
+    keys = [_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def mark_read(user_id, ids=None):
+    """
+    Mark ``user_id``'s unread notifications read with one ``UPDATE``,
+    limited to ``ids`` if given. Returns the number of rows changed.
+    """
+    queryset = Notification.objects.filter(recipient_id=user_id, is_read=False)
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    updated = queryset.update(is_read=True, read_at=timezone.now())
+    adjust_unread_count(user_id, -updated)
+    return updated
@@ -0,0 +1,13 @@
+"""
+URL patterns for the notifications app.
+"""
+from django.urls import path
+from . import views
+
+app_name = 'notifications'
+
+urlpatterns = [
+    path('notifications/', views.NotificationListView.as_view(), name='notification_list'),
+    path('notifications/unread-count/', views.UnreadCountView.as_view(), name='unread_count'),
+    path('notifications/mark-read/', views.MarkReadView.as_view(), name='mark_read'),
+]
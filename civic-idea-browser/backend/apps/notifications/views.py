@@ -0,0 +1,58 @@
+"""
+Views for the notifications app.
+"""
+from rest_framework import generics, permissions, status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django_filters.rest_framework import DjangoFilterBackend
+from apps.core.pagination import FeedCursorPagination
+from apps.users.authentication import ClaimsJWTAuthentication
+from .models import Notification
+from .serializers import NotificationSerializer, MarkReadSerializer
+from .unread import get_unread_count, mark_read
+
+
+class NotificationListView(generics.ListAPIView):
+    """
+    View for listing the current user's notifications, newest first.
+    """
+    authentication_classes = [ClaimsJWTAuthentication, SessionAuthentication]
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedCursorPagination
+    filterset_fields = ['is_read', 'notification_type']
+    filter_backends = [DjangoFilterBackend]
+    
+    def get_queryset(self):
+        return Notification.objects.filter(recipient=self.request.user).select_related('sender')
+
+
+class UnreadCountView(APIView):
+    """
+    View for polling the current user's unread notification count.
+    
+    Uses the default authentication, so a deactivated user is rejected.
+    The user and the count both come from the cache, so a poll
+    only queries when the count is rebuilt.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        return Response({'unread_count': get_unread_count(request.user.pk)})
+
+
+class MarkReadView(APIView):
+    """
+    View for marking the given notification ids, or all notifications, read.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = mark_read(request.user.pk, serializer.validated_data.get('ids'))
+        return Response(
+            {'marked_read': updated, 'unread_count': get_unread_count(request.user.pk)},
+            status=status.HTTP_200_OK
+        )
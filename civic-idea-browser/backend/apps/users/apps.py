@@ -0,0 +1,11 @@
+"""
+App configuration for the users app.
+"""
+from django.apps import AppConfig
+
+
+class UsersConfig(AppConfig):
+    name = 'apps.users'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,74 @@
+"""
+JWT authentication backed by the cached user lookup in ``usercache``.
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .usercache import claims_revoked_at, get_cached_user, user_from_values
+
+# User fields copied into access tokens by ClaimsTokenObtainPairSerializer.
+USER_CLAIMS = ('username', 'email', 'is_staff', 'is_superuser')
+# When the claims were read from the user; kept on refresh, unlike ``iat``.
+CLAIMS_ISSUED_AT = 'claims_iat'
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that resolves the token's user from the two-tier
+    user cache instead of querying for it on every request.
+    """
+    
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        # The password is not cached; reading it here costs one query per request.
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+
+class ClaimsJWTAuthentication(CachedJWTAuthentication):
+    """
+    For read-only requests, build the user from the token's claims without
+    any lookup; other requests resolve the user as ``CachedJWTAuthentication``.
+    
+    The user is a ``User`` with only ``id`` and ``USER_CLAIMS`` loaded, so
+    it works in queryset filters and permission checks, and any other field
+    is loaded from the database when accessed. Claims are set at login and
+    carried over on refresh. Saving, deactivating or deleting a user
+    revokes the claims issued before (``usercache.claims_revoked_at``, one
+    cache read per request), and those tokens are then checked against the
+    stored user, so a deactivated user is rejected and a demoted one loses
+    their flags. Set it as ``authentication_classes`` on read-heavy views
+    that only need the user's id and flags.
+    """
+    
+    def authenticate(self, request):
+        self.read_only = request.method in SAFE_METHODS
+        return super().authenticate(request)
+    
+    def get_user(self, validated_token):
+        claims = {api_settings.USER_ID_FIELD: validated_token.get(api_settings.USER_ID_CLAIM)}
+        claims.update((name, validated_token.get(name)) for name in USER_CLAIMS)
+        issued_at = validated_token.get(CLAIMS_ISSUED_AT)
+        if not self.read_only or issued_at is None or None in claims.values():
+            # Writes, and tokens issued without the claims, use the stored user.
+            return super().get_user(validated_token)
+        revoked_at = claims_revoked_at(claims[api_settings.USER_ID_FIELD])
+        if revoked_at is not None and issued_at <= revoked_at:
+            return super().get_user(validated_token)
+        return user_from_values({**claims, 'is_active': True})
@@ -1,11 +1,44 @@
 """
 User models for the Civic Ideas platform.
 """
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _
 
 
+class UserQuerySet(models.QuerySet):
+    """
+    QuerySet for users.
+    """
+    
+    def with_activity_counts(self):
+        """
+        Annotate ``annotated_ideas_count`` and ``annotated_votes_count`` with
+        correlated subqueries, so a page of users is a single query.
+        """
+        from apps.ideas.models import Idea, Vote
+        return self.annotate(
+            annotated_ideas_count=self._count_subquery(Idea, 'author'),
+            annotated_votes_count=self._count_subquery(Vote, 'user'),
+        )
+    
+    @staticmethod
+    def _count_subquery(model, field):
+        counts = (
+            model.objects.filter(**{field: OuterRef('pk')}).order_by()
+            .values(field).annotate(count=Count('pk')).values('count')
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class CivicUserManager(UserManager.from_queryset(UserQuerySet)):
+    """
+    Default user manager with the ``UserQuerySet`` methods.
+    """
+
+
 class User(AbstractUser):
     """
     Custom User model with extended fields for Civic Ideas platform.
@@ -13,6 +46,8 @@ class User(AbstractUser):
     email = models.EmailField(_('email address'), unique=True)
     bio = models.TextField(_('bio'), max_length=500, blank=True)
     avatar = models.ImageField(_('avatar'), upload_to='avatars/', blank=True, null=True)
+    # Thumbnails and WebP versions of the avatar, see apps.core.images.
+    avatar_variants = models.JSONField(_('avatar variants'), default=dict, blank=True, editable=False)
     location = models.CharField(_('location'), max_length=100, blank=True)
     website = models.URLField(_('website'), blank=True)
     is_verified = models.BooleanField(_('verified'), default=False)
@@ -26,6 +61,8 @@ class User(AbstractUser):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     
+    objects = CivicUserManager()
+    
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
     
@@ -45,11 +82,15 @@ class User(AbstractUser):
     @property
     def ideas_count(self):
         """Return the number of ideas submitted by the user."""
+        if hasattr(self, 'annotated_ideas_count'):
+            return self.annotated_ideas_count
         return self.ideas.count()
     
     @property
     def votes_count(self):
         """Return the number of votes cast by the user."""
+        if hasattr(self, 'annotated_votes_count'):
+            return self.annotated_votes_count
         return self.votes.count()
 
 
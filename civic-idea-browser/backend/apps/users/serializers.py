@@ -1,9 +1,14 @@
 """
 Serializers for the users app.
 """
+import time
+
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from apps.core.serializers import ImageVariantsField, ValuesSerializer
+from .authentication import CLAIMS_ISSUED_AT, USER_CLAIMS
 from .models import UserProfile
 
 User = get_user_model()
@@ -16,18 +21,37 @@ class UserSerializer(serializers.ModelSerializer):
     full_name = serializers.ReadOnlyField()
     ideas_count = serializers.ReadOnlyField()
     votes_count = serializers.ReadOnlyField()
+    avatar_variants = ImageVariantsField('avatar')
     
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name', 'full_name',
-            'bio', 'avatar', 'location', 'website', 'is_verified',
+            'bio', 'avatar', 'avatar_variants', 'location', 'website', 'is_verified',
             'date_of_birth', 'email_notifications', 'push_notifications',
             'ideas_count', 'votes_count', 'date_joined', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'is_verified', 'date_joined', 'created_at', 'updated_at']
 
 
+class UserValuesSerializer(ValuesSerializer):
+    """
+    Fast-path ``UserSerializer`` for user lists annotated with
+    ``with_activity_counts()``.
+    """
+    serializer_class = UserSerializer
+    columns = {
+        'ideas_count': 'annotated_ideas_count',
+        'votes_count': 'annotated_votes_count',
+    }
+    computed = {
+        'full_name': (
+            ('first_name', 'last_name', 'username'),
+            lambda row: f"{row['first_name']} {row['last_name']}".strip() or row['username'],
+        ),
+    }
+
+
 class UserCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating new users.
@@ -107,4 +131,19 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
     def validate(self, attrs):
         if attrs['new_password'] != attrs['new_password_confirm']:
             raise serializers.ValidationError("Passwords don't match")
-        return attrs 
\ No newline at end of file
+        return attrs 
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token pair serializer that adds ``USER_CLAIMS`` to the tokens, so
+    ``ClaimsJWTAuthentication`` can serve read-only requests without a lookup.
+    """
+    
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for name in USER_CLAIMS:
+            token[name] = getattr(user, name)
+        token[CLAIMS_ISSUED_AT] = time.time()
+        return token
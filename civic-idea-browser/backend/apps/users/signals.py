@@ -0,0 +1,28 @@
+"""
+Signal handlers for the users app.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.core.images import schedule_variants
+from .usercache import invalidate_cached_users
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_saved_user(sender, instance, created, **kwargs):
+    # Covers profile edits, deactivation and set_password() followed by save().
+    if not created:
+        invalidate_cached_users([instance.pk])
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_cached_users([instance.pk])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def render_avatar_variants(sender, instance, update_fields=None, **kwargs):
+    """Queue thumbnails and WebP versions of a new avatar."""
+    if update_fields is not None and 'avatar' not in update_fields:
+        return
+    schedule_variants('avatar', instance.avatar.name, instance.avatar_variants)
@@ -0,0 +1,100 @@
+"""
+Tests for JWT authentication from token claims.
+"""
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from apps.users import authentication
+from apps.users.models import User
+from apps.users.serializers import ClaimsTokenObtainPairSerializer
+from apps.users.usercache import KEY_PREFIX, get_cached_user, invalidate_cached_users, local_cache
+
+
+@pytest.fixture
+def token_client(api_client, user):
+    token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return api_client
+
+
+def test_claims_serve_reads_without_a_user_lookup(token_client, django_assert_num_queries):
+    with django_assert_num_queries(1):  # the list page
+        response = token_client.get(reverse('ideas:idea_list'))
+    
+    assert response.status_code == 200
+
+
+def test_deactivated_user_is_rejected(token_client, user, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        user.is_active = False
+        user.save()
+    
+    response = token_client.get(reverse('ideas:idea_list'))
+    
+    assert response.status_code == 401
+
+
+def test_bulk_deactivation_is_rejected_after_invalidation(token_client, user, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        invalidate_cached_users([user.pk])
+    
+    response = token_client.get(reverse('ideas:idea_list'))
+    
+    assert response.status_code == 401
+
+
+def test_tokens_issued_after_a_change_use_the_claims_again(
+        api_client, user, django_capture_on_commit_callbacks, django_assert_num_queries):
+    with django_capture_on_commit_callbacks(execute=True):
+        user.first_name = 'Alice'
+        user.save()
+    token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    
+    with django_assert_num_queries(1):
+        response = api_client.get(reverse('ideas:idea_list'))
+    
+    assert response.status_code == 200
+
+
+def test_cached_users_hold_no_credentials(token_client, user, django_assert_num_queries):
+    token_client.get(reverse('notifications:unread_count'))
+    
+    for values in (cache.get(f'{KEY_PREFIX}{user.pk}'), local_cache.get(user.pk)):
+        assert values['username'] == 'alice'
+        assert 'password' not in values
+    
+    # Checking the password loads it from the database.
+    cached = get_cached_user(user.pk)
+    with django_assert_num_queries(1):
+        assert cached.check_password('password')
+
+
+def test_password_change_through_a_cached_user(api_client, user, django_capture_on_commit_callbacks):
+    token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    payload = {'old_password': 'password', 'new_password': 'Tr33s-and-bikes', 'new_password_confirm': 'Tr33s-and-bikes'}
+    
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(reverse('users:change_password'), payload)
+    
+    assert response.status_code == 200
+    user.refresh_from_db()
+    assert user.check_password('Tr33s-and-bikes')
+    assert user.username == 'alice' and user.is_active
+
+
+def test_revoke_check_reads_the_password_from_the_database(api_client, user, monkeypatch, django_capture_on_commit_callbacks):
+    monkeypatch.setattr(authentication.api_settings, 'CHECK_REVOKE_TOKEN', True)
+    token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    url = reverse('notifications:unread_count')
+    assert api_client.get(url).status_code == 200
+    
+    with django_capture_on_commit_callbacks(execute=True):
+        user.set_password('Tr33s-and-bikes')
+        user.save()
+    
+    assert api_client.get(url).status_code == 401
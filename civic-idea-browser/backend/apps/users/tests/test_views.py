@@ -0,0 +1,38 @@
+"""
+Tests for the users API views.
+"""
+import pytest
+from django.urls import reverse
+
+from apps.ideas.models import Vote
+
+
+@pytest.fixture
+def admin_client(api_client, make_user):
+    api_client.force_authenticate(make_user('admin', is_staff=True))
+    return api_client
+
+
+def add_activity(make_user, make_idea, users):
+    for _ in range(users):
+        author = make_user()
+        for _ in range(3):
+            idea = make_idea(author=author)
+            Vote.objects.create(idea=idea, user=author, vote_type='up')
+
+
+@pytest.mark.parametrize('users', [1, 25])
+def test_user_list_query_count_does_not_grow_with_users_or_ideas(
+        admin_client, make_user, make_idea, django_assert_num_queries, users):
+    add_activity(make_user, make_idea, users)
+    
+    # One COUNT for the paginator and one SELECT for the page, with the
+    # idea and vote counts as correlated subqueries.
+    with django_assert_num_queries(2):
+        response = admin_client.get(reverse('users:user_list'))
+    
+    assert response.status_code == 200
+    assert response.data['count'] == users + 2
+    active = [row for row in response.data['results'] if row['username'] not in ('admin', 'alice')]
+    assert len(active) == min(users, 20)
+    assert all(row['ideas_count'] == 3 and row['votes_count'] == 3 for row in active)
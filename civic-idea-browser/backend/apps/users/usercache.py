@@ -0,0 +1,147 @@
+"""
+Two-tier cache of the users resolved by JWT authentication.
+
+Authenticating a token otherwise costs one ``SELECT`` on the user table per
+request. Resolved users are kept as their column values in a small
+per-process LRU for ``AUTH_USER_CACHE_LOCAL_TIMEOUT`` seconds, backed by the
+default cache (Redis in production) under ``users:auth:<user_id>`` for
+``AUTH_USER_CACHE_TIMEOUT`` seconds. Each lookup builds a fresh ``User``
+instance from those values, so a request can modify and save its user
+without affecting other requests.
+
+Credentials (``UNCACHED_FIELDS``) are never cached. They are left deferred
+on the cached users and read from the database by the code that needs
+them, e.g. ``check_password()``.
+
+Saving or deleting a user drops both tiers once the transaction commits,
+which covers profile edits, deactivation and password changes. Other
+processes may serve their local copy until it expires, so the local
+timeout is the longest a change can take to be seen everywhere. Code that
+changes users with ``QuerySet.update()`` should call
+``invalidate_cached_users``.
+
+Invalidating a user also records when their token claims were revoked,
+under ``users:claims-revoked:<user_id>``, so ``ClaimsJWTAuthentication``
+stops trusting the claims of tokens issued before the change.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework_simplejwt.settings import api_settings
+
+KEY_PREFIX = 'users:auth:'
+REVOKED_PREFIX = 'users:claims-revoked:'
+UNCACHED_FIELDS = ('password',)
+
+
+def _key(user_id):
+    return f'{KEY_PREFIX}{user_id}'
+
+
+def _revoked_key(user_id):
+    return f'{REVOKED_PREFIX}{user_id}'
+
+
+class LocalUserCache:
+    """
+    Thread-safe LRU of ``user_id -> column values`` with a fixed timeout.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+    
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return values
+    
+    def set(self, user_id, values):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + settings.AUTH_USER_CACHE_LOCAL_TIMEOUT, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.AUTH_USER_CACHE_LOCAL_SIZE:
+                self._entries.popitem(last=False)
+    
+    def discard(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalUserCache()
+
+
+def user_from_values(values):
+    """Build a ``User`` loaded from ``{attname: value}`` as if read from the database."""
+    User = get_user_model()
+    return User.from_db(DEFAULT_DB_ALIAS, list(values), list(values.values()))
+
+
+def get_cached_user(user_id):
+    """
+    Return the active or inactive ``User`` with ``user_id``, or None if it
+    does not exist, reading the database only when neither tier has it.
+    """
+    if settings.AUTH_USER_CACHE_TIMEOUT <= 0:
+        return get_user_model().objects.filter(pk=user_id).first()
+    
+    values = local_cache.get(user_id)
+    if values is None:
+        values = cache.get(_key(user_id))
+        if values is None:
+            user = get_user_model().objects.defer(*UNCACHED_FIELDS).filter(pk=user_id).first()
+            if user is None:
+                return None
+            values = {
+                field.attname: getattr(user, field.attname) for field in user._meta.concrete_fields
+                if field.attname not in UNCACHED_FIELDS
+            }
+            cache.set(_key(user_id), values, settings.AUTH_USER_CACHE_TIMEOUT)
+        local_cache.set(user_id, values)
+    return user_from_values(values)
+
+
+def invalidate_cached_users(user_ids, revoke_claims=True):
+    """
+    Drop cached users in both tiers once the current transaction commits
+    and, unless ``revoke_claims`` is False, revoke the claims of their
+    tokens issued until then.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    
+    def drop():
+        local_cache.discard(user_ids)
+        cache.delete_many([_key(user_id) for user_id in user_ids])
+        if revoke_claims:
+            # Claims are carried over on refresh, so they can't outlive the refresh token.
+            revoked_at = time.time()
+            cache.set_many(
+                {_revoked_key(user_id): revoked_at for user_id in user_ids},
+                api_settings.REFRESH_TOKEN_LIFETIME.total_seconds(),
+            )
+    
+    transaction.on_commit(drop)
+
+
+def claims_revoked_at(user_id):
+    """Return when ``user_id``'s token claims were last revoked, as a timestamp, or None."""
+    return cache.get(_revoked_key(user_id))
@@ -9,9 +9,10 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from apps.core.views import FastListMixin
 from .models import UserProfile
 from .serializers import (
-    UserSerializer, UserCreateSerializer, UserProfileSerializer,
+    UserSerializer, UserValuesSerializer, UserCreateSerializer, UserProfileSerializer,
     ChangePasswordSerializer, PasswordResetSerializer, PasswordResetConfirmSerializer
 )
 
@@ -42,7 +43,7 @@ class UserProfileDetailView(generics.RetrieveAPIView):
     """
     View for retrieving public user profiles.
     """
-    queryset = User.objects.all()
+    queryset = User.objects.with_activity_counts()
     serializer_class = UserSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = 'username'
@@ -142,12 +143,13 @@ def verify_email_view(request):
     )
 
 
-class UserListView(generics.ListAPIView):
+class UserListView(FastListMixin, generics.ListAPIView):
     """
     View for listing users (admin only).
     """
-    queryset = User.objects.all()
+    queryset = User.objects.with_activity_counts()
     serializer_class = UserSerializer
+    fast_serializer_class = UserValuesSerializer
     permission_classes = [permissions.IsAdminUser]
     filterset_fields = ['is_active', 'is_verified', 'date_joined']
     search_fields = ['username', 'email', 'first_name', 'last_name']
@@ -4,6 +4,7 @@ Django settings for civic_ideas project.
 
 import os
 from pathlib import Path
+from celery.schedules import crontab
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +42,7 @@ THIRD_PARTY_APPS = [
 ]
 
 LOCAL_APPS = [
+    'apps.core',
     'apps.users',
     'apps.ideas',
     'apps.categories',
@@ -59,6 +61,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'apps.core.middleware.QueryInstrumentationMiddleware',
 ]
 
 ROOT_URLCONF = 'civic_ideas.urls'
@@ -136,7 +139,7 @@ SITE_ID = 1
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -172,6 +175,7 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
     'JTI_CLAIM': 'jti',
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.users.serializers.ClaimsTokenObtainPairSerializer',
 }
 
 # CORS Settings
@@ -192,6 +196,137 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Idea view counting: views are buffered (Redis, or in-process without it)
+# and written in batches by the flush_idea_views task.
+IDEA_VIEWS_FLUSH_INTERVAL = config('IDEA_VIEWS_FLUSH_INTERVAL', default=30, cast=int)  # seconds
+IDEA_VIEWS_FLUSH_BATCH_SIZE = config('IDEA_VIEWS_FLUSH_BATCH_SIZE', default=1000, cast=int)
+IDEA_VIEWS_FLUSH_MAX_BATCHES = config('IDEA_VIEWS_FLUSH_MAX_BATCHES', default=50, cast=int)
+IDEA_VIEWS_DEDUP_WINDOW = config('IDEA_VIEWS_DEDUP_WINDOW', default=1800, cast=int)  # seconds
+
+# Vote counters: with more than one shard, votes increment a random
+# VoteCounterShard row and fold_vote_counters moves the totals onto Idea.
+VOTE_COUNTER_SHARDS = config('VOTE_COUNTER_SHARDS', default=0, cast=int)
+VOTE_COUNTER_FOLD_INTERVAL = config('VOTE_COUNTER_FOLD_INTERVAL', default=15, cast=int)  # seconds
+
+# Idea full-text search ranking
+IDEA_SEARCH_CONFIG = config('IDEA_SEARCH_CONFIG', default='english')  # PostgreSQL text search config
+IDEA_SEARCH_VOTES_WEIGHT = config('IDEA_SEARCH_VOTES_WEIGHT', default=0.2, cast=float)
+IDEA_SEARCH_RECENCY_HALF_LIFE_DAYS = config('IDEA_SEARCH_RECENCY_HALF_LIFE_DAYS', default=30, cast=float)
+
+# Trending leaderboard: an idea needs 10x the engagement of one published
+# TRENDING_DECAY_HOURS later to rank level with it.
+TRENDING_DECAY_HOURS = config('TRENDING_DECAY_HOURS', default=12, cast=float)
+TRENDING_REBUILD_INTERVAL = config('TRENDING_REBUILD_INTERVAL', default=3600, cast=int)  # seconds
+
+# List endpoints with a fast_serializer_class serialize .values() rows
+# directly; set to False to fall back to their ModelSerializers.
+FAST_SERIALIZERS_ENABLED = config('FAST_SERIALIZERS_ENABLED', default=True, cast=bool)
+
+# Idea list/detail response cache, invalidated by version bumps. Set the
+# timeout to 0 to turn it off, or list endpoints ('list', 'detail') to skip.
+IDEA_RESPONSE_CACHE_TIMEOUT = config('IDEA_RESPONSE_CACHE_TIMEOUT', default=300, cast=int)  # seconds
+IDEA_RESPONSE_CACHE_DISABLED = [
+    endpoint for endpoint in config('IDEA_RESPONSE_CACHE_DISABLED', default='').split(',') if endpoint
+]
+
+# Chunked uploads (apps.ideas.uploads): each PUT carries at most
+# UPLOAD_CHUNK_MAX_SIZE bytes, streamed to storage; files up to UPLOAD_MAX_SIZE.
+UPLOAD_CHUNK_MAX_SIZE = config('UPLOAD_CHUNK_MAX_SIZE', default=8 * 1024 * 1024, cast=int)  # bytes
+UPLOAD_MAX_SIZE = config('UPLOAD_MAX_SIZE', default=2 * 1024 * 1024 * 1024, cast=int)  # bytes
+
+# Image thumbnails and WebP versions (apps.core.images), encoded at this quality.
+IMAGE_VARIANT_QUALITY = config('IMAGE_VARIANT_QUALITY', default=80, cast=int)
+
+# Users resolved by JWT authentication are cached in-process for
+# AUTH_USER_CACHE_LOCAL_TIMEOUT seconds and in the default cache for
+# AUTH_USER_CACHE_TIMEOUT seconds (0 disables it); see apps.users.usercache.
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=60, cast=int)  # seconds
+AUTH_USER_CACHE_LOCAL_TIMEOUT = config('AUTH_USER_CACHE_LOCAL_TIMEOUT', default=5, cast=float)  # seconds
+AUTH_USER_CACHE_LOCAL_SIZE = config('AUTH_USER_CACHE_LOCAL_SIZE', default=1024, cast=int)
+
+# Per-request query/cache instrumentation (Server-Timing header, JSON log
+# line, /api/metrics/) for this fraction of requests; 0 turns it off. Query
+# shapes repeated N_PLUS_ONE_THRESHOLD times in a request are logged as N+1.
+REQUEST_INSTRUMENTATION_SAMPLE_RATE = config('REQUEST_INSTRUMENTATION_SAMPLE_RATE', default=0.0, cast=float)
+REQUEST_INSTRUMENTATION_N_PLUS_ONE_THRESHOLD = config('REQUEST_INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+REQUEST_METRICS_TOKEN = config('REQUEST_METRICS_TOKEN', default='')
+
+# Notification fan-out: recipient ids are read in chunks and inserted in batches.
+NOTIFICATION_FANOUT_CHUNK_SIZE = config('NOTIFICATION_FANOUT_CHUNK_SIZE', default=5000, cast=int)
+NOTIFICATION_FANOUT_BATCH_SIZE = config('NOTIFICATION_FANOUT_BATCH_SIZE', default=1000, cast=int)
+
+# Notification emails: immediate deliveries are batched every
+# NOTIFICATION_EMAIL_INTERVAL seconds, digests go out at NOTIFICATION_DIGEST_HOUR.
+NOTIFICATION_EMAIL_INTERVAL = config('NOTIFICATION_EMAIL_INTERVAL', default=60, cast=int)  # seconds
+NOTIFICATION_DIGEST_HOUR = config('NOTIFICATION_DIGEST_HOUR', default=7, cast=int)
+NOTIFICATION_DIGEST_BATCH_SIZE = config('NOTIFICATION_DIGEST_BATCH_SIZE', default=200, cast=int)  # emails
+NOTIFICATION_DIGEST_CHUNK_SIZE = config('NOTIFICATION_DIGEST_CHUNK_SIZE', default=2000, cast=int)  # rows
+
+# Cached unread notification counts (rebuilt with one COUNT when missing).
+# Kept short: it bounds how long a count rebuilt while a notification was
+# being created can stay one off.
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = config('NOTIFICATION_UNREAD_CACHE_TIMEOUT', default=120, cast=int)  # seconds
+
+# Daily engagement rollups (IdeaDailyStats), updated incrementally.
+ANALYTICS_ROLLUP_INTERVAL = config('ANALYTICS_ROLLUP_INTERVAL', default=300, cast=int)  # seconds
+ANALYTICS_ROLLUP_BATCH_SIZE = config('ANALYTICS_ROLLUP_BATCH_SIZE', default=50000, cast=int)  # ids per batch
+ANALYTICS_ROLLUP_DELAY = config('ANALYTICS_ROLLUP_DELAY', default=120, cast=int)  # seconds before events are rolled up
+
+# Data retention: policies delete (or roll up, then delete) rows older than
+# the given number of days; 0 disables a policy. See apps.core.retention.
+DATA_RETENTION_POLICIES = [
+    'apps.notifications.retention.ReadNotificationRetention',
+    'apps.notifications.retention.NotificationRetention',
+    'apps.ideas.retention.IdeaViewRetention',
+    'apps.ideas.retention.UploadSessionRetention',
+    'apps.ideas.retention.UnreferencedBlobRetention',
+]
+RETENTION_READ_NOTIFICATIONS_DAYS = config('RETENTION_READ_NOTIFICATIONS_DAYS', default=90, cast=int)
+RETENTION_NOTIFICATIONS_DAYS = config('RETENTION_NOTIFICATIONS_DAYS', default=365, cast=int)
+RETENTION_IDEA_VIEWS_DAYS = config('RETENTION_IDEA_VIEWS_DAYS', default=30, cast=int)
+RETENTION_UPLOAD_SESSIONS_DAYS = config('RETENTION_UPLOAD_SESSIONS_DAYS', default=2, cast=int)
+RETENTION_UNREFERENCED_BLOBS_DAYS = config('RETENTION_UNREFERENCED_BLOBS_DAYS', default=1, cast=int)
+RETENTION_CHUNK_SIZE = config('RETENTION_CHUNK_SIZE', default=5000, cast=int)
+RETENTION_CHUNK_PAUSE = config('RETENTION_CHUNK_PAUSE', default=0.0, cast=float)  # seconds between chunks
+
+CELERY_BEAT_SCHEDULE = {
+    'flush-idea-views': {
+        'task': 'apps.ideas.tasks.flush_idea_views',
+        'schedule': IDEA_VIEWS_FLUSH_INTERVAL,
+    },
+    'fold-vote-counters': {
+        'task': 'apps.ideas.tasks.fold_vote_counters',
+        'schedule': VOTE_COUNTER_FOLD_INTERVAL,
+    },
+    'rebuild-trending-scores': {
+        'task': 'apps.ideas.tasks.rebuild_trending_scores',
+        'schedule': TRENDING_REBUILD_INTERVAL,
+    },
+    'send-immediate-notification-emails': {
+        'task': 'apps.notifications.tasks.send_notification_digests',
+        'schedule': NOTIFICATION_EMAIL_INTERVAL,
+        'args': ('immediate',),
+    },
+    'send-daily-notification-digests': {
+        'task': 'apps.notifications.tasks.send_notification_digests',
+        'schedule': crontab(hour=NOTIFICATION_DIGEST_HOUR, minute=0),
+        'args': ('daily',),
+    },
+    'send-weekly-notification-digests': {
+        'task': 'apps.notifications.tasks.send_notification_digests',
+        'schedule': crontab(hour=NOTIFICATION_DIGEST_HOUR, minute=0, day_of_week='mon'),
+        'args': ('weekly',),
+    },
+    'update-daily-rollups': {
+        'task': 'apps.ideas.tasks.update_daily_rollups',
+        'schedule': ANALYTICS_ROLLUP_INTERVAL,
+    },
+    'apply-data-retention': {
+        'task': 'apps.core.tasks.apply_data_retention',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
+
 # Cache Configuration
 CACHES = {
     'default': {
@@ -0,0 +1,34 @@
+"""
+Settings for the pytest suite.
+
+Tests run on an in-memory SQLite database with the local-memory cache and
+eager Celery tasks, so neither PostgreSQL nor Redis is needed.
+"""
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+STATICFILES_DIRS = []
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler', 'level': 'WARNING'}},
+    'root': {'handlers': ['console'], 'level': 'WARNING'},
+}
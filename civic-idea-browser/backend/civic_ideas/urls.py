@@ -6,6 +6,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from apps.core.views import image_variant_view, metrics_view
 
 urlpatterns = [
     # Admin interface
@@ -16,6 +17,8 @@ urlpatterns = [
     path('api/', include('apps.ideas.urls')),
     path('api/', include('apps.categories.urls')),
     path('api/', include('apps.notifications.urls')),
+    path('api/metrics/', metrics_view, name='metrics'),
+    path('api/images/<slug:kind>/<slug:size>.<slug:fmt>', image_variant_view, name='image_variant'),
     
     # Authentication
     path('accounts/', include('allauth.urls')),
@@ -0,0 +1,61 @@
+"""
+Fixtures shared by the test suites of all apps.
+"""
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from apps.ideas.models import Idea
+from apps.users.usercache import local_cache
+# Loading the app makes shared tasks use the test settings (eager tasks).
+from civic_ideas.celery import app as celery_app  # noqa: F401
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    cache.clear()
+    local_cache.clear()
+    yield
+    cache.clear()
+    local_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def make_user(db):
+    counter = iter(range(1, 1_000_000))
+    
+    def make(username=None, **kwargs):
+        username = username or f'user{next(counter)}'
+        kwargs.setdefault('email', f'{username}@example.com')
+        return User.objects.create_user(username=username, password='password', **kwargs)
+    return make
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user('alice')
+
+
+@pytest.fixture
+def make_idea(db, user):
+    def make(**kwargs):
+        kwargs.setdefault('title', 'Plant more trees')
+        kwargs.setdefault('description', 'Shade for the main street.')
+        kwargs.setdefault('author', user)
+        kwargs.setdefault('status', 'submitted')
+        return Idea.objects.create(**kwargs)
+    return make